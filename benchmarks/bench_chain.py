@@ -0,0 +1,45 @@
+"""
+Micro-benchmark del overhead local por llamada de CVAnalyzer.
+
+Compara reconstruir la cadena (prompt + with_structured_output + composición)
+en cada llamada frente a reutilizar la cadena cacheada. No hace llamadas de
+red: solo mide la parte local previa a la invocación del LLM.
+
+Uso:
+    python -m benchmarks.bench_chain [--iterations 200]
+"""
+import argparse
+import time
+
+from langchain_openai import ChatOpenAI
+
+from src.core.evaluator import build_evaluation_chain, get_evaluation_chain, clear_chain_cache
+
+
+def _time_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    # Cliente real pero con una key falsa: with_structured_output no llama a la red
+    llm = ChatOpenAI(model="gpt-5", api_key="sk-bench", temperature=0)
+    clear_chain_cache()
+
+    before = _time_per_call(lambda: build_evaluation_chain(llm), args.iterations)
+    after = _time_per_call(lambda: get_evaluation_chain(llm, "openai"), args.iterations)
+
+    print(f"Iteraciones: {args.iterations}")
+    print(f"Antes  (cadena por llamada): {before * 1e6:10.1f} µs/llamada")
+    print(f"Después (cadena cacheada):   {after * 1e6:10.1f} µs/llamada")
+    print(f"Mejora: x{before / after:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark del tiempo de importación (arranque en frío) de los módulos de Velora.
+
+Cada módulo se importa en un proceso nuevo con `python -X importtime` y se
+analiza la salida: tiempo acumulado del módulo, dependencias más lentas y si
+se ha cargado el SDK de algún proveedor (solo deben cargarse al crear el
+primer cliente, ver src.llm.factory).
+
+Uso:
+    python -m benchmarks.bench_import [--module src.core.interviewer ...] [--top 10] [--budget-ms 2000]
+
+Con --budget-ms el proceso termina con código 1 si algún módulo lo supera.
+"""
+import argparse
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos de entrada: factoría, evaluador, entrevistador y CLI
+MODULES = ("src.llm.factory", "src.core.evaluator", "src.core.interviewer", "src.cli")
+
+# SDKs que no deben importarse al cargar Velora
+PROVIDER_SDKS = ("langchain_openai", "langchain_google_genai")
+
+# import time:  self [us] | cumulative | imported package
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+
+@dataclass
+class ImportEntry:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    total_ms: float
+    entries: List[ImportEntry] = field(default_factory=list)
+
+    @property
+    def loaded(self) -> List[str]:
+        return [e.name for e in self.entries]
+
+    @property
+    def provider_sdks(self) -> List[str]:
+        return [sdk for sdk in PROVIDER_SDKS if sdk in self.loaded]
+
+    def slowest(self, n: int = 10) -> List[ImportEntry]:
+        """
+        Módulos con más tiempo propio (sin contar sus dependencias).
+        """
+        return sorted(self.entries, key=lambda e: e.self_us, reverse=True)[:n]
+
+
+def parse_importtime(output: str) -> List[ImportEntry]:
+    """
+    Entradas de la salida de `-X importtime` (ignora la cabecera y otras líneas).
+    """
+    entries = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append(ImportEntry(name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+
+def profile_import(module: str, python: str = sys.executable) -> ImportProfile:
+    """
+    Importa `module` en un intérprete nuevo y devuelve su perfil de importación.
+    """
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}:\n{proc.stderr[-2000:]}")
+    entries = parse_importtime(proc.stderr)
+    top = [e for e in entries if e.name == module and e.depth == 0]
+    total_us = top[-1].cumulative_us if top else sum(e.self_us for e in entries)
+    return ImportProfile(module=module, total_ms=total_us / 1000, entries=entries)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", default=None, help="Módulo a medir (se puede repetir).")
+    parser.add_argument("--top", type=int, default=10, help="Dependencias más lentas a mostrar.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Tiempo máximo de importación por módulo.")
+    args = parser.parse_args(argv)
+
+    over_budget = []
+    for module in args.module or MODULES:
+        profile = profile_import(module)
+        sdks = ", ".join(profile.provider_sdks) or "ninguno"
+        print(f"\n{module}: {profile.total_ms:.1f} ms ({len(profile.entries)} módulos, SDKs de proveedor: {sdks})")
+        for entry in profile.slowest(args.top):
+            print(f"  {entry.self_us / 1000:>8.1f} ms  {entry.name}")
+        if args.budget_ms is not None and profile.total_ms > args.budget_ms:
+            over_budget.append(f"{module}: {profile.total_ms:.1f} ms > {args.budget_ms:.0f} ms")
+
+    for line in over_budget:
+        print(f"FUERA DE PRESUPUESTO {line}", file=sys.stderr)
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
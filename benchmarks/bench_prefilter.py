@@ -0,0 +1,90 @@
+"""
+Benchmark del pre-filtro léxico (src.core.prefilter) sobre las muestras de data/.
+
+Para cada oferta extrae los requisitos de las viñetas del fichero (los que
+empiezan por "Valorable" se consideran opcionales), pasa el pre-filtro a
+todos los CVs y muestra qué fracción se marcaría sin evidencia de algún
+requisito obligatorio.
+
+Con --provider se evalúa además cada par con el LLM y se calcula el recall
+del pre-filtro: de los candidatos que el LLM no descarta, qué fracción deja
+pasar el pre-filtro (debe ser 1.0 para usar la política "skip" sin perder
+candidatos). Sin LLM, test/test_prefilter.py comprueba el recall sobre estas
+muestras con la evidencia etiquetada a mano.
+
+Uso:
+    python -m benchmarks.bench_prefilter [--data data] [--provider openai]
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from src.core.prefilter import RequirementPrefilter
+from src.models.schemas import OfferRequirement, OfferRequirements
+from src.utils.file_loader import iter_corpus, read_data_file
+
+
+def parse_offer_locally(offer_text: str) -> OfferRequirements:
+    """
+    Extracción sencilla sin LLM: una viñeta por requisito.
+    """
+    requirements = []
+    for line in offer_text.splitlines():
+        line = line.strip()
+        if line.startswith("- "):
+            name = line[2:].strip()
+            requirements.append(OfferRequirement(name=name, mandatory=not name.lower().startswith("valorable")))
+    return OfferRequirements(requirements=requirements)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data")
+    parser.add_argument("--provider", default=None, help="Proveedor LLM para el recall (openai o gemini).")
+    args = parser.parse_args(argv)
+
+    data = Path(args.data)
+    offers = sorted(data.glob("oferta*.txt"))
+    cvs = list(iter_corpus([data], pattern="cv*.txt", recursive=False))
+    analyzer = None
+    if args.provider:
+        from src.core.evaluator import CVAnalyzer
+        analyzer = CVAnalyzer(args.provider)
+
+    total = flagged = kept_by_llm = kept_by_both = 0
+    elapsed = 0.0
+    for offer_path in offers:
+        offer_text = read_data_file(offer_path)
+        requirements = parse_offer_locally(offer_text)
+
+        start = time.perf_counter()
+        decisions = RequirementPrefilter(requirements).screen([record.text for record in cvs])
+        elapsed += time.perf_counter() - start
+
+        print(f"\n{offer_path.name}")
+        for record, decision in zip(cvs, decisions):
+            total += 1
+            flagged += decision.flagged
+            line = f"  {record.path.name:<20} {'MARCADO' if decision.flagged else 'ok':<8}"
+            if decision.flagged:
+                line += f" sin evidencia: {', '.join(decision.missing_mandatory)}"
+            if analyzer is not None:
+                result = analyzer.analyze(offer_text, record.text, requirements=requirements)
+                if not result.discarded:
+                    kept_by_llm += 1
+                    kept_by_both += not decision.flagged
+                line += f" | LLM: {'descartado' if result.discarded else result.score}"
+            print(line)
+
+    print(f"\nPares oferta/CV:   {total}")
+    print(f"Marcados:          {flagged} ({flagged / total:.0%})" if total else "Marcados:          0")
+    print(f"Tiempo pre-filtro: {elapsed * 1e3:.2f} ms en total")
+    if analyzer is None:
+        print("Recall:            (usa --provider para compararlo con los veredictos del LLM)")
+    elif kept_by_llm:
+        print(f"Recall:            {kept_by_both / kept_by_llm:.2f} ({kept_by_both}/{kept_by_llm} no descartados por el LLM)")
+
+
+if __name__ == "__main__":
+    main()
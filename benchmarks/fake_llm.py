@@ -0,0 +1,223 @@
+"""
+Modelo de chat falso y configurable para los benchmarks (sin red).
+
+- Latencia programable: constante, uniforme o log-normal, con semilla.
+- Tokens: usage_metadata con los tokens de entrada estimados (~4 caracteres
+  por token) y un número fijo de tokens de salida.
+- Guion de respuestas para el entrevistador, incluidas las llamadas a
+  registrar_validacion (ver interview_script).
+- Salida estructurada determinista para EvaluationVerdicts, OfferRequirements
+  e InterviewTurn (entrevistador en modo fused).
+"""
+import asyncio
+import hashlib
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import ConfigDict, PrivateAttr
+
+from src.core.interviewer import END_TOKEN
+from src.llm.factory import get_safe_content
+from src.models.schemas import (
+    EvaluationVerdicts,
+    InterviewTurn,
+    OfferRequirement,
+    OfferRequirements,
+    RequirementVerdict,
+    SkillValidation,
+)
+
+_REQUIREMENT_LINE = re.compile(r"^\s*-\s*(?:\[(OBLIGATORIO|OPCIONAL)\]\s*)?(.+?)\s*$", re.MULTILINE)
+_VERDICTS = ("CUMPLE", "NO_CUMPLE", "NO_MENCIONA")
+_PENDING = re.compile(r"Requisitos pendientes: \[(.*)\]")
+
+
+@dataclass
+class LatencyDistribution:
+    """
+    Distribución de la latencia simulada (segundos).
+    - constant: siempre `mean`.
+    - uniform: entre mean - spread y mean + spread.
+    - lognormal: mediana `mean` y sigma `spread` (cola larga, como las APIs reales).
+    """
+    kind: str = "constant"
+    mean: float = 0.0
+    spread: float = 0.0
+    seed: Optional[int] = 0
+
+    def __post_init__(self):
+        if self.kind not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Distribución de latencia no soportada: {self.kind}.")
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        if self.mean <= 0:
+            return 0.0
+        with self._lock:
+            if self.kind == "uniform":
+                return max(self._rng.uniform(self.mean - self.spread, self.mean + self.spread), 0.0)
+            if self.kind == "lognormal":
+                return self._rng.lognormvariate(0, self.spread) * self.mean
+            return self.mean
+
+
+def _stable_choice(*parts: str) -> str:
+    digest = hashlib.sha256("|".join(parts).encode("utf-8")).digest()
+    return _VERDICTS[digest[0] % len(_VERDICTS)]
+
+
+def _fake_turn(messages: Sequence[BaseMessage]) -> InterviewTurn:
+    # Tras la respuesta con el nombre, cada mensaje del candidato valida el primer pendiente
+    notes = [_PENDING.search(get_safe_content(m.content)) for m in messages]
+    match = next((note for note in reversed(notes) if note), None)
+    pending = [p.strip() for p in match.group(1).split(",")] if match else []
+    answers = sum(1 for m, note in zip(messages, notes) if m.type == "human" and not note)
+    validations = [SkillValidation(skill=pending[0], conclusion=f"Experiencia explicada en {pending[0]}")] if pending and answers > 1 else []
+    remaining = pending[len(validations):]
+    if not remaining:
+        return InterviewTurn(validations=validations, reply=f"Muchas gracias por tu tiempo. {END_TOKEN}")
+    return InterviewTurn(validations=validations, reply=f"Gracias. ¿Y tu experiencia con {remaining[0]}?")
+
+
+def fake_structured_output(schema, messages: Sequence[BaseMessage]):
+    """
+    Respuesta estructurada determinista a partir del prompt:
+    - OfferRequirements: una entrada por viñeta de la oferta.
+    - EvaluationVerdicts: un veredicto por requisito, estable para cada (requisito, CV).
+    - InterviewTurn: valida el primer requisito pendiente y pregunta por el siguiente.
+    """
+    if schema is InterviewTurn:
+        return _fake_turn(messages)
+    texts = [get_safe_content(m.content) for m in messages if m.type == "human"]
+    stable = texts[0] if texts else ""
+    candidate = texts[-1] if len(texts) > 1 else ""
+    requirements = [
+        (name, label != "OPCIONAL" and not name.lower().startswith("valorable"))
+        for label, name in _REQUIREMENT_LINE.findall(stable)
+    ]
+    if schema is OfferRequirements:
+        return OfferRequirements(requirements=[OfferRequirement(name=n, mandatory=m) for n, m in requirements])
+    if schema is EvaluationVerdicts:
+        return EvaluationVerdicts(
+            verdicts=[
+                RequirementVerdict(requirement=n, mandatory=m, verdict=_stable_choice(n, candidate))
+                for n, m in requirements
+            ],
+            explaination="Evaluación simulada.",
+        )
+    raise ValueError(f"Esquema no soportado por el modelo falso: {schema}.")
+
+
+def interview_script(
+    requirements: Sequence[str],
+    name: str = "Alex",
+    llm_greeting: bool = False,
+    llm_farewell: bool = False,
+) -> List[AIMessage]:
+    """
+    Guion de una entrevista completa: una pregunta por requisito y
+    registrar_validacion tras cada respuesta. Cada mensaje del candidato
+    (salvo el primero) consume dos respuestas: la llamada a la herramienta y
+    el siguiente mensaje del entrevistador.
+    El saludo y la despedida son plantillas del entrevistador (sin LLM); con
+    llm_greeting / llm_farewell se incluyen en el guion para entrevistadores
+    sin plantillas (InterviewTemplates(greeting=None, farewell=None)).
+    """
+    script = [AIMessage(content=f"Hola, soy {name}. ¿Cómo te llamas?")] if llm_greeting else []
+    script.append(AIMessage(content=f"Encantado. Cuéntame un proyecto donde usaras {requirements[0]}."))
+    for i, req in enumerate(requirements):
+        script.append(AIMessage(content="", tool_calls=[{
+            "name": "registrar_validacion",
+            "args": {"skill": req, "conclusion": f"Experiencia explicada en {req}"},
+            "id": f"call_{i}",
+        }]))
+        if i + 1 < len(requirements):
+            script.append(AIMessage(content=f"Gracias. ¿Y tu experiencia con {requirements[i + 1]}?"))
+        elif llm_farewell:
+            script.append(AIMessage(content=f"Muchas gracias por tu tiempo. {END_TOKEN}"))
+    return script
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Modelo de chat de LangChain sin red para medir el overhead de Velora.
+    Las respuestas de texto siguen `script` (de forma cíclica) y la salida
+    estructurada se genera con `structured` (fake_structured_output por defecto).
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    latency: Any = None
+    script: List[AIMessage] = []
+    output_tokens: int = 50
+    structured: Optional[Callable] = None
+
+    _position: int = PrivateAttr(default=0)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "velora-fake"
+
+    def _delay(self) -> float:
+        return self.latency.sample() if self.latency is not None else 0.0
+
+    def _next_message(self, messages: Sequence[BaseMessage]) -> AIMessage:
+        with self._lock:
+            self.calls += 1
+            if not self.script:
+                message = AIMessage(content="Respuesta simulada.")
+            else:
+                message = self.script[self._position % len(self.script)]
+                self._position += 1
+        input_tokens = sum(len(get_safe_content(m.content)) for m in messages) // 4 + 1
+        return AIMessage(
+            content=message.content,
+            tool_calls=message.tool_calls,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": self.output_tokens,
+                "total_tokens": input_tokens + self.output_tokens,
+            },
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def with_structured_output(self, schema, **kwargs):
+        build = self.structured or fake_structured_output
+
+        def to_messages(value):
+            return value.to_messages() if hasattr(value, "to_messages") else value
+
+        def invoke(value):
+            with self._lock:
+                self.calls += 1
+            time.sleep(self._delay())
+            return build(schema, to_messages(value))
+
+        async def ainvoke(value):
+            with self._lock:
+                self.calls += 1
+            await asyncio.sleep(self._delay())
+            return build(schema, to_messages(value))
+
+        return RunnableLambda(invoke, afunc=ainvoke)
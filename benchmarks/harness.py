@@ -0,0 +1,210 @@
+"""
+Benchmarks de Velora sin red, con FakeChatModel.
+
+Mide el análisis de CVs (CVAnalyzer.analyze), el lote (analyze_many) y el
+grafo completo del entrevistador (modos tools y fused), e informa de throughput, latencias
+p50/p95/p99 y pico de memoria (tracemalloc).
+
+Uso:
+    python -m benchmarks.harness [--latency-ms 0] [--cvs 50] [--interviews 10]
+                                 [--output resultados.json] [--baseline base.json --tolerance 0.5]
+
+Con --baseline se comparan las latencias p95 con una ejecución anterior y
+el proceso termina con código 1 si alguna empeora más de la tolerancia.
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+from unittest.mock import patch
+
+from benchmarks.fake_llm import FakeChatModel, LatencyDistribution, interview_script
+from src.core.evaluator import CVAnalyzer, clear_chain_cache
+from src.core.interviewer import Interviewer
+from src.utils.stats import percentile
+
+OFFER = """Requisitos de la oferta:
+- Experiencia mínima de 3 años en Python
+- Formación mínima requerida: Ingeniería Informática
+- Experiencia con Docker y Kubernetes
+- Valorable conocimientos en FastAPI y LangChain
+"""
+
+REQUIREMENTS = ["Python", "Docker", "Kubernetes", "FastAPI"]
+
+
+def _cv(i: int) -> str:
+    return (
+        f"Candidato {i}\nExperiencia:\nDesarrollador backend en EMPRESA {i} con Python y Django.\n"
+        + "Proyectos de datos y APIs REST. " * 20
+        + "\nFormación:\nIngeniería Informática\n"
+    )
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    operations: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    peak_memory_kb: float
+
+
+def _summarize(name: str, latencies: List[float], seconds: float, peak: int) -> BenchmarkResult:
+    return BenchmarkResult(
+        name=name,
+        operations=len(latencies),
+        seconds=round(seconds, 4),
+        throughput=round(len(latencies) / seconds, 2) if seconds else 0.0,
+        p50_ms=round(percentile(latencies, 0.50) * 1e3, 3),
+        p95_ms=round(percentile(latencies, 0.95) * 1e3, 3),
+        p99_ms=round(percentile(latencies, 0.99) * 1e3, 3),
+        peak_memory_kb=round(peak / 1024, 1),
+    )
+
+
+@contextmanager
+def _measure():
+    """
+    Mide el tiempo total y el pico de memoria de un bloque.
+    """
+    stats = {}
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats["seconds"] = time.perf_counter() - start
+        stats["peak"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+
+@contextmanager
+def _fake_llm(llm: FakeChatModel):
+    # Las cadenas se cachean por proveedor: se vacían para usar el modelo falso
+    clear_chain_cache()
+    with patch("src.core.evaluator.get_llm", return_value=llm), patch("src.core.interviewer.get_llm", return_value=llm):
+        yield
+    clear_chain_cache()
+
+
+def bench_analyze(cvs: int, latency: LatencyDistribution) -> BenchmarkResult:
+    llm = FakeChatModel(latency=latency)
+    with _fake_llm(llm):
+        analyzer = CVAnalyzer(provider="openai")
+        latencies = []
+        with _measure() as stats:
+            for i in range(cvs):
+                start = time.perf_counter()
+                analyzer.analyze(OFFER, _cv(i))
+                latencies.append(time.perf_counter() - start)
+    return _summarize("analyze", latencies, stats["seconds"], stats["peak"])
+
+
+def bench_batch(cvs: int, latency: LatencyDistribution, concurrency: int = 8) -> BenchmarkResult:
+    llm = FakeChatModel(latency=latency)
+    with _fake_llm(llm):
+        analyzer = CVAnalyzer(provider="openai")
+        latencies = []
+
+        def on_item(item):
+            # Tiempo hasta que cada CV del lote está disponible
+            latencies.append(time.perf_counter() - started)
+
+        with _measure() as stats:
+            started = time.perf_counter()
+            results = analyzer.analyze_many(OFFER, [_cv(i) for i in range(cvs)], max_concurrency=concurrency, on_item=on_item)
+    if not all(r.ok for r in results):
+        raise RuntimeError("El lote del benchmark tiene errores.")
+    return _summarize(f"analyze_many(x{concurrency})", latencies, stats["seconds"], stats["peak"])
+
+
+def bench_interview(interviews: int, latency: LatencyDistribution, mode: str = "tools") -> BenchmarkResult:
+    """
+    Entrevistas completas por el grafo real: un turno por mensaje del candidato.
+    En modo fused las respuestas salen de la salida estructurada (InterviewTurn).
+    """
+    latencies = []
+    with _measure() as stats:
+        for _ in range(interviews):
+            llm = FakeChatModel(latency=latency, script=interview_script(REQUIREMENTS))
+            with _fake_llm(llm):
+                interviewer = Interviewer(provider="openai", mode=mode)
+            thread_id = str(uuid.uuid4())
+
+            start = time.perf_counter()
+            interviewer.initialize_interview(list(REQUIREMENTS), thread_id)
+            latencies.append(time.perf_counter() - start)
+            for answer in ["Me llamo Ana"] + [f"Usé {req} en varios proyectos." for req in REQUIREMENTS]:
+                start = time.perf_counter()
+                interviewer.process_message(answer, thread_id)
+                latencies.append(time.perf_counter() - start)
+
+            state = interviewer.graph.get_state({"configurable": {"thread_id": thread_id}}).values
+            if state["skills_pending"]:
+                raise RuntimeError(f"La entrevista simulada no validó: {state['skills_pending']}")
+    return _summarize("interview_turn" if mode == "tools" else f"interview_turn_{mode}", latencies, stats["seconds"], stats["peak"])
+
+
+def run_all(cvs: int = 50, interviews: int = 10, latency_ms: float = 0.0, concurrency: int = 8) -> List[BenchmarkResult]:
+    latency = LatencyDistribution(kind="lognormal" if latency_ms else "constant", mean=latency_ms / 1000, spread=0.5)
+    return [
+        bench_analyze(cvs, latency),
+        bench_batch(cvs, latency, concurrency),
+        bench_interview(interviews, latency),
+        bench_interview(interviews, latency, mode="fused"),
+    ]
+
+
+def compare(results: List[BenchmarkResult], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """
+    Regresiones de p95 respecto a una ejecución anterior (nombre -> resultado).
+    """
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous and previous["p95_ms"] > 0 and result.p95_ms > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{result.name}: p95 {result.p95_ms} ms (antes {previous['p95_ms']} ms)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cvs", type=int, default=50)
+    parser.add_argument("--interviews", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia mediana simulada del LLM (0 = solo overhead).")
+    parser.add_argument("--output", default=None, help="Guardar los resultados en JSON.")
+    parser.add_argument("--baseline", default=None, help="JSON de una ejecución anterior para comparar.")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Empeoramiento máximo permitido del p95 (0.5 = +50%%).")
+    args = parser.parse_args(argv)
+
+    results = run_all(args.cvs, args.interviews, args.latency_ms, args.concurrency)
+
+    print(f"{'benchmark':<22}{'ops':>6}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'pico KB':>10}")
+    for r in results:
+        print(f"{r.name:<22}{r.operations:>6}{r.throughput:>10}{r.p50_ms:>10}{r.p95_ms:>10}{r.p99_ms:>10}{r.peak_memory_kb:>10}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({r.name: asdict(r) for r in results}, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESIÓN {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+"""
+Interfaz de línea de comandos de Velora (sin Streamlit).
+
+Ordena un lote de CVs contra una oferta:
+    python -m src.cli rank --offer data/oferta1.txt --cvs data/ --output ranking.csv
+
+Las evaluaciones se ejecutan en paralelo y cada resultado se añade a un
+fichero de checkpoint (JSONL). Si el proceso se interrumpe, al relanzar el
+mismo comando solo se evalúan los CVs que faltan (con otro proveedor, modelo,
+prompt o pre-filtro se evalúan todos de nuevo).
+
+Resume la telemetría por etapa (p50/p95, tokens, coste):
+    python -m src.cli report --input telemetry.jsonl [--by thread_id]
+
+Purga las entrevistas terminadas o abandonadas del checkpointer SQLite:
+    python -m src.cli purge-checkpoints [--path checkpoints.sqlite] [--ttl 86400] [--max-idle 604800]
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from src.core.cache import prompt_version
+from src.core.checkpoint import DEFAULT_CHECKPOINT_MAX_IDLE, DEFAULT_CHECKPOINT_TTL, SQLiteCheckpointer
+from src.core.evaluator import CVAnalyzer
+from src.core.prefilter import PREFILTER_POLICIES
+from src.llm.factory import ResiliencePolicy, get_model_name
+from src.llm.prompts import sys_prompt_cv_evaluator, sys_prompt_evaluator, sys_prompt_offer_parser
+from src.models.schemas import BatchItemResult
+from src.utils.file_loader import iter_corpus, iter_files, read_data_file
+from src.utils.telemetry import JsonlSink, Telemetry, format_report, load_spans, set_telemetry, summarize_spans
+
+# Columnas del CSV de salida (las listas se unen con "; ")
+CSV_FIELDS = [
+    "rank", "file", "score", "discarded",
+    "matching_requirements", "unmatching_requirements", "not_found_requirements",
+    "explaination", "prefiltered", "missing_mandatory", "error",
+]
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def run_key(offer_hash: str, provider: str, prefilter: Optional[str]) -> str:
+    """
+    Configuración de una ejecución: oferta, proveedor, modelo, versión de los
+    prompts y política del pre-filtro. Solo se reanudan filas con la misma clave.
+    """
+    prompts = "".join(prompt_version(p) for p in (sys_prompt_offer_parser, sys_prompt_cv_evaluator, sys_prompt_evaluator))
+    return _content_hash("|".join([offer_hash, provider, get_model_name(provider), prompts, prefilter or ""]))
+
+
+class ProgressBar:
+    """
+    Barra de progreso mínima en una sola línea (por defecto en stderr).
+    Sin total (corpus leído de forma perezosa) solo muestra el contador.
+    """
+
+    def __init__(self, total: Optional[int], stream: TextIO = sys.stderr, width: int = 30, enabled: bool = True):
+        self.total = total
+        self.stream = stream
+        self.width = width
+        self.enabled = enabled
+        self.done = self.errors = 0
+
+    def update(self, ok: bool = True, count: int = 1):
+        self.done += count
+        if not ok:
+            self.errors += count
+        self._draw()
+
+    def _draw(self):
+        if not self.enabled:
+            return
+        if self.total is None:
+            self.stream.write(f"\r{self.done} CVs procesados errores={self.errors}")
+            self.stream.flush()
+            return
+        filled = int(self.width * self.done / self.total) if self.total else self.width
+        bar = "#" * filled + "-" * (self.width - filled)
+        self.stream.write(f"\r[{bar}] {self.done}/{self.total} errores={self.errors}")
+        self.stream.flush()
+
+    def close(self):
+        if self.enabled:
+            self.stream.write("\n")
+            self.stream.flush()
+
+
+def load_checkpoint(path: Path, key: str) -> Dict[str, dict]:
+    """
+    Resultados correctos (o saltados por el pre-filtro) ya guardados con la
+    misma configuración (ver run_key): hash del CV -> fila. Las filas de otra
+    oferta, proveedor, modelo, prompt o pre-filtro, las líneas corruptas
+    (p. ej. cortadas por una interrupción) y los errores se vuelven a evaluar.
+    """
+    done = {}
+    if not path.exists():
+        return done
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if row.get("run_key") == key and (row.get("result") is not None or row.get("skipped")):
+                done[row["cv_hash"]] = row
+    return done
+
+
+def rank_rows(rows: Iterable[dict]) -> List[dict]:
+    """
+    Ordena: primero los no descartados por puntuación, luego los descartados,
+    después los saltados por el pre-filtro (sin evaluar) y al final los
+    errores. Añade la posición (rank).
+    """
+    def sort_key(row):
+        result = row.get("result")
+        if result is None:
+            return (3 if row.get("error") else 2, 0, row["file"])
+        return (1 if result["discarded"] else 0, -result["score"], row["file"])
+
+    ranked = sorted(rows, key=sort_key)
+    for position, row in enumerate(ranked, start=1):
+        row["rank"] = position
+    return ranked
+
+
+def write_ranking(rows: List[dict], output: Path, fmt: str):
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("w", encoding="utf-8", newline="") as fh:
+        if fmt == "jsonl":
+            for row in rows:
+                record = {
+                    "rank": row["rank"],
+                    "file": row["file"],
+                    "prefiltered": row.get("prefiltered", False),
+                    "missing_mandatory": row.get("missing_mandatory", []),
+                    "error": row.get("error"),
+                }
+                record.update(row.get("result") or {})
+                fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return
+
+        writer = csv.DictWriter(fh, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            result = row.get("result") or {}
+            writer.writerow({
+                "rank": row["rank"],
+                "file": row["file"],
+                "score": result.get("score", ""),
+                "discarded": result.get("discarded", ""),
+                "matching_requirements": "; ".join(result.get("matching_requirements", [])),
+                "unmatching_requirements": "; ".join(result.get("unmatching_requirements", [])),
+                "not_found_requirements": "; ".join(result.get("not_found_requirements", [])),
+                "explaination": result.get("explaination", ""),
+                "prefiltered": row.get("prefiltered", False),
+                "missing_mandatory": "; ".join(row.get("missing_mandatory", [])),
+                "error": row.get("error") or "",
+            })
+
+
+def _windows(records: Iterable, size: int) -> Iterator[list]:
+    # Agrupa un iterable en listas de como mucho `size` elementos, sin materializarlo
+    window = []
+    for record in records:
+        window.append(record)
+        if len(window) >= size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+def run_rank(args: argparse.Namespace, analyzer: Optional[CVAnalyzer] = None) -> int:
+    offer_path = Path(args.offer)
+    offer_text = read_data_file(offer_path)
+    offer_hash = _content_hash(offer_text)
+    if args.window < 1:
+        raise ValueError("--window debe ser mayor o igual que 1.")
+
+    output = Path(args.output)
+    fmt = args.format or ("jsonl" if output.suffix == ".jsonl" else "csv")
+    checkpoint = Path(args.checkpoint) if args.checkpoint else output.with_name(output.name + ".checkpoint.jsonl")
+
+    # 1. Reanudar: los CVs ya evaluados en una ejecución anterior no se vuelven a enviar
+    key = run_key(offer_hash, args.provider, args.prefilter)
+    done = load_checkpoint(checkpoint, key)
+
+    # CVs decodificados y sin duplicados (mismo contenido en varios ficheros),
+    # leídos de forma perezosa: solo el texto de una ventana está en memoria
+    # La oferta y los demás ficheros de ofertas de los directorios de CVs no se evalúan
+    cv_dirs = [p for p in args.cvs if Path(p).is_dir()]
+    excluded = [offer_path] + [p for pattern in args.exclude for p in iter_files(cv_dirs, pattern, recursive=False)]
+    corpus = iter_corpus(args.cvs, args.pattern, recursive=False, exclude=excluded)
+    cvs = []  # (fichero, hash) de todos los CVs, para el ranking final
+    progress = ProgressBar(None, enabled=not args.quiet)
+
+    # 2. Evaluar por ventanas, en paralelo, guardando cada resultado en cuanto termina
+    errors = {}
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    with checkpoint.open("a", encoding="utf-8") as fh:
+        todo = []
+
+        def on_item(item: BatchItemResult):
+            record = todo[item.index]
+            row = {
+                "file": str(record.path),
+                "cv_hash": record.sha256,
+                "offer_hash": offer_hash,
+                "run_key": key,
+                "result": item.result.model_dump() if item.ok else None,
+                "prefiltered": item.prefiltered,
+                "skipped": item.skipped,
+                "missing_mandatory": item.missing_mandatory,
+                "error": item.error,
+            }
+            fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+            fh.flush()
+            if item.ok or item.skipped:
+                done[record.sha256] = row
+            else:
+                errors[record.sha256] = row
+            progress.update(ok=item.ok or item.skipped)
+
+        for window in _windows(corpus, args.window):
+            cvs.extend((record.path, record.sha256) for record in window)
+            todo = [record for record in window if record.sha256 not in done]
+            if len(window) > len(todo):
+                progress.update(count=len(window) - len(todo))
+            if not todo:
+                continue
+            analyzer = analyzer or CVAnalyzer(
+                args.provider,
+                resilience=ResiliencePolicy(deadline=args.deadline, fallback=not args.no_fallback),
+            )
+            analyzer.analyze_many(
+                offer_text,
+                [record.text for record in todo],
+                max_concurrency=args.concurrency,
+                timeout=args.timeout,
+                on_item=on_item,
+                prefilter=args.prefilter,
+            )
+    progress.close()
+
+    if not cvs:
+        print("No se han encontrado CVs que evaluar.", file=sys.stderr)
+        return 1
+
+    # 3. Ranking de los CVs de esta ejecución (con el nombre de fichero actual)
+    rows = []
+    for path, cv_hash in cvs:
+        row = dict(done.get(cv_hash) or errors.get(cv_hash) or {"error": "Sin resultado"})
+        row["file"] = str(path)
+        rows.append(row)
+    write_ranking(rank_rows(rows), output, fmt)
+
+    skipped = sum(1 for row in done.values() if row.get("skipped"))
+    print(
+        f"Ranking guardado en {output} ({len(done) - skipped} evaluados, "
+        f"{skipped} sin evaluar por el pre-filtro, {len(errors)} con error).",
+        file=sys.stderr,
+    )
+    return 0 if not errors else 1
+
+
+def run_report(args: argparse.Namespace) -> int:
+    spans = load_spans(args.input)
+    if args.stage:
+        spans = [span for span in spans if span.get("stage") in args.stage]
+    if not spans:
+        print("No hay spans que resumir.", file=sys.stderr)
+        return 1
+    print(format_report(summarize_spans(spans, by=args.by), by=args.by))
+    return 0
+
+
+def run_purge_checkpoints(args: argparse.Namespace) -> int:
+    path = Path(args.path or os.getenv("VELORA_CHECKPOINT_PATH", ".velora_cache/checkpoints.sqlite"))
+    if not path.exists():
+        raise FileNotFoundError(f"No existe el fichero de checkpoints: {path}")
+    checkpointer = SQLiteCheckpointer(path)
+    try:
+        purged = checkpointer.purge_finished(ttl=args.ttl, max_idle=args.max_idle or None)
+    finally:
+        checkpointer.close()
+    print(f"{purged} entrevistas eliminadas de {path}.", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Herramientas de línea de comandos de Velora.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rank = subparsers.add_parser("rank", help="Evalúa un lote de CVs contra una oferta y los ordena.")
+    rank.add_argument("--offer", required=True, help="Fichero con la oferta de trabajo.")
+    rank.add_argument("--cvs", required=True, nargs="+", help="Directorios o ficheros de CVs.")
+    rank.add_argument("--pattern", default="*.txt", help="Patrón de ficheros dentro de los directorios (por defecto *.txt).")
+    rank.add_argument(
+        "--exclude", nargs="*", default=["oferta*"],
+        help="Patrones de ficheros de los directorios que no son CVs (por defecto oferta*).",
+    )
+    rank.add_argument("--provider", default="openai", choices=["openai", "gemini"])
+    rank.add_argument("--concurrency", type=int, default=4, help="Evaluaciones en paralelo.")
+    rank.add_argument("--window", type=int, default=64, help="CVs leídos y enviados por ventana (acota la memoria).")
+    rank.add_argument("--timeout", type=float, default=None, help="Segundos máximos por CV.")
+    rank.add_argument("--deadline", type=float, default=120.0, help="Segundos máximos por llamada al LLM, con reintentos.")
+    rank.add_argument("--no-fallback", action="store_true", help="No usar el otro proveedor como respaldo.")
+    rank.add_argument(
+        "--prefilter", choices=list(PREFILTER_POLICIES), default=None,
+        help="Pre-filtro local de CVs sin evidencia de requisitos obligatorios (desactivado por defecto).",
+    )
+    rank.add_argument("--output", default="ranking.csv", help="Fichero de salida (.csv o .jsonl).")
+    rank.add_argument("--format", choices=["csv", "jsonl"], default=None, help="Formato de salida (por defecto, según la extensión).")
+    rank.add_argument("--checkpoint", default=None, help="Fichero de checkpoint (por defecto <output>.checkpoint.jsonl).")
+    rank.add_argument("--quiet", action="store_true", help="No mostrar la barra de progreso.")
+    rank.add_argument("--telemetry", default=None, help="Guardar la telemetría por etapa en este fichero JSONL.")
+    rank.set_defaults(func=run_rank)
+
+    report = subparsers.add_parser("report", help="Resume un fichero de telemetría (p50/p95 por etapa).")
+    report.add_argument("--input", required=True, help="Fichero JSONL de telemetría (VELORA_TELEMETRY_PATH).")
+    report.add_argument("--by", choices=["stage", "thread_id", "provider"], default="stage", help="Agrupar por etapa, entrevista o proveedor.")
+    report.add_argument("--stage", action="append", default=None, help="Solo estas etapas (se puede repetir).")
+    report.set_defaults(func=run_report)
+
+    purge = subparsers.add_parser("purge-checkpoints", help="Elimina entrevistas terminadas o abandonadas del checkpointer SQLite.")
+    purge.add_argument("--path", default=None, help="Fichero SQLite (por defecto VELORA_CHECKPOINT_PATH).")
+    purge.add_argument("--ttl", type=float, default=DEFAULT_CHECKPOINT_TTL, help="Segundos desde el fin de la entrevista.")
+    purge.add_argument("--max-idle", type=float, default=DEFAULT_CHECKPOINT_MAX_IDLE, help="Segundos sin actividad (0 = no purgar abandonadas).")
+    purge.set_defaults(func=run_purge_checkpoints)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if getattr(args, "telemetry", None):
+        set_telemetry(Telemetry(enabled=True, sink=JsonlSink(args.telemetry)))
+    try:
+        return args.func(args)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from src.models.schemas import EvaluationResult
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza un texto para que cambios irrelevantes (saltos de línea CRLF,
+    espacios repetidos, formas Unicode) no generen claves de caché distintas.
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    return " ".join(text.split())
+
+
+def prompt_version(prompt: str) -> str:
+    """
+    Versión corta de un prompt: cualquier cambio en su texto invalida la caché.
+    """
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def make_cache_key(
+    offer_text: str,
+    cv_text: str,
+    provider: str,
+    model_name: str,
+    prompt_ver: str,
+    evaluation_date: str,
+) -> str:
+    """
+    Clave direccionada por contenido para una evaluación.
+    """
+    payload = json.dumps(
+        [
+            normalize_text(offer_text),
+            normalize_text(cv_text),
+            provider.lower(),
+            model_name,
+            prompt_ver,
+            evaluation_date,
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """
+    Interfaz mínima de un almacén clave -> texto con TTL y expulsión LRU.
+    Un backend incompleto falla al instanciarse, no en el primer uso.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Backend en memoria del proceso. Útil para tests y ejecuciones puntuales.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: int = 1000, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._data = OrderedDict()  # key -> (created_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            created_at, value = entry
+            if self.ttl is not None and self.clock() - created_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (self.clock(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Backend persistente en un fichero SQLite local.
+    - TTL: las entradas más antiguas que `ttl` segundos se consideran caducadas.
+    - LRU: si se supera `max_entries` se eliminan las menos usadas recientemente.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttl: Optional[float] = None,
+        max_entries: int = 10000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS evaluations (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_evaluations_accessed ON evaluations (accessed_at)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        now = self.clock()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM evaluations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM evaluations WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE evaluations SET accessed_at = ? WHERE key = ?", (now, key))
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = self.clock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO evaluations (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET value = excluded.value,
+                       created_at = excluded.created_at, accessed_at = excluded.accessed_at""",
+                (key, value, now, now),
+            )
+            # Expulsión LRU si superamos el tamaño máximo
+            self._conn.execute(
+                """DELETE FROM evaluations WHERE key IN (
+                       SELECT key FROM evaluations ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM evaluations")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+
+class EvaluationCache:
+    """
+    Caché de objetos EvaluationResult delante de CVAnalyzer.analyze.
+    Lleva la cuenta de aciertos y fallos para medir el ahorro.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend = backend if backend is not None else InMemoryCacheBackend()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[EvaluationResult]:
+        raw = self.backend.get(key)
+        result = EvaluationResult.model_validate_json(raw) if raw is not None else None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def set(self, key: str, result: EvaluationResult) -> None:
+        self.backend.set(key, result.model_dump_json())
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self.backend),
+        }
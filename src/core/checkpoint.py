@@ -0,0 +1,242 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional, Sequence, Union
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# Índice de threads de Velora, junto a las tablas de langgraph-checkpoint-sqlite
+_THREADS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_threads_finished ON threads (finished_at);
+CREATE INDEX IF NOT EXISTS idx_threads_updated ON threads (updated_at);
+"""
+
+# Purga por defecto: entrevistas terminadas hace un día y abandonadas hace una semana
+DEFAULT_CHECKPOINT_TTL = 24 * 3600
+DEFAULT_CHECKPOINT_MAX_IDLE = 7 * 24 * 3600
+
+# Segundos mínimos entre dos purgas automáticas
+PURGE_INTERVAL = 300
+
+
+class SQLiteCheckpointer(SqliteSaver):
+    """
+    Checkpointer de LangGraph persistido en SQLite (SqliteSaver, modo WAL).
+
+    - El estado de cada entrevista sobrevive a reinicios y puede leerse desde
+      varios procesos que compartan el fichero.
+    - La tabla `threads` indexa cada thread_id con su última actividad y la
+      fecha de fin, para poder purgar entrevistas terminadas (purge_finished).
+    - Con `ttl` o `max_idle` la purga se hace sola al escribir, como mucho una
+      vez cada `purge_interval` segundos.
+    - SqliteSaver solo es síncrono: la API asíncrona se ejecuta en un hilo.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        clock: Callable[[], float] = time.time,
+        ttl: Optional[float] = None,
+        max_idle: Optional[float] = None,
+        purge_interval: float = PURGE_INTERVAL,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(sqlite3.connect(str(self.path), check_same_thread=False))
+        self.clock = clock
+        self.ttl = ttl
+        self.max_idle = max_idle
+        self.purge_interval = purge_interval
+        self._last_purge = clock()
+        self.setup()
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        # Los ficheros del checkpointer anterior (tabla blobs) no son compatibles con SqliteSaver
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'blobs'").fetchone():
+            raise ValueError(f"{self.path} usa un formato de checkpoints anterior; indica otro VELORA_CHECKPOINT_PATH.")
+        super().setup()
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_THREADS_SCHEMA)
+
+    # --- Escritura: cada escritura actualiza la actividad del thread ---
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        self._touch(config["configurable"]["thread_id"])
+        self._maybe_purge()
+        return saved
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        super().put_writes(config, writes, task_id, task_path)
+        self._touch(config["configurable"]["thread_id"])
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM threads WHERE thread_id = ?", (str(thread_id),))
+
+    def _touch(self, thread_id: str) -> None:
+        with self.cursor() as cur:
+            cur.execute(
+                """INSERT INTO threads (thread_id, updated_at) VALUES (?, ?)
+                   ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at""",
+                (str(thread_id), self.clock()),
+            )
+
+    # --- Ciclo de vida de los threads ---
+
+    def mark_finished(self, thread_id: str) -> None:
+        """
+        Marca la entrevista como terminada para que pueda purgarse más tarde.
+        """
+        now = self.clock()
+        with self.cursor() as cur:
+            cur.execute(
+                """INSERT INTO threads (thread_id, updated_at, finished_at) VALUES (?, ?, ?)
+                   ON CONFLICT(thread_id) DO UPDATE SET finished_at = excluded.finished_at""",
+                (str(thread_id), now, now),
+            )
+
+    def purge_finished(self, ttl: Optional[float] = None, max_idle: Optional[float] = None) -> int:
+        """
+        Elimina los threads terminados hace más de `ttl` segundos y, si se
+        indica `max_idle`, también los abandonados sin actividad desde entonces.
+        Sin argumentos usa los límites configurados en el checkpointer.
+        Devuelve el número de threads eliminados.
+        """
+        if ttl is None and max_idle is None:
+            ttl, max_idle = self.ttl, self.max_idle
+        clauses, params = [], []
+        now = self.clock()
+        if ttl is not None:
+            clauses.append("(finished_at IS NOT NULL AND finished_at < ?)")
+            params.append(now - ttl)
+        if max_idle is not None:
+            clauses.append("updated_at < ?")
+            params.append(now - max_idle)
+        if not clauses:
+            return 0
+
+        with self.cursor() as cur:
+            thread_ids = [
+                row[0] for row in cur.execute(f"SELECT thread_id FROM threads WHERE {' OR '.join(clauses)}", params)
+            ]
+            for table in ("checkpoints", "writes", "threads"):
+                cur.executemany(f"DELETE FROM {table} WHERE thread_id = ?", [(t,) for t in thread_ids])
+        return len(thread_ids)
+
+    def _maybe_purge(self) -> None:
+        # Purga oportunista: sin tareas programadas, aprovechando las escrituras
+        if self.ttl is None and self.max_idle is None:
+            return
+        now = self.clock()
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        self.purge_finished()
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    # --- API asíncrona: se ejecuta en un hilo para no bloquear el event loop ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _env_seconds(name: str, default: float) -> Optional[float]:
+    # "0" desactiva el límite
+    value = float(os.getenv(name, default))
+    return value if value > 0 else None
+
+
+# Un checkpointer SQLite por fichero y proceso
+_SQLITE_CHECKPOINTERS = {}
+_SQLITE_LOCK = threading.Lock()
+
+
+def get_checkpointer(backend: Optional[str] = None, path: Optional[Union[str, Path]] = None):
+    """
+    Devuelve el checkpointer configurado para las entrevistas.
+    - backend: 'memory' (por defecto) o 'sqlite'. Si no se indica se lee
+      de VELORA_CHECKPOINTER.
+    - path: fichero SQLite (VELORA_CHECKPOINT_PATH). Los checkpointers SQLite
+      se comparten por fichero dentro del proceso.
+    - VELORA_CHECKPOINT_TTL / VELORA_CHECKPOINT_MAX_IDLE: segundos tras los
+      que se purgan las entrevistas terminadas / abandonadas (0 = nunca).
+    """
+    backend = (backend or os.getenv("VELORA_CHECKPOINTER", "memory")).lower()
+    if backend == "memory":
+        return MemorySaver()
+    if backend == "sqlite":
+        path = Path(path or os.getenv("VELORA_CHECKPOINT_PATH", ".velora_cache/checkpoints.sqlite")).resolve()
+        with _SQLITE_LOCK:
+            if path not in _SQLITE_CHECKPOINTERS:
+                _SQLITE_CHECKPOINTERS[path] = SQLiteCheckpointer(
+                    path,
+                    ttl=_env_seconds("VELORA_CHECKPOINT_TTL", DEFAULT_CHECKPOINT_TTL),
+                    max_idle=_env_seconds("VELORA_CHECKPOINT_MAX_IDLE", DEFAULT_CHECKPOINT_MAX_IDLE),
+                )
+            return _SQLITE_CHECKPOINTERS[path]
+    raise ValueError(f"Checkpointer no soportado: {backend}")
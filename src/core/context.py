@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from src.llm.factory import get_safe_content
+
+# Tokens extra por mensaje (rol y separadores) en el formato de chat
+_TOKENS_PER_MESSAGE = 4
+
+
+@dataclass
+class ContextWindowConfig:
+    """
+    Configuración de la ventana de contexto del entrevistador.
+    - max_tokens: presupuesto máximo de tokens enviados al LLM por turno.
+    - keep_last_turns: turnos recientes (pregunta del candidato + respuesta)
+      que se conservan siempre literalmente.
+    - encoding: codificación de tiktoken usada para contar tokens.
+    """
+    max_tokens: int = 8000
+    keep_last_turns: int = 6
+    encoding: str = "o200k_base"
+
+
+@lru_cache(maxsize=None)
+def _get_encoder(encoding: str):
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding)
+    except Exception:
+        # Sin la codificación disponible (p. ej. sin red) usamos una estimación
+        return None
+
+
+def count_tokens(messages: Sequence[BaseMessage], encoding: str = "o200k_base") -> int:
+    """
+    Cuenta los tokens de una lista de mensajes con tiktoken
+    (o ~4 caracteres por token si tiktoken no puede cargar la codificación).
+    """
+    encoder = _get_encoder(encoding)
+    total = 0
+    for msg in messages:
+        text = get_safe_content(msg.content)
+        for call in getattr(msg, "tool_calls", None) or []:
+            text += f"{call['name']}{call['args']}"
+        total += _TOKENS_PER_MESSAGE + (len(encoder.encode(text)) if encoder else len(text) // 4 + 1)
+    return total
+
+
+def _split_turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+    """
+    Agrupa los mensajes en turnos: cada turno empieza con un HumanMessage e
+    incluye las respuestas y llamadas a herramientas que le siguen, de forma
+    que un AIMessage con tool_calls nunca se separa de sus ToolMessage.
+    """
+    turns: List[List[BaseMessage]] = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage) or not turns:
+            turns.append([msg])
+        else:
+            turns[-1].append(msg)
+    return turns
+
+
+def _validations(turn: Sequence[BaseMessage]) -> List[dict]:
+    records = []
+    for msg in turn:
+        if isinstance(msg, AIMessage):
+            for call in msg.tool_calls or []:
+                if call["name"] == "registrar_validacion":
+                    records.append(call["args"])
+    return records
+
+
+def format_validation_summary(records: Sequence[dict]) -> str:
+    lines = [f"- {r.get('skill', '')}: {r.get('conclusion', '')}" for r in records]
+    return "VALIDACIONES YA REGISTRADAS (resumen de la conversación anterior):\n" + "\n".join(lines)
+
+
+def build_context(
+    messages: Sequence[BaseMessage],
+    config: Optional[ContextWindowConfig] = None,
+    ledger: Optional[Dict[str, str]] = None,
+) -> List[BaseMessage]:
+    """
+    Construye los mensajes que se envían al LLM en cada turno:
+    1. El prompt de sistema se conserva siempre, sin modificar (prefijo
+       idéntico en todas las llamadas para la caché de prompts del proveedor).
+    2. Los turnos antiguos cuyas validaciones ya están registradas
+       (registrar_validacion) se sustituyen por un resumen estructurado,
+       en un mensaje de sistema aparte justo después del prompt.
+    3. Se conservan literalmente los últimos turnos y la conversación
+       posterior a la última validación.
+    4. Si aun así se supera el presupuesto de tokens, se resumen los turnos
+       más antiguos hasta cumplirlo (conservando siempre el último).
+    Con `ledger` (validaciones registradas fuera de los mensajes, como en el
+    modo fused) el resumen de los turnos recortados se construye a partir de él.
+    """
+    config = config or ContextWindowConfig()
+    messages = list(messages)
+    if not messages:
+        return messages
+
+    system = messages[0] if isinstance(messages[0], SystemMessage) else None
+    turns = _split_turns(messages[1:] if system is not None else messages)
+
+    # 1. Turnos antiguos hasta la última validación registrada fuera de la ventana reciente
+    older = max(len(turns) - config.keep_last_turns, 0)
+    collapse_until = 0
+    for i in range(older):
+        if _validations(turns[i]):
+            collapse_until = i + 1
+
+    collapsed = turns[:collapse_until]
+    kept = turns[collapse_until:]
+
+    # 2. Presupuesto de tokens (cada turno se cuenta una sola vez)
+    def head():
+        prompt = [system] if system is not None else []
+        if ledger is not None:
+            records = [{"skill": skill, "conclusion": conclusion} for skill, conclusion in ledger.items()] if collapsed else []
+        else:
+            records = [r for turn in collapsed for r in _validations(turn)]
+        if not records:
+            return prompt
+        return prompt + [SystemMessage(content=format_validation_summary(records))]
+
+    turn_tokens = [count_tokens(turn, config.encoding) for turn in kept]
+    total = count_tokens(head(), config.encoding) + sum(turn_tokens)
+    while len(kept) > 1 and total > config.max_tokens:
+        collapsed.append(kept.pop(0))
+        turn_tokens.pop(0)
+        total = count_tokens(head(), config.encoding) + sum(turn_tokens)
+
+    return head() + [msg for turn in kept for msg in turn]
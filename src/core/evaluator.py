@@ -1,49 +1,441 @@
-from langchain_core.prompts import ChatPromptTemplate
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+from typing import Callable, Iterable, List, Optional
+
+from langchain_core.prompts import ChatPromptTemplate
 
 # Asumo que estos imports existen en tu proyecto
-from src.llm.factory import get_llm
-from src.llm.prompts import sys_prompt_evaluator
-from src.models.schemas import EvaluationResult
+from src.core.cache import EvaluationCache, make_cache_key, prompt_version
+from src.llm.factory import (
+    LLMDeadlineExceeded,
+    ResiliencePolicy,
+    ResilientLLM,
+    get_llm,
+    get_model_name,
+    get_resilient_llm,
+    llm_deadline,
+)
+from src.llm.rate_limit import AdaptiveConcurrencyController
+from src.llm.prompts import (
+    sys_prompt_evaluator,
+    sys_prompt_offer_parser,
+    sys_prompt_cv_evaluator,
+    format_requirements,
+)
+from src.core.prefilter import PREFILTER_POLICIES, RequirementPrefilter, skipped_result, submission_order
+from src.core.scoring import reconcile_verdicts, score_verdicts
+from src.models.schemas import EvaluationResult, EvaluationVerdicts, BatchItemResult, OfferRequirements
+from src.utils.telemetry import telemetry_span
+
+# Intervalo máximo entre comprobaciones de timeout en analyze_many (segundos)
+_POLL_INTERVAL = 0.05
+
+# Plantillas de los mensajes humanos de cada tipo de cadena. Las partes
+# estables (oferta o requisitos) van en un primer mensaje y lo que cambia en
+# cada llamada (CV y fecha) en el último, de modo que system + oferta forman
+# un prefijo idéntico byte a byte para todos los CVs de una misma oferta y el
+# proveedor puede reutilizar su caché de prefijos.
+_OFFER_TEMPLATE = """OFERTA DE TRABAJO:
+            {offer_text}
+            """
+
+_REQUIREMENTS_TEMPLATE = """REQUISITOS DE LA OFERTA:
+            {requirements}
+            """
+
+_CANDIDATE_TEMPLATE = """CV DEL CANDIDATO:
+            {cv_text}
+
+            ---
+            Hoy es: {current_date}
+            """
+
+# Tipos de cadena: evaluación completa, extracción de requisitos de la oferta
+# y evaluación de un CV contra requisitos ya extraídos
+_CHAIN_PROMPTS = {
+    "full": (sys_prompt_evaluator, [_OFFER_TEMPLATE, _CANDIDATE_TEMPLATE]),
+    "offer": (sys_prompt_offer_parser, [_OFFER_TEMPLATE]),
+    "requirements": (sys_prompt_cv_evaluator, [_REQUIREMENTS_TEMPLATE, _CANDIDATE_TEMPLATE]),
+}
+
+# Cadenas compiladas compartidas entre instancias:
+# (proveedor, schema, tipo, política) -> (clientes LLM, chain)
+_CHAIN_CACHE = {}
+_CHAIN_LOCK = threading.Lock()
+
+# Requisitos ya extraídos por oferta (LRU acotada): clave de oferta -> OfferRequirements
+_OFFER_CACHE = OrderedDict()
+_OFFER_CACHE_SIZE = 128
+_OFFER_LOCK = threading.Lock()
+
+
+def build_prompt(variant: str = "full") -> ChatPromptTemplate:
+    """
+    Prompt de cada tipo de cadena: system, partes estables y, al final, el CV.
+    """
+    system_prompt, human_templates = _CHAIN_PROMPTS[variant]
+    return ChatPromptTemplate.from_messages(
+        [("system", system_prompt)] + [("human", template) for template in human_templates]
+    )
+
+
+def build_evaluation_chain(llm, schema=EvaluationVerdicts, variant: str = "full"):
+    """
+    Construye la cadena prompt | LLM con salida estructurada.
+    """
+    prompt_template = build_prompt(variant)
+    structured_llm = llm.with_structured_output(schema)
+    return prompt_template | structured_llm
+
+
+def _client_identity(llm) -> tuple:
+    # Clientes concretos detrás del LLM: cambian al cerrar el registro o rotar la API key
+    targets = llm.targets if isinstance(llm, ResilientLLM) else [llm]
+    return tuple(id(target) for target in targets)
+
+
+def get_evaluation_chain(llm, provider: str, schema=EvaluationVerdicts, variant: str = "full"):
+    """
+    Devuelve la cadena cacheada para (proveedor, schema, tipo, política de resiliencia).
+    Se construye de forma perezosa la primera vez y se reutiliza mientras el
+    cliente LLM sea el mismo; si el registro de clientes lo ha sustituido
+    (close_llm_clients, nueva API key) se reconstruye sobre el nuevo.
+    """
+    policy = llm.policy if isinstance(llm, ResilientLLM) else None
+    key = (provider.lower(), schema, variant, policy)
+    identity = _client_identity(llm)
+    entry = _CHAIN_CACHE.get(key)
+    if entry is None or entry[0] != identity:
+        with _CHAIN_LOCK:
+            entry = _CHAIN_CACHE.get(key)
+            if entry is None or entry[0] != identity:
+                entry = (identity, build_evaluation_chain(llm, schema, variant))
+                _CHAIN_CACHE[key] = entry
+    return entry[1]
+
+
+def clear_chain_cache():
+    """
+    Vacía la caché de cadenas y la de ofertas ya extraídas
+    (útil en tests).
+    """
+    with _CHAIN_LOCK:
+        _CHAIN_CACHE.clear()
+    with _OFFER_LOCK:
+        _OFFER_CACHE.clear()
+
 
 class CVAnalyzer:
-    def __init__(self, provider):
-        # Instanciamos el modelo base
-        self.llm = get_llm(model_name=provider)
+    def __init__(
+        self,
+        provider,
+        cache: Optional[EvaluationCache] = None,
+        resilience: Optional[ResiliencePolicy] = None,
+    ):
+        self.provider = provider
+        self.cache = cache
+        # Instanciamos el modelo base (con deadline, reintentos, hedging y
+        # proveedor de respaldo si se indica una política de resiliencia)
+        if resilience is not None:
+            self.llm = get_resilient_llm(provider, policy=resilience)
+        else:
+            self.llm = get_llm(model_name=provider)
+
+    @property
+    def chain(self):
+        return get_evaluation_chain(self.llm, self.provider)
+
+    def parse_offer(self, offer_text: str) -> OfferRequirements:
+        """
+        Extrae (una sola vez por oferta) los requisitos y si son obligatorios.
+        """
+        with self._span("parse_offer") as span:
+            key, cached = self._get_cached_offer(offer_text)
+            if cached is not None:
+                span.set(cache_hit=True)
+                return cached
+
+            chain = get_evaluation_chain(self.llm, self.provider, OfferRequirements, "offer")
+            return self._store_offer(key, span.invoke(chain, {"offer_text": offer_text}))
 
-    def analyze(self, offer_text: str, cv_text: str) -> EvaluationResult:
+    async def aparse_offer(self, offer_text: str) -> OfferRequirements:
+        """
+        Versión asíncrona de parse_offer.
+        """
+        with self._span("parse_offer") as span:
+            key, cached = self._get_cached_offer(offer_text)
+            if cached is not None:
+                span.set(cache_hit=True)
+                return cached
+
+            chain = get_evaluation_chain(self.llm, self.provider, OfferRequirements, "offer")
+            return self._store_offer(key, await span.ainvoke(chain, {"offer_text": offer_text}))
+
+    def analyze(
+        self,
+        offer_text: str,
+        cv_text: str,
+        requirements: Optional[OfferRequirements] = None,
+    ) -> EvaluationResult:
         """
         Analiza el CV contra la oferta y devuelve un objeto EvaluationResult.
+        Si se pasan los requisitos ya extraídos (parse_offer), se usa una
+        evaluación más ligera que no vuelve a procesar la oferta.
+        El LLM solo devuelve veredictos por requisito; la puntuación y el
+        descarte se calculan localmente (src.core.scoring).
+        """
+        with self._span("analyze") as span:
+            chain, inputs, cache_key, cached = self._prepare_analysis(offer_text, cv_text, requirements)
+            if cached is not None:
+                span.set(cache_hit=True)
+                return cached
+
+            # Invocar la cadena (compilada una sola vez por proveedor)
+            verdicts = span.invoke(chain, inputs)
+            return self._finish_analysis(verdicts, requirements, cache_key)
+
+    async def aanalyze(
+        self,
+        offer_text: str,
+        cv_text: str,
+        requirements: Optional[OfferRequirements] = None,
+    ) -> EvaluationResult:
+        """
+        Versión asíncrona de analyze, basada en ainvoke.
+        """
+        with self._span("analyze") as span:
+            chain, inputs, cache_key, cached = self._prepare_analysis(offer_text, cv_text, requirements)
+            if cached is not None:
+                span.set(cache_hit=True)
+                return cached
+
+            verdicts = await span.ainvoke(chain, inputs)
+            return self._finish_analysis(verdicts, requirements, cache_key)
+
+    def _span(self, stage: str):
+        # Latencia, tokens y caché de la etapa (sin coste si la telemetría está desactivada)
+        return telemetry_span(stage, provider=self.provider, model=get_model_name(self.provider))
+
+    def _get_cached_offer(self, offer_text: str):
+        key = make_cache_key(
+            offer_text, "", self.provider, get_model_name(self.provider),
+            prompt_version(sys_prompt_offer_parser), ""
+        )
+        with _OFFER_LOCK:
+            if key in _OFFER_CACHE:
+                _OFFER_CACHE.move_to_end(key)
+                return key, _OFFER_CACHE[key]
+        return key, None
+
+    def _store_offer(self, key: str, parsed: OfferRequirements) -> OfferRequirements:
+        with _OFFER_LOCK:
+            _OFFER_CACHE[key] = parsed
+            while len(_OFFER_CACHE) > _OFFER_CACHE_SIZE:
+                _OFFER_CACHE.popitem(last=False)
+        return parsed
+
+    def _prepare_analysis(self, offer_text: str, cv_text: str, requirements: Optional[OfferRequirements]):
+        """
+        Elige la cadena, construye sus entradas y consulta la caché de resultados.
+        Devuelve (chain, inputs, cache_key, resultado_cacheado).
         """
-        
         # 1. Preparar variables auxiliares
         current_date = datetime.now().strftime("%d/%m/%Y")
+        if requirements is not None:
+            requirements_text = format_requirements(requirements.requirements)
+            chain = get_evaluation_chain(self.llm, self.provider, EvaluationVerdicts, "requirements")
+            inputs = {"requirements": requirements_text, "cv_text": cv_text, "current_date": current_date}
+            cache_offer, cache_prompt = requirements_text, sys_prompt_cv_evaluator
+        else:
+            chain = self.chain
+            inputs = {"offer_text": offer_text, "cv_text": cv_text, "current_date": current_date}
+            cache_offer, cache_prompt = offer_text, sys_prompt_evaluator
 
-        # 2. Crear plantilla de prompt 
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", sys_prompt_evaluator),
-            ("human", """OFERTA DE TRABAJO:
-            {offer_text}
-
-            CV DEL CANDIDATO:
-            {cv_text}
+        # 2. Consultar la caché de resultados
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(
+                cache_offer, cv_text, self.provider, get_model_name(self.provider),
+                prompt_version(cache_prompt), current_date
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return chain, inputs, cache_key, cached
 
-            ---
-            Hoy es: {current_date}
-            """)
-        ])
+        return chain, inputs, cache_key, None
 
-        # 3. Configurar LLM con salida estructurada
-        structured_llm = self.llm.with_structured_output(EvaluationResult)
+    def _finish_analysis(
+        self,
+        verdicts: EvaluationVerdicts,
+        requirements: Optional[OfferRequirements],
+        cache_key: Optional[str],
+    ) -> EvaluationResult:
+        """
+        Calcula la puntuación a partir de los veredictos y guarda en caché.
+        """
+        if requirements is not None:
+            # Los requisitos y su obligatoriedad vienen de la extracción de la oferta, no del LLM
+            verdicts = reconcile_verdicts(verdicts, requirements)
 
-        # 4. Crear la cadena 
-        chain = prompt_template | structured_llm
+        # Puntuación y descarte deterministas
+        result = score_verdicts(verdicts)
 
-        # 5. Invocar la cadena
-        result = chain.invoke({
-            "offer_text": offer_text,
-            "cv_text": cv_text,
-            "current_date": current_date
-        })
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
         
-        return result
\ No newline at end of file
+        return result
+
+    def _parse_offer_within(self, offer_text: str, timeout: Optional[float]) -> OfferRequirements:
+        """
+        parse_offer con el mismo timeout que cada CV del lote (TimeoutError al vencer).
+        """
+        if timeout is None:
+            return self.parse_offer(offer_text)
+
+        def _parse():
+            with llm_deadline(timeout):
+                return self.parse_offer(offer_text)
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="offer-parser")
+        try:
+            return executor.submit(_parse).result(timeout=timeout)
+        finally:
+            # Como con los CVs, no esperamos a una extracción que ha superado el timeout
+            executor.shutdown(wait=False)
+
+    def analyze_many(
+        self,
+        offer_text: str,
+        cvs: Iterable[str],
+        max_concurrency: int = 4,
+        timeout: Optional[float] = None,
+        preparse_offer: bool = True,
+        controller: Optional[AdaptiveConcurrencyController] = None,
+        on_item: Optional[Callable[[BatchItemResult], None]] = None,
+        prefilter: Optional[str] = None,
+    ) -> List[BatchItemResult]:
+        """
+        Evalúa varios CVs contra la misma oferta de forma concurrente.
+
+        - max_concurrency: número máximo de llamadas al LLM en vuelo.
+        - timeout: segundos máximos por CV desde que empieza su evaluación.
+          Se propaga a la llamada al LLM (llm_deadline), así que con una
+          política de resiliencia el hilo queda libre al vencer. Limitación:
+          la petición HTTP en curso no se puede interrumpir y termina en
+          segundo plano; sin política de resiliencia solo se abandona el
+          resultado y el hilo sigue ocupado hasta que el LLM responde.
+          La extracción previa de la oferta tiene el mismo límite.
+        - preparse_offer: extrae los requisitos de la oferta una sola vez y
+          los reutiliza en todos los CVs (misma lista para todo el lote).
+          Si la extracción falla, el lote se evalúa con la oferta completa
+          (cadena sin requisitos extraídos) y sin pre-filtro.
+        - controller: controlador AIMD opcional que adapta las llamadas en
+          vuelo (sin superar max_concurrency) según los 429 y la latencia.
+        - on_item: callback opcional que recibe cada BatchItemResult en
+          cuanto está disponible (en el hilo que llama), p. ej. para
+          mostrar progreso o guardar un checkpoint.
+        - prefilter: política del pre-filtro léxico local para los CVs sin
+          evidencia de algún requisito obligatorio ("skip", "deprioritize"
+          o "send"; ver src.core.prefilter). None lo desactiva. Con
+          cualquier política los CVs marcados llevan prefiltered=True y
+          missing_mandatory; con "skip" además quedan sin evaluar (skipped).
+        Los errores y timeouts se capturan por elemento y los resultados
+        se devuelven en el mismo orden que la entrada.
+        """
+        cvs = list(cvs)
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency debe ser mayor o igual que 1.")
+        if prefilter is not None and prefilter not in PREFILTER_POLICIES:
+            raise ValueError(f"Política de pre-filtro no soportada: {prefilter}. Usa una de {PREFILTER_POLICIES}.")
+
+        results: List[Optional[BatchItemResult]] = [None] * len(cvs)
+        started = {}
+        requirements = None
+        if (preparse_offer or prefilter) and cvs:
+            try:
+                requirements = self._parse_offer_within(offer_text, timeout)
+            except Exception:
+                # Un fallo puntual (429, conexión...) no debe tumbar el lote entero
+                prefilter = None
+
+        # Pre-filtro local: qué CVs se envían al LLM y en qué orden
+        order = list(range(len(cvs)))
+        missing = {}
+        if prefilter is not None and cvs:
+            decisions = RequirementPrefilter(requirements).screen(cvs)
+            order = submission_order(decisions, prefilter)
+            missing = {d.index: d.missing_mandatory for d in decisions if d.flagged}
+            if prefilter == "skip":
+                for decision in decisions:
+                    if decision.flagged:
+                        results[decision.index] = skipped_result(decision.index, decision)
+                        if on_item is not None:
+                            on_item(results[decision.index])
+
+        # Los CVs marcados que sí se envían (deprioritize, send) conservan la marca
+        def _item(index: int, **fields) -> BatchItemResult:
+            flagged = missing.get(index, [])
+            return BatchItemResult(index=index, prefiltered=bool(flagged), missing_mandatory=list(flagged), **fields)
+
+        def _analyze(index: int, cv_text: str) -> EvaluationResult:
+            started[index] = time.monotonic()
+            with llm_deadline(timeout):
+                return self.analyze(offer_text, cv_text, requirements=requirements)
+
+        def _run(index: int, cv_text: str) -> EvaluationResult:
+            if controller is None:
+                return _analyze(index, cv_text)
+            with controller.track():
+                return _analyze(index, cv_text)
+
+        def _timed_out(index: int, now: float) -> bool:
+            start = started.get(index)
+            return timeout is not None and start is not None and now - start >= timeout
+
+        executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="cv-analyzer")
+        futures = {executor.submit(_run, i, cvs[i]): i for i in order}
+        pending = set(futures)
+
+        try:
+            while pending:
+                done, pending = wait(
+                    pending,
+                    timeout=_POLL_INTERVAL if timeout is not None else None,
+                    return_when=FIRST_COMPLETED,
+                )
+
+                # 1. Recoger los que han terminado (bien o con error)
+                for future in done:
+                    index = futures[future]
+                    try:
+                        results[index] = _item(index, result=future.result())
+                    except LLMDeadlineExceeded as e:
+                        # El deadline del CV cortó la llamada: se informa como el resto de timeouts
+                        if _timed_out(index, time.monotonic()):
+                            results[index] = _item(index, error=f"TimeoutError: superados {timeout}s")
+                        else:
+                            results[index] = _item(index, error=f"{type(e).__name__}: {e}")
+                    except Exception as e:
+                        results[index] = _item(index, error=f"{type(e).__name__}: {e}")
+                    if on_item is not None:
+                        on_item(results[index])
+
+                # 2. Marcar como timeout los que llevan demasiado tiempo en ejecución
+                if timeout is not None:
+                    now = time.monotonic()
+                    for future in list(pending):
+                        index = futures[future]
+                        if _timed_out(index, now):
+                            pending.discard(future)
+                            future.cancel()
+                            results[index] = _item(index, error=f"TimeoutError: superados {timeout}s")
+                            if on_item is not None:
+                                on_item(results[index])
+        finally:
+            # No esperamos a los hilos que han superado el timeout (con llm_deadline terminan enseguida)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
@@ -1,22 +1,113 @@
 import operator
 import json
-from typing import Annotated, List, TypedDict, Union
+import os
+import time
+from dataclasses import dataclass
+from typing import Annotated, AsyncIterator, Dict, Iterator, List, Optional, TypedDict, Union
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.tools import tool
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.checkpoint.memory import MemorySaver
 
-from src.llm.factory import get_llm
+from src.core.checkpoint import get_checkpointer
+from src.core.context import ContextWindowConfig, build_context
+from src.core.ledger import RequirementIndex, format_ledger
+from src.core.transcript import TranscriptCache
+from src.llm.factory import ResiliencePolicy, get_llm, get_model_name, get_safe_content
 from src.core.evaluator import CVAnalyzer
-from src.llm.prompts import sys_prompt_interviewer
+from src.core.scoring import merge_verdicts
+from src.models.schemas import EvaluationResult, InterviewTurn, OfferRequirement, OfferRequirements
+from src.llm.prompts import INTERVIEW_FAREWELLS, INTERVIEW_GREETINGS, sys_prompt_interviewer
+from src.utils.telemetry import telemetry_span
 
 # Estado del agente
 class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], operator.add]
     skills_pending: List[str] # Esta lista se irá vaciando automáticamente
+    requirement_index: dict # RequirementIndex serializado de los requisitos iniciales
+    ledger: Dict[str, str] # Conclusión registrada por requisito
+
+# Token con el que el entrevistador indica el final de la entrevista
+END_TOKEN = "[FIN_ENTREVISTA]"
+
+# Modos del grafo:
+# - tools: agente -> registrar_validacion -> agente (dos llamadas al LLM por validación).
+# - fused: una sola llamada estructurada (InterviewTurn) con las validaciones y el
+#   siguiente mensaje; el ledger y los pendientes se actualizan en local.
+INTERVIEW_MODES = ("tools", "fused")
+
+
+@dataclass(frozen=True)
+class InterviewTemplates:
+    """
+    Saludo y despedida de la entrevista como plantillas, sin llamar al LLM.
+    - greeting: primer mensaje del entrevistador ({name} = nombre del entrevistador).
+    - farewell: despedida cuando no quedan requisitos pendientes (se le añade END_TOKEN).
+    - name / language: nombre e idioma del entrevistador, también en su prompt de sistema.
+    Con greeting o farewell a None ese turno lo genera el LLM.
+    """
+    greeting: Optional[str] = INTERVIEW_GREETINGS["es"]
+    farewell: Optional[str] = INTERVIEW_FAREWELLS["es"]
+    name: str = "Alex"
+    language: str = "es"
+
+    @classmethod
+    def for_language(cls, language: str, name: str = "Alex") -> "InterviewTemplates":
+        language = language.lower()
+        if language not in INTERVIEW_GREETINGS:
+            raise ValueError(f"Idioma no soportado: {language}. Usa uno de {sorted(INTERVIEW_GREETINGS)}.")
+        return cls(INTERVIEW_GREETINGS[language], INTERVIEW_FAREWELLS[language], name, language)
+
+    @classmethod
+    def from_env(cls) -> "InterviewTemplates":
+        """
+        VELORA_INTERVIEW_LANGUAGE (es por defecto) y VELORA_INTERVIEW_TEMPLATES=0
+        para que el LLM genere también el saludo y la despedida.
+        """
+        templates = cls.for_language(os.getenv("VELORA_INTERVIEW_LANGUAGE", "es"))
+        if os.getenv("VELORA_INTERVIEW_TEMPLATES", "1") == "0":
+            return cls(greeting=None, farewell=None, name=templates.name, language=templates.language)
+        return templates
+
+    def greeting_message(self) -> AIMessage:
+        return AIMessage(content=self.greeting.format(name=self.name))
+
+    def farewell_message(self) -> AIMessage:
+        return AIMessage(content=f"{self.farewell.format(name=self.name)} {END_TOKEN}")
+
+
+class EndTokenFilter:
+    """
+    Elimina el token de fin de un flujo de fragmentos de texto.
+    Retiene los finales de fragmento que podrían ser el inicio del token
+    (p. ej. "[FIN_" + "ENTREVISTA]") hasta saber si lo completan.
+    """
+
+    def __init__(self, token: str = END_TOKEN):
+        self.token = token
+        self.finished = False
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> str:
+        text = self._buffer + chunk
+        if self.token in text:
+            self.finished = True
+            text = text.replace(self.token, "")
+        # Parte final que aún podría convertirse en el token
+        keep = 0
+        for size in range(min(len(self.token) - 1, len(text)), 0, -1):
+            if self.token.startswith(text[-size:]):
+                keep = size
+                break
+        self._buffer = text[len(text) - keep:] if keep else ""
+        return text[:len(text) - keep] if keep else text
+
+    def flush(self) -> str:
+        text, self._buffer = self._buffer, ""
+        return text
 
 # tool para registrar la validación de una skill
 @tool
@@ -28,19 +119,49 @@ def registrar_validacion(skill: str, conclusion: str):
 
 # Clase principal del entrevistador
 class Interviewer:
-    def __init__(self, provider):
+    def __init__(
+        self,
+        provider,
+        checkpointer=None,
+        context_config: Optional[ContextWindowConfig] = None,
+        resilience: Optional[ResiliencePolicy] = None,
+        templates: Optional[InterviewTemplates] = None,
+        mode: Optional[str] = None,
+    ):
         self.provider = provider
+        # Modo del grafo (VELORA_INTERVIEW_MODE, "tools" por defecto)
+        self.mode = mode or os.getenv("VELORA_INTERVIEW_MODE", "tools")
+        if self.mode not in INTERVIEW_MODES:
+            raise ValueError(f"Modo de entrevista no soportado: {self.mode}. Usa uno de {list(INTERVIEW_MODES)}.")
+        # Saludo y despedida sin LLM (configurables por idioma)
+        self.templates = templates or InterviewTemplates.from_env()
+        # Política de resiliencia del análisis final (reevaluate)
+        self.resilience = resilience
+        self.context_config = context_config or ContextWindowConfig()
         self.llm = get_llm(model_name=provider)
         self.tools = [registrar_validacion]
         self.llm_with_tools = self.llm.bind_tools(self.tools)
-        self.memory = MemorySaver()
+        if self.mode == "fused":
+            # El JSON de la salida estructurada no se emite en streaming: solo el mensaje final
+            self.llm_turn = self.llm.with_structured_output(InterviewTurn).with_config(tags=[TAG_NOSTREAM])
+        # MemorySaver por defecto; SQLite (persistente) según configuración
+        self.memory = checkpointer if checkpointer is not None else get_checkpointer()
         self.graph = self._build_graph()
+        self._analyzer = None
+        # Transcripciones incrementales por hilo
+        self._transcripts = TranscriptCache()
+        # Métricas del último turno emitido en streaming
+        self.last_response = None
+        self.last_ttft = None
+        self.last_stream_finished = False
 
     def _build_graph(self):
         
-        # nodo de chatbot principal
-        def chatbot_node(state: AgentState):
-            messages = state["messages"]
+        # mensajes que se envían al LLM en cada turno (ventana de contexto acotada)
+        def agent_input(state: AgentState):
+            # En modo fused las validaciones solo están en el ledger (no hay tool calls que resumir)
+            ledger = (state.get("ledger") or {}) if self.mode == "fused" else None
+            messages = build_context(state["messages"], self.context_config, ledger)
             pending = state.get("skills_pending", [])
             
             # Logica para forzar la salida si no quedan requisitos
@@ -51,25 +172,49 @@ class Interviewer:
                 Despídete amablemente si aún no lo has hecho y escribe OBLIGATORIAMENTE: [FIN_ENTREVISTA]
                 """)
                 # Invocamos al LLM con esta instrucción extra al final
-                response = self.llm_with_tools.invoke(messages + [force_exit_msg])
-                return {"messages": [response]}
+                return messages + [force_exit_msg]
             
             # Comportamiento normal 
-            return {"messages": [self.llm_with_tools.invoke(messages)]}
+            return messages
 
-        # nodo de herramientas personalizado
-        def custom_tool_node(state: AgentState):
+        # nodo de chatbot principal (versión síncrona y asíncrona)
+        def chatbot_node(state: AgentState, config: RunnableConfig):
+            with self._span("interview.agent", config) as span:
+                return {"messages": [span.invoke(self.llm_with_tools, agent_input(state))]}
+
+        async def achatbot_node(state: AgentState, config: RunnableConfig):
+            with self._span("interview.agent", config) as span:
+                return {"messages": [await span.ainvoke(self.llm_with_tools, agent_input(state))]}
+
+        # asocia cada validación (skill, conclusión) a su requisito y la guarda en el registro
+        def apply_validations(state: AgentState, validations):
+            pending = state["skills_pending"].copy()
+            ledger = dict(state.get("ledger") or {})
+
+            # Índice precalculado en _initial_state (o construido ahora si falta)
+            index_data = state.get("requirement_index")
+            index = RequirementIndex.from_state(index_data) if index_data else RequirementIndex(pending)
+
+            for skill, conclusion in validations:
+                req = index.match(skill)
+                ledger[req or skill] = conclusion
+                if req in pending:
+                    pending.remove(req)
+            return pending, ledger
+
+        # lógica local de las herramientas: validaciones registradas por el LLM
+        def validate_tools(state: AgentState):
             messages = state["messages"]
             last_message = messages[-1]
-            pending = state["skills_pending"].copy()
             
             tool_outputs = []
+            validations = []
             
             # Iteramos sobre las llamadas a herramientas que pidió el LLM
             for tool_call in last_message.tool_calls:
                 if tool_call["name"] == "registrar_validacion":
                     # 1. Ejecutar la lógica 
-                    skill_evaluated = tool_call["args"]["skill"]
+                    args = tool_call["args"]
                     output_text = registrar_validacion.invoke(tool_call) 
                     
                     # 2. Crear el mensaje de respuesta de la herramienta
@@ -79,72 +224,364 @@ class Interviewer:
                         name=tool_call["name"]
                     ))
                     
-                    # 3. actualizar la lista de pendientes y estado
-                    for req in pending[:]:
-                        if req.lower() in skill_evaluated.lower() or skill_evaluated.lower() in req.lower():
-                            if req in pending:
-                                pending.remove(req)
+                    # 3. asociar la validación a su requisito y guardar la conclusión
+                    validations.append((args.get("skill", ""), args.get("conclusion", "")))
+
+            pending, ledger = apply_validations(state, validations)
             
-            # Devolvemos los mensajes de las tools Y la nueva lista actualizada
+            # Devolvemos los mensajes de las tools, los pendientes y el registro actualizados
             return {
                 "messages": tool_outputs,
-                "skills_pending": pending
+                "skills_pending": pending,
+                "ledger": ledger,
             }
 
+        # nodo de herramientas personalizado
+        def custom_tool_node(state: AgentState, config: RunnableConfig):
+            with self._span("interview.tools", config) as span:
+                update = validate_tools(state)
+                span.set(validations=len(update["messages"]))
+                return update
+
+        # la lógica de las tools es local, no necesita hilo aparte en modo async
+        async def acustom_tool_node(state: AgentState, config: RunnableConfig):
+            return custom_tool_node(state, config)
+
+        # despedida de plantilla: no hace falta llamar al LLM para cerrar
+        def farewell_node(state: AgentState):
+            return {"messages": [self.templates.farewell_message()]}
+
+        # sin requisitos pendientes se cierra con la plantilla (si la hay)
+        def needs_farewell(state: AgentState):
+            return self.templates.farewell is not None and not state.get("skills_pending")
+
+        def route_next(state: AgentState):
+            return "farewell" if needs_farewell(state) else "agent"
+
+        # modo fused: los pendientes van al final del contexto para que el modelo sepa qué validar.
+        # No van en rol de sistema: Gemini une todos los mensajes de sistema en system_instruction
+        # y un aviso que cambia en cada turno rompería el prefijo estable del prompt
+        def turn_input(state: AgentState):
+            messages = agent_input(state)
+            pending = state.get("skills_pending", [])
+            if pending:
+                messages = messages + [HumanMessage(content=f"SISTEMA: Requisitos pendientes: [{', '.join(pending)}]")]
+            return messages
+
+        def apply_turn(state: AgentState, turn: InterviewTurn, span):
+            pending, ledger = apply_validations(state, [(v.skill, v.conclusion) for v in turn.validations])
+            span.set(validations=len(turn.validations))
+            update = {"skills_pending": pending, "ledger": ledger, "messages": []}
+            # El final se decide con las validaciones ya aplicadas: si este turno cierra lo
+            # último pendiente, `reply` solo se usa si ya es la despedida del LLM; si no,
+            # cierra el nodo farewell (plantilla o LLM)
+            if pending or (self.templates.farewell is None and END_TOKEN in turn.reply):
+                update["messages"] = [AIMessage(content=turn.reply)]
+            return update
+
+        def turn_node(state: AgentState, config: RunnableConfig):
+            with self._span("interview.turn", config) as span:
+                return apply_turn(state, span.invoke(self.llm_turn, turn_input(state)), span)
+
+        async def aturn_node(state: AgentState, config: RunnableConfig):
+            with self._span("interview.turn", config) as span:
+                return apply_turn(state, await span.ainvoke(self.llm_turn, turn_input(state)), span)
+
+        # modo fused: despedida de plantilla o, sin ella, generada por el LLM
+        def fused_farewell_node(state: AgentState, config: RunnableConfig):
+            if self.templates.farewell is not None:
+                return farewell_node(state)
+            with self._span("interview.farewell", config) as span:
+                return {"messages": [span.invoke(self.llm, agent_input(state))]}
+
+        async def afused_farewell_node(state: AgentState, config: RunnableConfig):
+            if self.templates.farewell is not None:
+                return farewell_node(state)
+            with self._span("interview.farewell", config) as span:
+                return {"messages": [await span.ainvoke(self.llm, agent_input(state))]}
+
+        # tras el turno no hace falta volver al LLM: se decide con skills_pending
+        def route_turn(state: AgentState):
+            if state.get("skills_pending"):
+                return END
+            last = state["messages"][-1]
+            closed = isinstance(last, AIMessage) and END_TOKEN in get_safe_content(last.content)
+            return END if closed else "farewell"
+
         # definicion del workflow
         workflow = StateGraph(AgentState)
+
+        if self.mode == "fused":
+            workflow.add_node("turn", RunnableLambda(turn_node, afunc=aturn_node))
+            workflow.add_node("farewell", RunnableLambda(fused_farewell_node, afunc=afused_farewell_node))
+
+            workflow.set_conditional_entry_point(
+                lambda state: "turn" if state.get("skills_pending") else "farewell", ["turn", "farewell"]
+            )
+            workflow.add_conditional_edges("turn", route_turn, ["farewell", END])
+            workflow.add_edge("farewell", END)
+
+            return workflow.compile(checkpointer=self.memory)
         
-        workflow.add_node("agent", chatbot_node)
-        workflow.add_node("tools", custom_tool_node) 
+        workflow.add_node("agent", RunnableLambda(chatbot_node, afunc=achatbot_node))
+        workflow.add_node("tools", RunnableLambda(custom_tool_node, afunc=acustom_tool_node))
+        workflow.add_node("farewell", farewell_node)
 
-        workflow.set_entry_point("agent")
+        workflow.set_conditional_entry_point(route_next, ["agent", "farewell"])
         
         workflow.add_conditional_edges("agent", tools_condition)
-        workflow.add_edge("tools", "agent")
+        workflow.add_conditional_edges("tools", route_next, ["agent", "farewell"])
+        workflow.add_edge("farewell", END)
 
         return workflow.compile(checkpointer=self.memory)
 
-    def initialize_interview(self, missing_requirements: List[str], thread_id: str):
+    def _initial_state(self, missing_requirements: List[str]):
         reqs_str = ", ".join(missing_requirements)
         
-        sys_msg = sys_prompt_interviewer(reqs_str)
+        sys_msg = sys_prompt_interviewer(reqs_str, self.mode, self.templates.name, self.templates.language)
         
-        initial_state = {
+        return {
             "messages": [SystemMessage(content=sys_msg)],
-            "skills_pending": missing_requirements
+            "skills_pending": missing_requirements,
+            "requirement_index": RequirementIndex(missing_requirements).to_state(),
+            "ledger": {},
         }
-        
+
+    def initialize_interview(self, missing_requirements: List[str], thread_id: str):
         config = {"configurable": {"thread_id": thread_id}}
-        self.graph.update_state(config, initial_state)
-        
+        state = self._initial_state(missing_requirements)
+
+        # Saludo de plantilla: se guarda directamente en el estado, sin LLM
+        if self.templates.greeting is not None:
+            greeting = self.templates.greeting_message()
+            state["messages"].append(greeting)
+            self.graph.update_state(config, state)
+            return greeting
+
+        self.graph.update_state(config, state)
         events = self.graph.invoke(
             {"messages": [HumanMessage(content="Saluda.")]},
             config=config
         )
         return events["messages"][-1]
 
+    async def ainitialize_interview(self, missing_requirements: List[str], thread_id: str):
+        config = {"configurable": {"thread_id": thread_id}}
+        state = self._initial_state(missing_requirements)
+
+        if self.templates.greeting is not None:
+            greeting = self.templates.greeting_message()
+            state["messages"].append(greeting)
+            await self.graph.aupdate_state(config, state)
+            return greeting
+
+        await self.graph.aupdate_state(config, state)
+        events = await self.graph.ainvoke(
+            {"messages": [HumanMessage(content="Saluda.")]},
+            config=config
+        )
+        return events["messages"][-1]
+
     def process_message(self, user_input: str, thread_id: str):
         config = {"configurable": {"thread_id": thread_id}}
         events = self.graph.invoke(
             {"messages": [HumanMessage(content=user_input)]}, 
             config=config
         )
-        return events["messages"][-1]
+        return self._check_finished(events["messages"][-1], thread_id)
+
+    async def aprocess_message(self, user_input: str, thread_id: str):
+        config = {"configurable": {"thread_id": thread_id}}
+        events = await self.graph.ainvoke(
+            {"messages": [HumanMessage(content=user_input)]},
+            config=config
+        )
+        return self._check_finished(events["messages"][-1], thread_id)
+
+    def stream_message(self, user_input: str, thread_id: str) -> Iterator[str]:
+        """
+        Procesa la respuesta del candidato y va devolviendo el texto del
+        entrevistador a medida que el LLM lo genera, sin el token de fin.
+        Al terminar quedan disponibles last_response, last_ttft (segundos
+        hasta el primer fragmento de texto) y last_stream_finished.
+        last_response contiene todo el texto mostrado, también el de los
+        turnos que terminaron en una llamada a registrar_validacion.
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        token_filter = self._start_stream()
+        for chunk, metadata in self.graph.stream(
+            {"messages": [HumanMessage(content=user_input)]},
+            config=config,
+            stream_mode="messages",
+        ):
+            text = self._filter_chunk(chunk, metadata, token_filter)
+            if text:
+                yield text
+        if tail := self._flush_stream(token_filter):
+            yield tail
+        self._end_stream(self.graph.get_state(config).values["messages"][-1], thread_id, token_filter)
+
+    async def astream_message(self, user_input: str, thread_id: str) -> AsyncIterator[str]:
+        """
+        Versión asíncrona de stream_message.
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        token_filter = self._start_stream()
+        async for chunk, metadata in self.graph.astream(
+            {"messages": [HumanMessage(content=user_input)]},
+            config=config,
+            stream_mode="messages",
+        ):
+            text = self._filter_chunk(chunk, metadata, token_filter)
+            if text:
+                yield text
+        if tail := self._flush_stream(token_filter):
+            yield tail
+        state = await self.graph.aget_state(config)
+        self._end_stream(state.values["messages"][-1], thread_id, token_filter)
+
+    def _start_stream(self) -> EndTokenFilter:
+        self._stream_start = time.perf_counter()
+        self.last_response = None
+        self.last_ttft = None
+        self.last_stream_finished = False
+        self._streamed = []
+        return EndTokenFilter()
+
+    def _filter_chunk(self, chunk, metadata: dict, token_filter: EndTokenFilter) -> str:
+        # Solo texto del entrevistador: agente, turno fused o despedida (no ToolMessages)
+        if metadata.get("langgraph_node") not in ("agent", "turn", "farewell") or not isinstance(chunk, AIMessage):
+            return ""
+        text = token_filter.feed(get_safe_content(chunk.content))
+        if text and self.last_ttft is None:
+            self.last_ttft = time.perf_counter() - self._stream_start
+        self._streamed.append(text)
+        return text
+
+    def _flush_stream(self, token_filter: EndTokenFilter) -> str:
+        tail = token_filter.flush()
+        self._streamed.append(tail)
+        return tail
+
+    def _end_stream(self, response, thread_id: str, token_filter: EndTokenFilter):
+        finished = token_filter.finished or END_TOKEN in get_safe_content(response.content)
+        # El texto de un turno que acabó en tool call también se ha mostrado: se guarda
+        # lo que vio el candidato, no solo el último mensaje
+        shown = "".join(self._streamed).strip()
+        if shown and shown != get_safe_content(response.content).replace(END_TOKEN, "").strip():
+            response = AIMessage(content=f"{shown} {END_TOKEN}" if finished else shown, id=response.id)
+        self.last_response = self._check_finished(response, thread_id)
+        self.last_stream_finished = finished
+
+    def _check_finished(self, response, thread_id: str):
+        # Si la entrevista ha terminado, el checkpointer puede purgarla más tarde
+        if END_TOKEN in get_safe_content(response.content) and hasattr(self.memory, "mark_finished"):
+            self.memory.mark_finished(thread_id)
+        return response
 
-    def get_transcript(self, thread_id: str):
+    def get_transcript(self, thread_id: str, format: str = "text"):
+        """
+        Transcripción de la entrevista en texto plano o JSONL ("text" / "jsonl").
+        """
         config = {"configurable": {"thread_id": thread_id}}
         state = self.graph.get_state(config)
-        messages = state.values.get("messages", [])
-        txt = ""
-        for msg in messages:
-            if isinstance(msg, AIMessage):
-                txt += f"Recruiter: {msg.content}\n"
-            elif isinstance(msg, HumanMessage):
-                txt += f"Candidato: {msg.content}\n"
-        return txt
-
-    def reevaluate(self, offer_text: str, original_cv: str, thread_id: str):
-        transcript = self.get_transcript(thread_id)
-        augmented_cv = f"{original_cv}\n=== TRANSCRIPCIÓN ENTREVISTA ===\n{transcript}"
-        analyzer = CVAnalyzer(self.provider)
-        return analyzer.analyze(offer_text, augmented_cv)
\ No newline at end of file
+        return self._transcripts.render(thread_id, state.values.get("messages", []), format)
+
+    async def aget_transcript(self, thread_id: str, format: str = "text"):
+        config = {"configurable": {"thread_id": thread_id}}
+        state = await self.graph.aget_state(config)
+        return self._transcripts.render(thread_id, state.values.get("messages", []), format)
+
+    def get_ledger(self, thread_id: str) -> Dict[str, str]:
+        """
+        Conclusiones registradas durante la entrevista, por requisito.
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        return dict(self.graph.get_state(config).values.get("ledger") or {})
+
+    async def aget_ledger(self, thread_id: str) -> Dict[str, str]:
+        config = {"configurable": {"thread_id": thread_id}}
+        state = await self.graph.aget_state(config)
+        return dict(state.values.get("ledger") or {})
+
+    @staticmethod
+    def _augment_cv(original_cv: str, ledger: Dict[str, str], transcript: Optional[str]) -> str:
+        # Con validaciones registradas basta con sus conclusiones; si no, la transcripción completa
+        if ledger:
+            return f"{original_cv}\n=== VALIDACIONES ENTREVISTA ===\n{format_ledger(ledger)}"
+        return f"{original_cv}\n=== TRANSCRIPCIÓN ENTREVISTA ===\n{transcript}"
+
+    def reevaluate(
+        self,
+        offer_text: str,
+        original_cv: str,
+        thread_id: str,
+        initial_result: Optional[EvaluationResult] = None,
+    ):
+        """
+        Evaluación final tras la entrevista. Con el resultado de la fase 1
+        (initial_result) solo se reevalúan sus requisitos no encontrados,
+        usando como evidencia la entrevista, y se fusionan los veredictos.
+        Sin él, se analiza de nuevo el CV completo junto con la entrevista.
+        """
+        with self._span("reevaluate", thread_id=thread_id):
+            ledger = self.get_ledger(thread_id)
+            transcript = None if ledger else self.get_transcript(thread_id)
+            if self._can_merge(initial_result):
+                pending = self._pending_requirements(initial_result)
+                if not pending.requirements:
+                    return initial_result
+                partial = self._get_analyzer().analyze(offer_text, self._evidence(ledger, transcript), requirements=pending)
+                return merge_verdicts(initial_result, partial)
+
+            augmented_cv = self._augment_cv(original_cv, ledger, transcript)
+            return self._get_analyzer().analyze(offer_text, augmented_cv)
+
+    async def areevaluate(
+        self,
+        offer_text: str,
+        original_cv: str,
+        thread_id: str,
+        initial_result: Optional[EvaluationResult] = None,
+    ):
+        with self._span("reevaluate", thread_id=thread_id):
+            ledger = await self.aget_ledger(thread_id)
+            transcript = None if ledger else await self.aget_transcript(thread_id)
+            if self._can_merge(initial_result):
+                pending = self._pending_requirements(initial_result)
+                if not pending.requirements:
+                    return initial_result
+                partial = await self._get_analyzer().aanalyze(offer_text, self._evidence(ledger, transcript), requirements=pending)
+                return merge_verdicts(initial_result, partial)
+
+            augmented_cv = self._augment_cv(original_cv, ledger, transcript)
+            return await self._get_analyzer().aanalyze(offer_text, augmented_cv)
+
+    @staticmethod
+    def _can_merge(initial_result: Optional[EvaluationResult]) -> bool:
+        # Hacen falta los veredictos por requisito para fusionar
+        return initial_result is not None and bool(initial_result.verdicts)
+
+    @staticmethod
+    def _pending_requirements(initial_result: EvaluationResult) -> OfferRequirements:
+        return OfferRequirements(requirements=[
+            OfferRequirement(name=item.requirement, mandatory=item.mandatory)
+            for item in initial_result.verdicts
+            if item.verdict == "NO_MENCIONA"
+        ])
+
+    @staticmethod
+    def _evidence(ledger: Dict[str, str], transcript: Optional[str]) -> str:
+        return Interviewer._augment_cv("", ledger, transcript).lstrip("\n")
+
+    def _span(self, stage: str, config: Optional[RunnableConfig] = None, thread_id: Optional[str] = None):
+        # Span de telemetría de la etapa, con el thread_id de la entrevista
+        if config is not None:
+            thread_id = config.get("configurable", {}).get("thread_id")
+        return telemetry_span(stage, thread_id=thread_id, provider=self.provider, model=get_model_name(self.provider))
+
+    def _get_analyzer(self):
+        # Un único analizador por entrevistador (comparte el cliente LLM)
+        if self._analyzer is None:
+            self._analyzer = CVAnalyzer(self.provider, resilience=self.resilience)
+        return self._analyzer
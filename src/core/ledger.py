@@ -0,0 +1,104 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional
+
+# Palabras que no identifican un requisito por sí solas
+STOPWORDS = {
+    "a", "al", "anos", "con", "conocimiento", "conocimientos", "de", "del", "el", "en",
+    "experiencia", "la", "las", "los", "manejo", "minima", "minimo", "o", "para", "por",
+    "uso", "un", "una", "valorable", "y",
+}
+
+# Tokens técnicos: admite nombres como c++, c#, node.js o .net
+_TOKEN_RE = re.compile(r"[a-z0-9.+#]*[a-z0-9+#]")
+
+
+def canonical_key(text: str) -> str:
+    """
+    Forma canónica de un nombre de requisito: minúsculas, sin tildes
+    y con los separadores normalizados.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(_TOKEN_RE.findall(text))
+
+
+def significant_tokens(text: str) -> List[str]:
+    """
+    Tokens completos que identifican el requisito (sin palabras vacías ni números).
+    """
+    return [t for t in canonical_key(text).split() if t not in STOPWORDS and not t.isdigit()]
+
+
+class RequirementIndex:
+    """
+    Índice normalizado de los requisitos pendientes de una entrevista.
+
+    Precalcula para cada requisito su clave canónica y su conjunto de tokens,
+    y un índice invertido token -> requisitos. Así cada validación se asocia
+    a su requisito comparando tokens completos (evita que "Go" case con
+    "Django") y, como último recurso, por similitud difusa de las claves.
+    """
+
+    def __init__(self, requirements: Iterable[str], threshold: float = 0.85):
+        self.threshold = threshold
+        self.entries: Dict[str, dict] = {}
+        for req in requirements:
+            self.entries[req] = {"key": canonical_key(req), "tokens": significant_tokens(req)}
+        self._build_lookup()
+
+    def _build_lookup(self):
+        self._by_key = {entry["key"]: req for req, entry in self.entries.items()}
+        self._by_token: Dict[str, List[str]] = {}
+        for req, entry in self.entries.items():
+            for token in entry["tokens"]:
+                self._by_token.setdefault(token, []).append(req)
+
+    def to_state(self) -> dict:
+        """
+        Representación serializable para guardarla en el estado del grafo.
+        """
+        return {"threshold": self.threshold, "entries": self.entries}
+
+    @classmethod
+    def from_state(cls, data: dict) -> "RequirementIndex":
+        index = cls([], threshold=data.get("threshold", 0.85))
+        index.entries = {req: dict(entry) for req, entry in data.get("entries", {}).items()}
+        index._build_lookup()
+        return index
+
+    def match(self, skill: str) -> Optional[str]:
+        """
+        Devuelve el requisito al que corresponde la skill validada (o None).
+        """
+        key = canonical_key(skill)
+        if key in self._by_key:
+            return self._by_key[key]
+
+        # Coincidencia por tokens completos: todos los tokens de uno están en el otro
+        tokens = set(significant_tokens(skill))
+        best, best_score = None, 0.0
+        candidates = {req for token in tokens for req in self._by_token.get(token, [])}
+        for req in candidates:
+            req_tokens = set(self.entries[req]["tokens"])
+            if tokens <= req_tokens or req_tokens <= tokens:
+                score = len(tokens & req_tokens) / len(tokens | req_tokens)
+                if score > best_score:
+                    best, best_score = req, score
+        if best is not None:
+            return best
+
+        # Similitud difusa de las claves canónicas
+        for req, entry in self.entries.items():
+            ratio = SequenceMatcher(None, key, entry["key"]).ratio()
+            if ratio >= self.threshold and ratio > best_score:
+                best, best_score = req, ratio
+        return best
+
+
+def format_ledger(ledger: Dict[str, str]) -> str:
+    """
+    Texto con las conclusiones registradas por requisito.
+    """
+    return "\n".join(f"- {req}: {conclusion}" for req, conclusion in ledger.items())
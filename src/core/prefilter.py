@@ -0,0 +1,176 @@
+from dataclasses import dataclass, field
+from difflib import get_close_matches
+from typing import Dict, Iterable, List, Sequence, Set
+
+from src.core.ledger import STOPWORDS, canonical_key
+from src.models.schemas import BatchItemResult, OfferRequirements
+
+# Políticas para los CVs sin evidencia de algún requisito obligatorio:
+# - skip: no se envían al LLM (quedan sin evaluar, marcados como skipped)
+# - deprioritize: se envían al final del lote
+# - send: se envían igualmente (solo se marcan)
+PREFILTER_POLICIES = ("skip", "deprioritize", "send")
+
+# Expresiones de varias palabras que equivalen a un único término
+PHRASE_ALIASES = {
+    "machine learning": "ml",
+    "aprendizaje automatico": "ml",
+    "deep learning": "dl",
+    "aprendizaje profundo": "dl",
+    "procesamiento de lenguaje natural": "nlp",
+    "procesamiento del lenguaje natural": "nlp",
+    "natural language processing": "nlp",
+    "inteligencia artificial": "ia",
+    "artificial intelligence": "ia",
+    "computer science": "informatica",
+    "ciencia de datos": "data science",
+    "large language model": "llm",
+}
+
+# Sinónimos de un solo token -> término canónico
+TOKEN_ALIASES = {
+    "py": "python",
+    "python3": "python",
+    "js": "javascript",
+    "ts": "typescript",
+    "node": "nodejs",
+    "node.js": "nodejs",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "tf": "tensorflow",
+    "sklearn": "scikit learn",
+    "ai": "ia",
+    "gcp": "google cloud",
+    "msc": "master",
+    # Un LLM es un modelo de lenguaje: cuenta también como evidencia de NLP
+    "llm": "llm nlp",
+}
+
+# Palabras que aparecen en casi cualquier requisito y no aportan evidencia
+_GENERIC = STOPWORDS | {
+    "formacion", "requerida", "requerido", "requisito", "similar", "nivel",
+    "titulacion", "e", "u",
+}
+
+# Similitud mínima para aceptar un término del CV como variante (o errata) del requisito
+FUZZY_THRESHOLD = 0.8
+
+
+# Términos canónicos: no se les aplica la reducción de plurales
+_CANONICAL_TERMS = {part for value in TOKEN_ALIASES.values() for part in value.split()}
+
+
+def _stem(token: str) -> str:
+    # Plural simple (apis -> api, modelos -> modelo), igual en oferta y CV
+    if token in _CANONICAL_TERMS:
+        return token
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def normalize_terms(text: str) -> Set[str]:
+    """
+    Términos normalizados de un texto: sin tildes, con las expresiones y
+    sinónimos sustituidos por su término canónico y sin palabras genéricas.
+    """
+    key = f" {canonical_key(text)} "
+    for phrase, canonical in PHRASE_ALIASES.items():
+        key = key.replace(f" {phrase} ", f" {canonical} ")
+    terms = set()
+    for token in key.split():
+        for part in TOKEN_ALIASES.get(token, token).split():
+            if part not in _GENERIC and not part.isdigit():
+                terms.add(_stem(part))
+    return terms
+
+
+@dataclass
+class PrefilterDecision:
+    """
+    Resultado del pre-filtro para un CV.
+    """
+    index: int
+    missing_mandatory: List[str] = field(default_factory=list)
+
+    @property
+    def flagged(self) -> bool:
+        return bool(self.missing_mandatory)
+
+
+class RequirementPrefilter:
+    """
+    Pre-filtro léxico local previo al LLM.
+
+    Construye un índice invertido término -> CVs del lote y, para cada
+    requisito obligatorio, busca si algún CV contiene al menos uno de sus
+    términos (o sinónimos). Es deliberadamente conservador: basta una sola
+    coincidencia para considerar que hay evidencia, de forma que solo se
+    marcan los CVs que no mencionan en absoluto un requisito obligatorio.
+    """
+
+    def __init__(self, requirements: OfferRequirements):
+        self.mandatory: Dict[str, Set[str]] = {}
+        for req in requirements.requirements:
+            terms = normalize_terms(req.name)
+            # Un requisito sin términos útiles no se puede comprobar localmente
+            if req.mandatory and terms:
+                self.mandatory[req.name] = terms
+
+    def build_index(self, cvs: Sequence[str]) -> Dict[str, Set[int]]:
+        index: Dict[str, Set[int]] = {}
+        for i, cv in enumerate(cvs):
+            for term in normalize_terms(cv):
+                index.setdefault(term, set()).add(i)
+        return index
+
+    @staticmethod
+    def _matching_terms(terms: Set[str], index: Dict[str, Set[int]]) -> Set[str]:
+        # Los términos sin coincidencia exacta se buscan por similitud (erratas en la oferta o el CV)
+        matches = set()
+        for term in terms:
+            if term in index:
+                matches.add(term)
+            else:
+                matches.update(get_close_matches(term, index.keys(), n=3, cutoff=FUZZY_THRESHOLD))
+        return matches
+
+    def screen(self, cvs: Sequence[str]) -> List[PrefilterDecision]:
+        index = self.build_index(cvs)
+        decisions = [PrefilterDecision(index=i) for i in range(len(cvs))]
+        for name, terms in self.mandatory.items():
+            with_evidence = set().union(*(index.get(term, set()) for term in self._matching_terms(terms, index)))
+            for decision in decisions:
+                if decision.index not in with_evidence:
+                    decision.missing_mandatory.append(name)
+        return decisions
+
+
+def skipped_result(index: int, decision: PrefilterDecision) -> BatchItemResult:
+    """
+    Resultado de un CV que la política "skip" no envía al LLM.
+    No lleva EvaluationResult: un requisito no mencionado no descarta al
+    candidato (se aclara en la entrevista), así que sin evaluar no hay
+    puntuación ni descarte equivalentes a los del LLM.
+    """
+    return BatchItemResult(
+        index=index,
+        prefiltered=True,
+        skipped=True,
+        missing_mandatory=list(decision.missing_mandatory),
+    )
+
+
+def submission_order(decisions: Iterable[PrefilterDecision], policy: str) -> List[int]:
+    """
+    Índices que se envían al LLM, en orden, según la política.
+    """
+    if policy not in PREFILTER_POLICIES:
+        raise ValueError(f"Política de pre-filtro no soportada: {policy}. Usa una de {PREFILTER_POLICIES}.")
+    decisions = list(decisions)
+    if policy == "skip":
+        return [d.index for d in decisions if not d.flagged]
+    if policy == "deprioritize":
+        return [d.index for d in decisions if not d.flagged] + [d.index for d in decisions if d.flagged]
+    return [d.index for d in decisions]
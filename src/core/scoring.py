@@ -0,0 +1,115 @@
+from typing import Iterable
+
+from src.core.ledger import RequirementIndex, canonical_key
+from src.models.schemas import EvaluationResult, EvaluationVerdicts, OfferRequirements, RequirementVerdict
+
+
+def score_verdicts(
+    verdicts: EvaluationVerdicts,
+    mandatory_weight: float = 1.0,
+    optional_weight: float = 1.0,
+) -> EvaluationResult:
+    """
+    Calcula puntuación y descarte de forma determinista a partir de los
+    veredictos por requisito devueltos por el LLM.
+
+    - discarded = True si algún requisito obligatorio no se cumple
+      (o no hay requisitos que evaluar).
+    - score = peso de los requisitos cumplidos / peso total * 100
+      (0 si el candidato está descartado).
+    """
+    items = list(verdicts.verdicts)
+
+    matching, unmatching, not_found = [], [], []
+    for item in items:
+        if item.verdict == "CUMPLE":
+            matching.append(item.requirement)
+        elif item.verdict == "NO_CUMPLE":
+            unmatching.append(item.requirement)
+        else:
+            not_found.append(item.requirement)
+
+    discarded = not items or any(
+        item.mandatory and item.verdict == "NO_CUMPLE" for item in items
+    )
+    score = 0 if discarded else _weighted_score(items, mandatory_weight, optional_weight)
+
+    return EvaluationResult(
+        score=score,
+        discarded=discarded,
+        matching_requirements=matching,
+        unmatching_requirements=unmatching,
+        not_found_requirements=not_found,
+        explaination=verdicts.explaination,
+        verdicts=items,
+    )
+
+
+def reconcile_verdicts(verdicts: EvaluationVerdicts, requirements: OfferRequirements) -> EvaluationVerdicts:
+    """
+    Ajusta los veredictos del LLM a la lista de requisitos extraída de la oferta:
+    - cada veredicto se asocia a su requisito con RequirementIndex (no por
+      nombre exacto) y toma el nombre y la obligatoriedad de la oferta;
+    - los requisitos que el LLM omite se añaden como NO_MENCIONA;
+    - los veredictos que no corresponden a ningún requisito se descartan.
+    """
+    index = RequirementIndex(req.name for req in requirements.requirements)
+    found = {}
+    for item in verdicts.verdicts:
+        name = index.match(item.requirement)
+        if name is not None:
+            found.setdefault(name, item.verdict)
+
+    items = [
+        RequirementVerdict(requirement=req.name, mandatory=req.mandatory, verdict=found.get(req.name, "NO_MENCIONA"))
+        for req in requirements.requirements
+    ]
+    return EvaluationVerdicts(verdicts=items, explaination=verdicts.explaination)
+
+
+def rescore(
+    result: EvaluationResult,
+    mandatory_weight: float = 1.0,
+    optional_weight: float = 1.0,
+) -> EvaluationResult:
+    """
+    Recalcula un resultado existente con otros pesos sin volver a llamar al LLM.
+    """
+    verdicts = EvaluationVerdicts(verdicts=result.verdicts, explaination=result.explaination)
+    return score_verdicts(verdicts, mandatory_weight, optional_weight)
+
+
+def _weighted_score(items: Iterable[RequirementVerdict], mandatory_weight: float, optional_weight: float) -> int:
+    total = matched = 0.0
+    for item in items:
+        weight = mandatory_weight if item.mandatory else optional_weight
+        total += weight
+        if item.verdict == "CUMPLE":
+            matched += weight
+    return round(matched / total * 100) if total else 0
+
+
+def merge_verdicts(
+    base: EvaluationResult,
+    update: EvaluationVerdicts,
+    mandatory_weight: float = 1.0,
+    optional_weight: float = 1.0,
+) -> EvaluationResult:
+    """
+    Sustituye en un resultado existente los veredictos de los requisitos
+    reevaluados (p. ej. tras la entrevista) y recalcula la puntuación.
+    Se conserva la obligatoriedad original; los veredictos de requisitos
+    que no estaban en el resultado base se ignoran.
+    """
+    updated = {canonical_key(item.requirement): item for item in update.verdicts}
+    items = []
+    for item in base.verdicts:
+        new = updated.get(canonical_key(item.requirement))
+        items.append(item if new is None else item.model_copy(update={"verdict": new.verdict}))
+
+    explaination = base.explaination
+    if update.explaination:
+        explaination = f"{explaination}\n\nTras la entrevista: {update.explaination}".strip()
+
+    verdicts = EvaluationVerdicts(verdicts=items, explaination=explaination)
+    return score_verdicts(verdicts, mandatory_weight, optional_weight)
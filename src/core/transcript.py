@@ -0,0 +1,88 @@
+import json
+import threading
+from typing import Dict, List, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from src.llm.factory import get_safe_content
+
+# Formatos de exportación soportados
+TRANSCRIPT_FORMATS = ("text", "jsonl")
+
+_ROLES = ((AIMessage, "recruiter", "Recruiter"), (HumanMessage, "candidato", "Candidato"))
+
+
+def _role(msg: BaseMessage):
+    for cls, role, label in _ROLES:
+        if isinstance(msg, cls):
+            return role, label
+    return None
+
+
+class _ThreadTranscript:
+    def __init__(self):
+        self.rendered = 0  # mensajes del historial ya procesados
+        self.last = None   # último mensaje procesado (para detectar historiales reescritos)
+        self.turns: List[dict] = []
+        self.text_lines: List[str] = []
+        self.jsonl_lines: List[str] = []
+
+
+class TranscriptCache:
+    """
+    Transcripciones de las entrevistas cacheadas por hilo.
+
+    Cada llamada solo procesa los mensajes nuevos desde la anterior; si el
+    historial ya no empieza por lo procesado (p. ej. se reinició el hilo)
+    se reconstruye desde cero. Las líneas se guardan ya formateadas y se
+    unen con join al exportar.
+    """
+
+    def __init__(self):
+        self._threads: Dict[str, _ThreadTranscript] = {}
+        self._lock = threading.Lock()
+
+    def _update(self, thread_id: str, messages: Sequence[BaseMessage]) -> _ThreadTranscript:
+        entry = self._threads.get(thread_id)
+        if entry is None or len(messages) < entry.rendered or (
+            entry.rendered and messages[entry.rendered - 1] != entry.last
+        ):
+            entry = self._threads[thread_id] = _ThreadTranscript()
+
+        for msg in messages[entry.rendered:]:
+            role = _role(msg)
+            if role is None:
+                continue
+            content = get_safe_content(msg.content)
+            if not content:
+                # Llamadas a herramientas sin texto
+                continue
+            turn = {"turn": len(entry.turns), "role": role[0], "content": content}
+            entry.turns.append(turn)
+            entry.text_lines.append(f"{role[1]}: {content}\n")
+            entry.jsonl_lines.append(json.dumps(turn, ensure_ascii=False) + "\n")
+
+        if len(messages) > entry.rendered:
+            entry.rendered = len(messages)
+            entry.last = messages[-1]
+        return entry
+
+    def render(self, thread_id: str, messages: Sequence[BaseMessage], format: str = "text") -> str:
+        """
+        Devuelve la transcripción en texto plano ("Recruiter: ..." / "Candidato: ...")
+        o en JSONL (un objeto por turno con turn, role y content).
+        """
+        if format not in TRANSCRIPT_FORMATS:
+            raise ValueError(f"Formato de transcripción no soportado: {format}. Usa uno de {TRANSCRIPT_FORMATS}.")
+        with self._lock:
+            entry = self._update(thread_id, messages)
+            lines = entry.text_lines if format == "text" else entry.jsonl_lines
+            return "".join(lines)
+
+    def turns(self, thread_id: str, messages: Sequence[BaseMessage]) -> List[dict]:
+        with self._lock:
+            return [dict(turn) for turn in self._update(thread_id, messages).turns]
+
+    def invalidate(self, thread_id: str):
+        with self._lock:
+            self._threads.pop(thread_id, None)
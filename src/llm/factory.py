@@ -1,10 +1,62 @@
+import asyncio
+import hashlib
+import importlib
 import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence
+
+import httpx
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from src.llm.rate_limit import get_rate_limiter, is_rate_limit_error, RateLimitUsageCallback
+from src.utils.stats import percentile
+from src.utils.telemetry import record_event
 
 load_dotenv()  # Carga las variables de entorno desde el archivo .env
 
+# Clase de chat de cada SDK -> módulo que la define. Los SDKs tardan en
+# importarse (más de un segundo entre los dos), así que solo se carga el del
+# proveedor elegido y en su primer uso.
+_PROVIDER_CLASSES = {
+    "ChatOpenAI": "langchain_openai",
+    "ChatGoogleGenerativeAI": "langchain_google_genai",
+}
+
+
+def __getattr__(name):
+    # Importación perezosa de src.llm.factory.ChatOpenAI / ChatGoogleGenerativeAI
+    if name in _PROVIDER_CLASSES:
+        cls = getattr(importlib.import_module(_PROVIDER_CLASSES[name]), name)
+        globals()[name] = cls
+        return cls
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _chat_class(name: str):
+    # Se resuelve como atributo del módulo para respetar los patch de los tests
+    return getattr(sys.modules[__name__], name)
+
+# Modelo concreto usado por cada proveedor
+MODEL_NAMES = {
+    "openai": "gpt-5",
+    "gemini": "gemini-3-pro-preview",
+}
+
+def get_model_name(provider: str) -> str:
+    """
+    Devuelve el nombre del modelo asociado a un proveedor ('' si no se soporta).
+    """
+    return MODEL_NAMES.get(provider.lower(), "")
+
 def get_safe_content(msg_content):
     """
     Extrae el texto de un mensaje de LangChain de forma segura,
@@ -25,46 +77,532 @@ def get_safe_content(msg_content):
         return "".join(text_parts)
     return ""
 
-def get_llm_openai():
+# Registro de clientes compartidos por todo el proceso:
+# (proveedor, modelo, temperatura, huella de la api key) -> _ClientEntry
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+class _ClientEntry:
+    """
+    Cliente LLM registrado junto con los recursos HTTP que le pertenecen.
+    """
+
+    def __init__(self, llm, sync_resources=(), async_resources=()):
+        self.llm = llm
+        self.sync_resources = list(sync_resources)
+        self.async_resources = list(async_resources)
+
+
+def _api_key_fingerprint(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def _get_or_create_client(key: tuple, create):
+    """
+    Devuelve el cliente registrado para `key` o lo crea (una sola vez) con `create`.
+    """
+    entry = _CLIENTS.get(key)
+    if entry is None:
+        with _CLIENTS_LOCK:
+            entry = _CLIENTS.get(key)
+            if entry is None:
+                entry = create()
+                _CLIENTS[key] = entry
+    return entry.llm
+
+
+def close_llm_clients():
+    """
+    Cierra los pools de conexiones HTTP de los clientes registrados y vacía el registro.
+    Los clientes asíncronos solo se liberan; para cerrarlos usar aclose_llm_clients.
+    """
+    with _CLIENTS_LOCK:
+        entries = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for entry in entries:
+        for resource in entry.sync_resources:
+            try:
+                resource.close()
+            except Exception:
+                pass
+
+
+async def aclose_llm_clients():
+    """
+    Cierra los pools síncronos y asíncronos de los clientes registrados.
+    """
+    with _CLIENTS_LOCK:
+        entries = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for entry in entries:
+        for resource in entry.sync_resources:
+            try:
+                resource.close()
+            except Exception:
+                pass
+        for resource in entry.async_resources:
+            try:
+                await resource.aclose()
+            except Exception:
+                pass
+
+
+def reset_llm_registry():
+    """
+    Olvida los clientes registrados sin cerrarlos (útil en tests).
+    """
+    with _CLIENTS_LOCK:
+        _CLIENTS.clear()
+
+
+def get_llm_openai(temperature: float = 0, max_retries: Optional[int] = None):
     """
     Instancia específica para OpenAI.
+    El cliente y sus pools de conexiones se comparten en todo el proceso
+    y respetan los límites de peticiones/tokens del proveedor.
+    max_retries sustituye a los reintentos propios del SDK (None = los del SDK).
     """
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("Api Key de OpenAI no encontrada en variables de entorno.")
 
-    return ChatOpenAI(
-        model="gpt-5", 
-        api_key=api_key,
-        temperature=0
-    )
+    model = MODEL_NAMES["openai"]
 
-def get_llm_gemini():
+    def create():
+        # Pools propios para poder cerrarlos de forma explícita, con los valores por
+        # defecto del SDK (límites de conexiones, timeout y redirecciones)
+        import openai
+
+        http_client = openai.DefaultHttpxClient()
+        http_async_client = openai.DefaultAsyncHttpxClient()
+        limiter = get_rate_limiter("openai")
+        llm = _chat_class("ChatOpenAI")(
+            model=model,
+            api_key=api_key,
+            temperature=temperature,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            rate_limiter=limiter,
+            callbacks=[RateLimitUsageCallback(limiter)],
+            **_retry_kwargs(max_retries),
+        )
+        return _ClientEntry(llm, [http_client], [http_async_client])
+
+    return _get_or_create_client(("openai", model, temperature, _api_key_fingerprint(api_key), max_retries), create)
+
+def get_llm_gemini(temperature: float = 0, max_retries: Optional[int] = None):
     """
     Instancia específica para Gemini.
+    El cliente se comparte en todo el proceso y respeta los límites del proveedor.
+    max_retries sustituye a los reintentos propios del SDK (None = los del SDK).
     """
 
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("Api Key de Google no encontrada en variables de entorno.")
 
-    return ChatGoogleGenerativeAI(
-        model="gemini-3-pro-preview",
-        google_api_key=api_key,
-        temperature=0
-    )
+    model = MODEL_NAMES["gemini"]
+
+    def create():
+        limiter = get_rate_limiter("gemini")
+        llm = _chat_class("ChatGoogleGenerativeAI")(
+            model=model,
+            google_api_key=api_key,
+            temperature=temperature,
+            rate_limiter=limiter,
+            callbacks=[RateLimitUsageCallback(limiter)],
+            **_retry_kwargs(max_retries),
+        )
+        client = getattr(llm, "client", None)
+        return _ClientEntry(llm, [client] if hasattr(client, "close") else [])
 
-def get_llm(model_name: str):
+    return _get_or_create_client(("gemini", model, temperature, _api_key_fingerprint(api_key), max_retries), create)
+
+def _retry_kwargs(max_retries: Optional[int]) -> dict:
+    # Sin indicarlo se conservan los valores por defecto de cada SDK
+    return {} if max_retries is None else {"max_retries": max_retries}
+
+def get_llm(model_name: str, temperature: float = 0, max_retries: Optional[int] = None):
     """
     Instancia el LLM según el proveedor indicado.
     Soporta 'openai' y 'gemini'.
     Por defecto, usa OpenAI.
+    Las instancias se reutilizan por (proveedor, modelo, temperatura, reintentos).
     """
 
     if model_name.lower() == "openai":
-        return get_llm_openai()
+        return get_llm_openai(temperature, max_retries)
 
     elif model_name.lower() == "gemini":
-        return get_llm_gemini()
+        return get_llm_gemini(temperature, max_retries)
     else:
         return None # Por defecto, no soportado
+
+
+# --- Llamadas resilientes: deadline, reintentos, hedging y proveedor de respaldo ---
+
+# Proveedor alternativo de cada proveedor
+FALLBACK_PROVIDERS = {
+    "openai": "gemini",
+    "gemini": "openai",
+}
+
+# Errores transitorios (además de los 429) que merece la pena reintentar
+_RETRYABLE_ERRORS = (TimeoutError, ConnectionError, httpx.TimeoutException, httpx.TransportError)
+_RETRYABLE_NAMES = ("Timeout", "Connection", "InternalServerError", "ServiceUnavailable", "ServerError", "Overloaded")
+
+# Pool compartido para ejecutar los intentos con deadline y las peticiones de cobertura
+_RESILIENT_EXECUTOR = None
+_RESILIENT_EXECUTOR_LOCK = threading.Lock()
+
+# Peticiones de cobertura en vuelo en todo el proceso (también las abandonadas)
+_HEDGES_IN_FLIGHT = 0
+_HEDGES_LOCK = threading.Lock()
+
+
+# Deadline absoluto (time.monotonic) impuesto por quien llama, ver llm_deadline
+_CALL_DEADLINE: ContextVar[Optional[float]] = ContextVar("velora_llm_deadline", default=None)
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """
+    La llamada no terminó antes del deadline total (incluidos reintentos y respaldo).
+    """
+
+
+@contextmanager
+def llm_deadline(seconds: Optional[float]):
+    """
+    Limita a `seconds` las llamadas resilientes hechas dentro del bloque (en
+    el mismo hilo o tarea), además del deadline de su política. Un límite
+    exterior más estricto se conserva. Con None no cambia nada.
+    """
+    if seconds is None:
+        yield
+        return
+    deadline_at = time.monotonic() + seconds
+    outer = _CALL_DEADLINE.get()
+    token = _CALL_DEADLINE.set(deadline_at if outer is None else min(outer, deadline_at))
+    try:
+        yield
+    finally:
+        _CALL_DEADLINE.reset(token)
+
+
+@dataclass(frozen=True)
+class ResiliencePolicy:
+    """
+    Política de las llamadas resilientes al LLM.
+    - deadline: segundos máximos por llamada, sumando reintentos y respaldo (None = sin límite).
+    - max_retries: reintentos por proveedor ante errores transitorios.
+    - backoff_base / backoff_max: espera exponencial con jitter completo entre reintentos.
+    - hedge_percentile: si una petición tarda más que este percentil de las
+      latencias recientes se lanza una segunda en paralelo y se usa la primera
+      que responda (None desactiva el hedging).
+    - hedge_min_samples: latencias necesarias antes de empezar a cubrir.
+    - hedge_after: umbral fijo en segundos (sustituye al percentil).
+    - max_hedges_in_flight: peticiones de cobertura simultáneas en el proceso;
+      por encima no se cubre (las abandonadas cuentan hasta que terminan).
+    - fallback: usar el otro proveedor cuando el principal agota sus intentos.
+    Los clientes envueltos no usan los reintentos del SDK (max_retries=0):
+    todos los reintentos son los de esta política.
+    """
+    deadline: Optional[float] = 120.0
+    max_retries: int = 2
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    hedge_percentile: Optional[float] = 0.95
+    hedge_min_samples: int = 20
+    hedge_after: Optional[float] = None
+    max_hedges_in_flight: int = 8
+    fallback: bool = True
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """
+    Errores transitorios: cuota (429), timeouts, conexión y 5xx del proveedor.
+    """
+    if is_rate_limit_error(exc) or isinstance(exc, _RETRYABLE_ERRORS):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int) and status >= 500:
+        return True
+    return any(name in type(exc).__name__ for name in _RETRYABLE_NAMES)
+
+
+def _get_resilient_executor() -> ThreadPoolExecutor:
+    global _RESILIENT_EXECUTOR
+    if _RESILIENT_EXECUTOR is None:
+        with _RESILIENT_EXECUTOR_LOCK:
+            if _RESILIENT_EXECUTOR is None:
+                _RESILIENT_EXECUTOR = ThreadPoolExecutor(max_workers=64, thread_name_prefix="llm-resilient")
+    return _RESILIENT_EXECUTOR
+
+
+def _acquire_hedge(limit: int) -> bool:
+    global _HEDGES_IN_FLIGHT
+    with _HEDGES_LOCK:
+        if _HEDGES_IN_FLIGHT >= limit:
+            return False
+        _HEDGES_IN_FLIGHT += 1
+        return True
+
+
+def _release_hedge(_done=None):
+    global _HEDGES_IN_FLIGHT
+    with _HEDGES_LOCK:
+        _HEDGES_IN_FLIGHT -= 1
+
+
+class LatencyTracker:
+    """
+    Latencias recientes de las llamadas correctas, para el umbral de hedging.
+    """
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < max(min_samples, 1):
+                return None
+            samples = list(self._samples)
+        return percentile(samples, q)
+
+
+class ResilientRunnable(Runnable):
+    """
+    Envuelve uno o varios Runnables equivalentes (proveedor principal y de
+    respaldo) y aplica la ResiliencePolicy en invoke/ainvoke. Como cada
+    Runnable ya incluye su salida estructurada, el resultado mantiene el
+    mismo tipo (p. ej. EvaluationVerdicts) venga del proveedor que venga.
+    """
+
+    def __init__(
+        self,
+        targets: Sequence[Runnable],
+        policy: Optional[ResiliencePolicy] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None,
+    ):
+        if not targets:
+            raise ValueError("Se necesita al menos un Runnable.")
+        self.targets = list(targets)
+        self.policy = policy or ResiliencePolicy()
+        self.latency = LatencyTracker()
+        self.hedges = 0
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+
+    # Utilidades comunes
+
+    def _hedge_delay(self) -> Optional[float]:
+        policy = self.policy
+        if policy.hedge_after is not None:
+            return policy.hedge_after
+        if policy.hedge_percentile is None:
+            return None
+        return self.latency.percentile(policy.hedge_percentile, policy.hedge_min_samples)
+
+    def _backoff(self, attempt: int) -> float:
+        cap = min(self.policy.backoff_max, self.policy.backoff_base * (2 ** attempt))
+        return self._rng.uniform(0, cap)
+
+    def _deadline_at(self) -> Optional[float]:
+        # El más estricto entre el deadline de la política y el de llm_deadline
+        now = self._clock()
+        deadlines = [] if self.policy.deadline is None else [now + self.policy.deadline]
+        outer = _CALL_DEADLINE.get()
+        if outer is not None:
+            deadlines.append(now + outer - time.monotonic())
+        return min(deadlines) if deadlines else None
+
+    def _remaining(self, deadline_at: Optional[float]) -> Optional[float]:
+        return None if deadline_at is None else deadline_at - self._clock()
+
+    def _attempts(self):
+        # (índice del destino, número de intento)
+        for index in range(len(self.targets)):
+            for attempt in range(self.policy.max_retries + 1):
+                yield index, attempt
+
+    @staticmethod
+    def _record_attempt(index: int, attempt: int):
+        # Reintentos y cambios al proveedor de respaldo en el span en curso
+        if attempt > 0:
+            record_event("retries")
+        elif index > 0:
+            record_event("fallbacks")
+
+    # Versión síncrona
+
+    def _timed_call(self, target: Runnable, input, config, kwargs):
+        start = self._clock()
+        output = target.invoke(input, config, **kwargs)
+        self.latency.record(self._clock() - start)
+        return output
+
+    def _call_hedged(self, target: Runnable, input, config, kwargs, timeout: Optional[float]):
+        executor = _get_resilient_executor()
+        start = self._clock()
+        futures = [executor.submit(self._timed_call, target, input, config, kwargs)]
+
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is not None and (timeout is None or hedge_delay < timeout):
+            done, _ = wait(futures, timeout=hedge_delay)
+            if not done and _acquire_hedge(self.policy.max_hedges_in_flight):
+                self.hedges += 1
+                record_event("hedges")
+                hedge = executor.submit(self._timed_call, target, input, config, kwargs)
+                hedge.add_done_callback(_release_hedge)
+                futures.append(hedge)
+
+        try:
+            pending, error = set(futures), None
+            while pending:
+                remaining = None if timeout is None else max(timeout - (self._clock() - start), 0)
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    raise LLMDeadlineExceeded("Sin respuesta del LLM antes del deadline.")
+                for future in done:
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        error = e
+            raise error
+        finally:
+            # Las que aún no han empezado no llegan a enviarse; las que están en curso
+            # no se pueden interrumpir y terminan en el pool
+            for future in futures:
+                future.cancel()
+
+    def invoke(self, input, config: Optional[RunnableConfig] = None, **kwargs):
+        deadline_at = self._deadline_at()
+        last_error = None
+        for index, attempt in self._attempts():
+            if attempt > 0 and (last_error is None or not is_retryable_error(last_error)):
+                continue
+            remaining = self._remaining(deadline_at)
+            if remaining is not None and remaining <= 0:
+                raise LLMDeadlineExceeded("Sin respuesta del LLM antes del deadline.") from last_error
+            self._record_attempt(index, attempt)
+            try:
+                return self._call_hedged(self.targets[index], input, config, kwargs, remaining)
+            except LLMDeadlineExceeded:
+                raise
+            except Exception as e:
+                last_error = e
+                if attempt < self.policy.max_retries and is_retryable_error(e):
+                    remaining = self._remaining(deadline_at)
+                    delay = self._backoff(attempt)
+                    self._sleep(delay if remaining is None else max(min(delay, remaining), 0))
+        raise last_error
+
+    # Versión asíncrona
+
+    async def _atimed_call(self, target: Runnable, input, config, kwargs):
+        start = self._clock()
+        output = await target.ainvoke(input, config, **kwargs)
+        self.latency.record(self._clock() - start)
+        return output
+
+    async def _acall_hedged(self, target: Runnable, input, config, kwargs, timeout: Optional[float]):
+        start = self._clock()
+        tasks = [asyncio.ensure_future(self._atimed_call(target, input, config, kwargs))]
+        try:
+            hedge_delay = self._hedge_delay()
+            if hedge_delay is not None and (timeout is None or hedge_delay < timeout):
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done and _acquire_hedge(self.policy.max_hedges_in_flight):
+                    self.hedges += 1
+                    record_event("hedges")
+                    hedge = asyncio.ensure_future(self._atimed_call(target, input, config, kwargs))
+                    hedge.add_done_callback(_release_hedge)
+                    tasks.append(hedge)
+
+            pending, error = set(tasks), None
+            while pending:
+                remaining = None if timeout is None else max(timeout - (self._clock() - start), 0)
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise LLMDeadlineExceeded("Sin respuesta del LLM antes del deadline.")
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # La petición perdedora (o la que superó el deadline) se cancela
+            for task in tasks:
+                task.cancel()
+
+    async def ainvoke(self, input, config: Optional[RunnableConfig] = None, **kwargs):
+        deadline_at = self._deadline_at()
+        last_error = None
+        for index, attempt in self._attempts():
+            if attempt > 0 and (last_error is None or not is_retryable_error(last_error)):
+                continue
+            remaining = self._remaining(deadline_at)
+            if remaining is not None and remaining <= 0:
+                raise LLMDeadlineExceeded("Sin respuesta del LLM antes del deadline.") from last_error
+            self._record_attempt(index, attempt)
+            try:
+                return await self._acall_hedged(self.targets[index], input, config, kwargs, remaining)
+            except LLMDeadlineExceeded:
+                raise
+            except Exception as e:
+                last_error = e
+                if attempt < self.policy.max_retries and is_retryable_error(e):
+                    remaining = self._remaining(deadline_at)
+                    delay = self._backoff(attempt)
+                    await asyncio.sleep(delay if remaining is None else max(min(delay, remaining), 0))
+        raise last_error
+
+
+class ResilientLLM(ResilientRunnable):
+    """
+    Modelo de chat resiliente: además de invoke/ainvoke, with_structured_output
+    y bind_tools devuelven un ResilientRunnable con la misma política sobre
+    los modelos principal y de respaldo.
+    """
+
+    def __init__(self, llms: Sequence, policy: Optional[ResiliencePolicy] = None, **kwargs):
+        super().__init__(llms, policy, **kwargs)
+        self._kwargs = kwargs
+
+    def with_structured_output(self, schema, **kwargs) -> ResilientRunnable:
+        return ResilientRunnable([llm.with_structured_output(schema, **kwargs) for llm in self.targets], self.policy, **self._kwargs)
+
+    def bind_tools(self, tools, **kwargs) -> ResilientRunnable:
+        return ResilientRunnable([llm.bind_tools(tools, **kwargs) for llm in self.targets], self.policy, **self._kwargs)
+
+
+def get_resilient_llm(provider: str, temperature: float = 0, policy: Optional[ResiliencePolicy] = None) -> ResilientLLM:
+    """
+    LLM del proveedor indicado envuelto con la política de resiliencia.
+    Si la política lo permite y hay API key del otro proveedor, se usa
+    como respaldo. A diferencia de get_llm, un proveedor desconocido es un error.
+    """
+    policy = policy or ResiliencePolicy()
+    # Sin reintentos del SDK: solo los de la política, dentro de su deadline y con su backoff
+    primary = get_llm(provider, temperature, max_retries=0)
+    if primary is None:
+        raise ValueError(f"Proveedor LLM no soportado: {provider}.")
+
+    llms = [primary]
+    fallback = FALLBACK_PROVIDERS.get(provider.lower())
+    if policy.fallback and fallback:
+        try:
+            llms.append(get_llm(fallback, temperature, max_retries=0))
+        except ValueError:
+            # Sin API key del proveedor de respaldo: solo el principal
+            pass
+    return ResilientLLM(llms, policy)
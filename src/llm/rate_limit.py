@@ -0,0 +1,269 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+
+# Límites por defecto de cada proveedor: (peticiones/minuto, tokens/minuto).
+# Se pueden sobrescribir con VELORA_<PROVEEDOR>_RPM y VELORA_<PROVEEDOR>_TPM.
+DEFAULT_LIMITS = {
+    "openai": (500, 500_000),
+    "gemini": (150, 1_000_000),
+}
+
+
+class TokenBucket:
+    """
+    Cubo de tokens que se rellena a `rate_per_minute` unidades por minuto
+    hasta un máximo de `capacity`. El nivel puede quedar en negativo cuando
+    se corrige a posteriori un consumo subestimado.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute debe ser mayor que 0.")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.clock = clock
+        self.level = self.capacity
+        self._last = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Segundos que faltan para poder consumir `amount` (0 si ya se puede).
+        """
+        self._refill()
+        # Una petición mayor que la capacidad se deja pasar con el cubo lleno
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+
+class ProviderRateLimiter(BaseRateLimiter):
+    """
+    Limitador de peticiones/minuto y tokens/minuto para un proveedor.
+
+    Se integra en los clientes de LangChain mediante el parámetro
+    `rate_limiter`: cada llamada al modelo reserva una petición y una
+    estimación de tokens. El consumo real se ajusta después con
+    record_usage (ver RateLimitUsageCallback).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: Optional[float] = None,
+        estimated_tokens_per_request: int = 2000,
+        request_burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.requests = TokenBucket(requests_per_minute, request_burst, clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute else None
+        self.estimated_tokens_per_request = estimated_tokens_per_request
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def _try_acquire(self) -> float:
+        with self._lock:
+            wait = self.requests.wait_time(1)
+            if self.tokens is not None:
+                wait = max(wait, self.tokens.wait_time(self.estimated_tokens_per_request))
+            if wait == 0:
+                self.requests.consume(1)
+                if self.tokens is not None:
+                    self.tokens.consume(self.estimated_tokens_per_request)
+            return wait
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        while True:
+            wait = self._try_acquire()
+            if wait == 0:
+                return True
+            if not blocking:
+                return False
+            self._sleep(wait)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        while True:
+            wait = self._try_acquire()
+            if wait == 0:
+                return True
+            if not blocking:
+                return False
+            await asyncio.sleep(wait)
+
+    def record_usage(self, total_tokens: int):
+        """
+        Corrige el cubo de tokens con el consumo real de una petición.
+        """
+        if self.tokens is None:
+            return
+        with self._lock:
+            self.tokens.consume(total_tokens - self.estimated_tokens_per_request)
+
+
+class RateLimitUsageCallback(BaseCallbackHandler):
+    """
+    Callback que informa al limitador de los tokens realmente consumidos.
+    """
+
+    def __init__(self, limiter: ProviderRateLimiter):
+        self.limiter = limiter
+
+    def on_llm_end(self, response, **kwargs):
+        total = (response.llm_output or {}).get("token_usage", {}).get("total_tokens")
+        if total is None:
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if usage:
+                        total = (total or 0) + usage.get("total_tokens", 0)
+        if total is not None:
+            self.limiter.record_usage(total)
+
+
+# Un limitador por proveedor compartido por todos sus clientes
+_LIMITERS = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """
+    Devuelve el limitador compartido del proveedor, creándolo con los
+    límites por defecto o los de las variables de entorno.
+    """
+    provider = provider.lower()
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(provider)
+        if limiter is None:
+            default_rpm, default_tpm = DEFAULT_LIMITS.get(provider, (60, None))
+            rpm = float(os.getenv(f"VELORA_{provider.upper()}_RPM", default_rpm))
+            tpm = os.getenv(f"VELORA_{provider.upper()}_TPM", default_tpm)
+            limiter = ProviderRateLimiter(rpm, float(tpm) if tpm else None)
+            _LIMITERS[provider] = limiter
+        return limiter
+
+
+def reset_rate_limiters():
+    """
+    Olvida los limitadores creados (útil en tests).
+    """
+    with _LIMITERS_LOCK:
+        _LIMITERS.clear()
+
+
+# Excepciones de cuota de los SDKs (openai.RateLimitError, google.api_core
+# ResourceExhausted/TooManyRequests). Se comparan por nombre para no importar
+# los SDKs de proveedores que no se usan.
+_RATE_LIMIT_ERROR_TYPES = ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """
+    Detecta errores 429 / cuota agotada de OpenAI y Gemini por código de
+    estado o tipo de excepción, nunca por el texto del mensaje. Recorre la
+    cadena de causas porque langchain-google-genai envuelve el ClientError.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        for attr in ("status_code", "code"):
+            if getattr(exc, attr, None) == 429:
+                return True
+        response = getattr(exc, "response", None)
+        if getattr(response, "status_code", None) == 429:
+            return True
+        if getattr(exc, "status", None) == "RESOURCE_EXHAUSTED":
+            return True
+        if any(cls.__name__ in _RATE_LIMIT_ERROR_TYPES for cls in type(exc).__mro__):
+            return True
+        exc = exc.__cause__
+    return False
+
+
+class AdaptiveConcurrencyController:
+    """
+    Controlador AIMD del número de peticiones en vuelo.
+
+    - Aumento aditivo: cada petición correcta suma `increase / limit`
+      (≈ +`increase` por cada ronda completa de peticiones).
+    - Disminución multiplicativa: un 429, o una latencia por encima de
+      `latency_target`, multiplica el límite por `decrease_factor`.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_target: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not min_limit <= initial_limit <= max_limit:
+            raise ValueError("Se debe cumplir min_limit <= initial_limit <= max_limit.")
+        self._limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.clock = clock
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency: Optional[float] = None, rate_limited: bool = False, failed: bool = False):
+        """
+        Libera un hueco. Los errores que no son de cuota (failed) no modifican el límite.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+            if failed and not rate_limited:
+                return
+            too_slow = self.latency_target is not None and latency is not None and latency > self.latency_target
+            if rate_limited or too_slow:
+                self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+            else:
+                self._limit = min(self.max_limit, self._limit + self.increase / max(self._limit, 1.0))
+
+    @contextmanager
+    def track(self):
+        """
+        Ocupa un hueco durante el bloque y ajusta el límite según el resultado.
+        """
+        self.acquire()
+        start = self.clock()
+        try:
+            yield
+        except Exception as e:
+            self.release(self.clock() - start, rate_limited=is_rate_limit_error(e), failed=True)
+            raise
+        else:
+            self.release(self.clock() - start)
@@ -1,5 +1,25 @@
-from pydantic import BaseModel, Field
-from typing import List
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+
+
+class OfferRequirement(BaseModel):
+    name : str = Field(..., description="Texto breve del requisito, tal y como aparece en la oferta (un único requisito).")
+    mandatory : bool = Field(..., description="True si es OBLIGATORIO (mínimo, imprescindible o sin etiqueta), False si es OPCIONAL (valorable, deseable).")
+
+
+class OfferRequirements(BaseModel):
+    requirements : List[OfferRequirement] = Field(default_factory=list, description="Lista de requisitos extraídos de la oferta, separando los que aparecen en la misma línea.")
+
+
+class RequirementVerdict(BaseModel):
+    requirement : str = Field(..., description="Texto breve del requisito de la oferta.")
+    mandatory : bool = Field(..., description="True si el requisito es OBLIGATORIO, False si es OPCIONAL.")
+    verdict : Literal["CUMPLE", "NO_CUMPLE", "NO_MENCIONA"] = Field(..., description="CUMPLE si el CV lo cumple, NO_CUMPLE si indica que no lo cumple, NO_MENCIONA si no hay información suficiente.")
+
+
+class EvaluationVerdicts(BaseModel):
+    verdicts : List[RequirementVerdict] = Field(default_factory=list, description="Un veredicto por cada requisito de la oferta.")
+    explaination: str = Field(default="", description="Explicación detallada del análisis realizado por el LLM.")
 
 
 class EvaluationResult(BaseModel):
@@ -8,4 +28,48 @@ class EvaluationResult(BaseModel):
     matching_requirements : List[str] = Field(..., description="Lista de requisitos de la oferta que el candidato SÍ cumple.")
     unmatching_requirements: List[str] = Field(default_factory=list, description="Lista de requisitos que el candidato explícitamente NO cumple (aparecen en el CV pero no alcanzan el nivel o son negativos).")
     not_found_requirements: List[str] = Field(default_factory=list,description="Lista de requisitos de la oferta que NO se mencionan en absoluto en el CV (información faltante).")
-    explaination: str = Field(default="", description="Explicación detallada del análisis realizado por el LLM.")
\ No newline at end of file
+    explaination: str = Field(default="", description="Explicación detallada del análisis realizado por el LLM.")
+    verdicts : List[RequirementVerdict] = Field(default_factory=list, description="Veredictos por requisito a partir de los que se calcula la puntuación.")
+
+    @model_validator(mode="after")
+    def reconcile_requirements(self):
+        """
+        Garantiza que cada requisito aparece en una sola lista y sin duplicados.
+        Prioridad ante contradicciones: no cumple > cumple > no mencionado.
+        """
+        seen = set()
+        for field in ("unmatching_requirements", "matching_requirements", "not_found_requirements"):
+            unique = []
+            for req in getattr(self, field):
+                key = req.strip().lower()
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(req)
+            object.__setattr__(self, field, unique)
+
+        score = min(max(self.score, 0), 100)
+        object.__setattr__(self, "score", 0 if self.discarded else score)
+        return self
+
+
+class SkillValidation(BaseModel):
+    skill : str = Field(..., description="Requisito validado, tal y como aparece en la lista de requisitos pendientes.")
+    conclusion : str = Field(..., description="Conclusión breve sobre la experiencia del candidato en ese requisito.")
+
+
+class InterviewTurn(BaseModel):
+    validations : List[SkillValidation] = Field(default_factory=list, description="Requisitos pendientes que la última respuesta del candidato permite dar por validados (vacía si ninguno).")
+    reply : str = Field(..., description="Siguiente mensaje del entrevistador al candidato.")
+
+
+class BatchItemResult(BaseModel):
+    index : int = Field(..., description="Posición del CV en la lista de entrada.")
+    result : Optional[EvaluationResult] = Field(default=None, description="Resultado de la evaluación si terminó correctamente.")
+    error : Optional[str] = Field(default=None, description="Mensaje de error si la evaluación falló o superó el timeout.")
+    prefiltered : bool = Field(default=False, description="True si el pre-filtro local no encontró evidencia de algún requisito obligatorio (con cualquier política).")
+    skipped : bool = Field(default=False, description="True si la política skip no lo envió al LLM: queda sin evaluar (sin result ni puntuación).")
+    missing_mandatory : List[str] = Field(default_factory=list, description="Requisitos obligatorios sin evidencia en el CV según el pre-filtro local.")
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.result is not None
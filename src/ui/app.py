@@ -1,16 +1,158 @@
+import os
 import streamlit as st
 import uuid
-import pandas as pd
 from langchain_core.messages import AIMessage, HumanMessage
 
 # --- IMPORTACIONES PROPIAS ---
+from src.core.cache import EvaluationCache, SQLiteCacheBackend
+from src.core.checkpoint import get_checkpointer
 from src.core.evaluator import CVAnalyzer
-from src.core.interviewer import Interviewer
-from src.llm.factory import get_safe_content
+from src.core.interviewer import END_TOKEN, Interviewer
+from src.llm.factory import ResiliencePolicy, get_safe_content
+from src.ui.jobs import JobRunner, pop_finished_job, running_job, start_job
+from src.utils.telemetry import get_telemetry
 
 # --- CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Velora AI Recruiter", layout="wide", page_icon="🤖")
 
+# --- CACHÉ DE EVALUACIONES (compartida por todas las sesiones) ---
+@st.cache_resource
+def get_evaluation_cache():
+    """
+    Caché persistente de evaluaciones para no repetir llamadas al LLM
+    cuando se vuelve a subir el mismo CV/oferta.
+    """
+    backend = SQLiteCacheBackend(
+        os.getenv("VELORA_CACHE_PATH", ".velora_cache/evaluations.sqlite"),
+        ttl=float(os.getenv("VELORA_CACHE_TTL", 7 * 24 * 3600)),
+        max_entries=int(os.getenv("VELORA_CACHE_MAX_ENTRIES", 10000)),
+    )
+    return EvaluationCache(backend)
+
+
+def get_resilience_policy():
+    """
+    Deadline, reintentos, hedging y proveedor de respaldo de las evaluaciones.
+    """
+    return ResiliencePolicy(
+        deadline=float(os.getenv("VELORA_LLM_DEADLINE", 120)),
+        fallback=os.getenv("VELORA_LLM_FALLBACK", "1") != "0",
+    )
+
+
+# --- RECURSOS COMPARTIDOS POR EL PROCESO ---
+@st.cache_resource
+def get_job_runner():
+    """
+    Pool de hilos donde se ejecutan las llamadas al LLM de todas las sesiones,
+    para que ningún rerun de Streamlit quede bloqueado esperando al modelo.
+    """
+    return JobRunner(max_workers=int(os.getenv("VELORA_UI_WORKERS", 16)))
+
+
+@st.cache_resource
+def get_analyzer(provider: str):
+    """
+    Un CVAnalyzer por proveedor (sin estado por sesión: cadenas y caché compartidas).
+    """
+    return CVAnalyzer(provider=provider, cache=get_evaluation_cache(), resilience=get_resilience_policy())
+
+
+@st.cache_resource
+def get_interview_checkpointer():
+    """
+    Checkpointer común a todas las entrevistas (cada sesión usa su propio thread_id).
+    """
+    return get_checkpointer()
+
+
+# Telemetría por etapa (VELORA_TELEMETRY, VELORA_TELEMETRY_PATH, VELORA_METRICS_PORT):
+# se configura al arrancar para que el endpoint de métricas esté disponible desde el principio
+get_telemetry()
+
+# Frecuencia con la que se consulta si ha terminado un trabajo en segundo plano
+JOB_POLL_INTERVAL = float(os.getenv("VELORA_UI_POLL_INTERVAL", 0.5))
+
+
+# --- TRABAJOS EN SEGUNDO PLANO (sin llamadas a Streamlit) ---
+def analizar_candidato(analyzer, provider, checkpointer, offer_text, cv_text, session_id):
+    """
+    Fase 1 completa: análisis del CV y, si hace falta entrevista, creación del
+    entrevistador y primer mensaje. Devuelve (resultado, entrevistador, mensaje).
+    """
+    result = analyzer.analyze(offer_text, cv_text)
+    if result.discarded or not result.not_found_requirements:
+        return result, None, None
+    interviewer = Interviewer(provider=provider, checkpointer=checkpointer, resilience=get_resilience_policy())
+    initial_msg = interviewer.initialize_interview(result.not_found_requirements, session_id)
+    return result, interviewer, initial_msg
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def esperar_trabajo(key: str, mensaje: str):
+    """
+    Consulta el trabajo `key` sin bloquear la sesión: solo se re-ejecuta este
+    fragmento y, cuando termina, se relanza el script para procesar el resultado.
+    """
+    job = running_job(st.session_state, key)
+    if job is None:
+        st.rerun()
+    st.info(f"⏳ {mensaje} ({job.elapsed:.0f}s)")
+
+
+# --- CHAT INCREMENTAL ---
+def add_message(msg):
+    """
+    Añade un mensaje al historial y guarda su texto ya limpio para pintarlo
+    sin volver a procesarlo en cada rerun.
+    """
+    st.session_state.messages.append(msg)
+    content = get_safe_content(msg.content)
+    if isinstance(msg, AIMessage):
+        text = content.replace(END_TOKEN, "")
+        if text.strip():
+            st.session_state.chat_view.append(("assistant", text))
+    elif isinstance(msg, HumanMessage):
+        st.session_state.chat_view.append(("user", content))
+
+
+def mostrar_mensajes(view):
+    for role, text in view:
+        with st.chat_message(role):
+            st.write(text)
+
+
+@st.fragment
+def turno_chat():
+    """
+    Turno del candidato. Al enviar un mensaje solo se re-ejecuta este fragmento:
+    el historial pintado en el último rerun completo sigue en pantalla y aquí
+    solo se pintan los mensajes posteriores.
+    """
+    mostrar_mensajes(st.session_state.chat_view[st.session_state.chat_rendered:])
+
+    if prompt := st.chat_input("Escribe tu respuesta..."):
+        add_message(HumanMessage(content=prompt))
+        with st.chat_message("user"):
+            st.write(prompt)
+
+        with st.chat_message("assistant"):
+            try:
+                interviewer = st.session_state.interviewer
+                # El texto aparece a medida que el LLM lo genera (sin [FIN_ENTREVISTA])
+                st.write_stream(interviewer.stream_message(prompt, st.session_state.session_id))
+                add_message(interviewer.last_response)
+
+                # Latencia percibida: tiempo hasta el primer fragmento
+                if interviewer.last_ttft is not None:
+                    st.session_state.ttft_history.append(interviewer.last_ttft)
+
+                if interviewer.last_stream_finished:
+                    st.session_state.finished = True
+                    st.rerun()
+            except Exception as e:
+                st.error(f"Error de conexión: {e}")
+
 # --- FUNCIÓN DE VISUALIZACIÓN COMÚN ---
 def mostrar_informe_final(result, initial_score=None):
     """
@@ -60,6 +202,10 @@ if "locked" not in st.session_state:
 # Variables de datos
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "chat_view" not in st.session_state:
+    st.session_state.chat_view = []
+if "chat_rendered" not in st.session_state:
+    st.session_state.chat_rendered = 0
 if "interviewer" not in st.session_state:
     st.session_state.interviewer = None 
 if "current_score" not in st.session_state:
@@ -70,6 +216,14 @@ if "cv_text" not in st.session_state:
     st.session_state.cv_text = ""
 if "active_requirements" not in st.session_state:
     st.session_state.active_requirements = []
+if "ttft_history" not in st.session_state:
+    st.session_state.ttft_history = []
+if "initial_result" not in st.session_state:
+    st.session_state.initial_result = None
+if "direct_result" not in st.session_state:
+    st.session_state.direct_result = None
+if "final_result" not in st.session_state:
+    st.session_state.final_result = None
 
 # Inicializamos el proveedor por defecto
 if "selected_provider" not in st.session_state:
@@ -115,10 +269,18 @@ with st.sidebar:
         st.metric("Score CV", f"{st.session_state.current_score}/100")
         if st.session_state.active_requirements:
             with st.expander("Requisitos a Evaluar"):
-                df = pd.DataFrame(st.session_state.active_requirements, columns=["Skill Faltante"])
-                st.dataframe(df, hide_index=True, width='stretch')
+                st.markdown("\n".join(f"- {req}" for req in st.session_state.active_requirements))
 
     st.divider()
+
+    # Tiempo hasta el primer token de las respuestas del entrevistador
+    if st.session_state.ttft_history:
+        last_ttft = st.session_state.ttft_history[-1]
+        st.caption(f"Primer token: {last_ttft:.2f}s (última respuesta)")
+
+    # Ahorro de la caché de evaluaciones
+    cache_stats = get_evaluation_cache().stats
+    st.caption(f"Caché: {cache_stats['hits']} aciertos / {cache_stats['misses']} fallos")
     
     # Botón de reinicio
     if st.button("Reiniciar Todo", type="primary"):
@@ -133,121 +295,108 @@ with st.sidebar:
 if not st.session_state.analysis_done:
     if 'offer_file' in locals() and offer_file and 'cv_file' in locals() and cv_file:
         
-        # Botón de inicio
+        # Botón de inicio: lee los ficheros y lanza el análisis en segundo plano
         if not st.session_state.locked:
             if st.button("Analizar Candidato"):
-                st.session_state.locked = True
-                st.rerun() 
-        
-        # Ejecución lógica
-        if st.session_state.locked:
-            provider_actual = st.session_state.selected_provider
-            st.toast(f"Iniciando motor con: {provider_actual.upper()}")
-
-            try:
-                # Lectura
+                provider_actual = st.session_state.selected_provider
                 offer_file.seek(0)
                 cv_file.seek(0)
-                st.session_state.offer_text = offer_file.read().decode("utf-8")
-                st.session_state.cv_text = cv_file.read().decode("utf-8")
-                
-                # Análisis
-                analyzer = CVAnalyzer(provider=provider_actual)
-                
-                with st.spinner(f"Velora está analizando tu CV..."):
-                    result = analyzer.analyze(st.session_state.offer_text, st.session_state.cv_text)
-                
-                st.session_state.current_score = result.score
-                
-                # --- DECISIÓN DEL SISTEMA ---
-                
-                # CASO A: Pasamos a entrevista (No descartado Y faltan requisitos)
-                if not result.discarded and result.not_found_requirements:
-                    st.session_state.analysis_done = True
-                    st.session_state.active_requirements = result.not_found_requirements
-                    
-                    st.session_state.interviewer = Interviewer(provider=provider_actual)
-                    
-                    initial_msg = st.session_state.interviewer.initialize_interview(
-                        result.not_found_requirements, 
-                        st.session_state.session_id
+                try:
+                    st.session_state.offer_text = offer_file.read().decode("utf-8")
+                    st.session_state.cv_text = cv_file.read().decode("utf-8")
+                except UnicodeDecodeError:
+                    st.error("Los ficheros deben estar codificados en UTF-8.")
+                else:
+                    st.session_state.locked = True
+                    st.session_state.direct_result = None
+                    start_job(
+                        st.session_state, "analysis_job", get_job_runner(), "análisis",
+                        analizar_candidato,
+                        get_analyzer(provider_actual), provider_actual, get_interview_checkpointer(),
+                        st.session_state.offer_text, st.session_state.cv_text, st.session_state.session_id,
                     )
-                    st.session_state.messages.append(initial_msg)
+                    st.toast(f"Iniciando motor con: {provider_actual.upper()}")
                     st.rerun()
-                
-                # CASO B: Resultado Directo (Descartado O Perfecto)
-                else:
-                    # Aquí usamos la nueva función para mostrar el informe COMPLETO
-                    # Pasamos initial_score=result.score para que el delta sea 0
-                    mostrar_informe_final(result, initial_score=result.score)
-                    
-                    # Mensaje extra visual
-                    if result.discarded:
-                        st.error("El proceso se ha detenido automáticamente por criterios de descarte.")
-                    else:
-                        st.success("¡Perfil 100% compatible! No se requiere entrevista adicional.")
-
-            except ValueError as ve:
-                st.error(str(ve))
-                st.session_state.locked = False
-            except Exception as e:
-                st.error(f"Error inesperado: {e}")
-                st.session_state.locked = False
+
+    # Análisis en curso: la sesión sigue respondiendo mientras el LLM trabaja
+    if running_job(st.session_state, "analysis_job"):
+        esperar_trabajo("analysis_job", "Velora está analizando tu CV...")
+
+    job = pop_finished_job(st.session_state, "analysis_job")
+    if job is not None:
+        try:
+            result, interviewer, initial_msg = job.result()
+        except ValueError as ve:
+            st.error(str(ve))
+            st.session_state.locked = False
+        except Exception as e:
+            st.error(f"Error inesperado: {e}")
+            st.session_state.locked = False
+        else:
+            st.session_state.current_score = result.score
+            st.session_state.initial_result = result
+
+            # --- DECISIÓN DEL SISTEMA ---
+
+            # CASO A: Pasamos a entrevista (No descartado Y faltan requisitos)
+            if interviewer is not None:
+                st.session_state.analysis_done = True
+                st.session_state.active_requirements = result.not_found_requirements
+                st.session_state.interviewer = interviewer
+                add_message(initial_msg)
+                st.rerun()
+
+            # CASO B: Resultado Directo (Descartado O Perfecto)
+            st.session_state.direct_result = result
+
+    if st.session_state.direct_result is not None:
+        result = st.session_state.direct_result
+        # Pasamos initial_score=result.score para que el delta sea 0
+        mostrar_informe_final(result, initial_score=result.score)
+
+        # Mensaje extra visual
+        if result.discarded:
+            st.error("El proceso se ha detenido automáticamente por criterios de descarte.")
+        else:
+            st.success("¡Perfil 100% compatible! No se requiere entrevista adicional.")
 
 # --- FASE 2: CHAT ---
 if st.session_state.analysis_done and not st.session_state.finished:
     
-    # Contenedor de chat
+    # Historial completo solo en los reruns de la página; los turnos del chat
+    # re-ejecutan únicamente el fragmento turno_chat
     chat_container = st.container()
     with chat_container:
-        for msg in st.session_state.messages:
-            content = get_safe_content(msg.content)
-            clean_text = content.replace("[FIN_ENTREVISTA]", "")
-            
-            if isinstance(msg, AIMessage) and clean_text.strip():
-                with st.chat_message("assistant"):
-                    st.write(clean_text)
-            elif isinstance(msg, HumanMessage):
-                with st.chat_message("user"):
-                    st.write(content)
-
-    # Input de usuario
-    if prompt := st.chat_input("Escribe tu respuesta..."):
-        st.session_state.messages.append(HumanMessage(content=prompt))
-        with st.chat_message("user"):
-            st.write(prompt)
+        mostrar_mensajes(st.session_state.chat_view)
+    st.session_state.chat_rendered = len(st.session_state.chat_view)
 
-        with st.chat_message("assistant"):
-            with st.spinner("Velora..."):
-                try:
-                    response = st.session_state.interviewer.process_message(
-                        prompt, st.session_state.session_id
-                    )
-                    st.session_state.messages.append(response)
-                    
-                    resp_str = get_safe_content(response.content)
-                    st.write(resp_str.replace("[FIN_ENTREVISTA]", ""))
-                    
-                    if "[FIN_ENTREVISTA]" in resp_str:
-                        st.session_state.finished = True
-                        st.rerun()
-                except Exception as e:
-                    st.error(f"Error de conexión: {e}")
+    turno_chat()
 
 # --- FASE 3: RESULTADOS (Solo tras entrevista) ---
 if st.session_state.finished:
     
-    if st.button("Ver Informe Final Actualizado"):
-        with st.spinner("Generando valoración final..."):
-            try:
-                final = st.session_state.interviewer.reevaluate(
-                    st.session_state.offer_text, 
-                    st.session_state.cv_text, 
-                    st.session_state.session_id
-                )
-                
-                # Usamos la misma función visual
-                mostrar_informe_final(final, initial_score=st.session_state.current_score)
+    if st.session_state.final_result is None and not running_job(st.session_state, "reevaluate_job"):
+        if st.button("Ver Informe Final Actualizado"):
+            start_job(
+                st.session_state, "reevaluate_job", get_job_runner(), "reevaluación",
+                st.session_state.interviewer.reevaluate,
+                st.session_state.offer_text,
+                st.session_state.cv_text,
+                st.session_state.session_id,
+                initial_result=st.session_state.initial_result,
+            )
+            st.rerun()
 
-            except Exception as e:
-                st.error(f"Error generando reporte: {e}")
\ No newline at end of file
+    if running_job(st.session_state, "reevaluate_job"):
+        esperar_trabajo("reevaluate_job", "Generando valoración final...")
+
+    job = pop_finished_job(st.session_state, "reevaluate_job")
+    if job is not None:
+        if job.error is not None:
+            st.error(f"Error generando reporte: {job.error}")
+        else:
+            st.session_state.final_result = job.result()
+
+    if st.session_state.final_result is not None:
+        # Usamos la misma función visual
+        mostrar_informe_final(st.session_state.final_result, initial_score=st.session_state.current_score)
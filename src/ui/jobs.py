@@ -0,0 +1,136 @@
+"""
+Trabajos en segundo plano para la interfaz de Streamlit.
+
+Cada rerun de Streamlit ejecuta el script completo en el hilo de la sesión,
+así que una llamada al LLM dentro del script congela esa sesión durante toda
+la latencia. Las llamadas largas (análisis, arranque de la entrevista,
+reevaluación) se envían a un JobRunner compartido por el proceso y la sesión
+solo guarda el Job en st.session_state y lo consulta en cada rerun.
+
+Este módulo no depende de Streamlit: las funciones de sesión aceptan
+cualquier mapping (st.session_state o un dict en los tests).
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, MutableMapping, Optional
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """
+    Manejador de un trabajo enviado al JobRunner.
+    """
+    label: str
+    future: Future
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    submitted: float = field(default_factory=time.monotonic)
+
+    @property
+    def status(self) -> str:
+        if not self.future.done():
+            return JOB_RUNNING if self.future.running() else JOB_PENDING
+        return JOB_FAILED if self.future.exception() is not None else JOB_DONE
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.submitted
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self.future.exception() if self.future.done() else None
+
+    def result(self) -> Any:
+        """
+        Resultado del trabajo (relanza su excepción si falló).
+        """
+        if not self.future.done():
+            raise RuntimeError(f"El trabajo '{self.label}' todavía no ha terminado.")
+        return self.future.result()
+
+
+class JobRunner:
+    """
+    Pool de hilos compartido por todas las sesiones del proceso.
+    Las llamadas al LLM pasan la mayor parte del tiempo esperando a la red,
+    así que un pool de hilos basta para atender a muchos reclutadores a la vez.
+    """
+
+    def __init__(self, max_workers: int = 16):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="velora-ui")
+        self._lock = threading.Lock()
+        self._active = 0
+
+    @property
+    def active(self) -> int:
+        """
+        Trabajos enviados que aún no han terminado.
+        """
+        with self._lock:
+            return self._active
+
+    def submit(self, label: str, fn: Callable, *args, **kwargs) -> Job:
+        with self._lock:
+            self._active += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._finished(None)
+            raise
+        future.add_done_callback(self._finished)
+        return Job(label=label, future=future)
+
+    def _finished(self, _future):
+        with self._lock:
+            self._active -= 1
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+# --- Trabajos de la sesión ---
+
+def start_job(state: MutableMapping, key: str, runner: JobRunner, label: str, fn: Callable, *args, **kwargs) -> Job:
+    """
+    Lanza un trabajo y lo guarda en la sesión bajo `key`. Si ya hay uno en
+    curso con esa clave se devuelve el existente (un doble clic o un rerun
+    no lanza dos llamadas al LLM).
+    """
+    job = state.get(key)
+    if job is not None and not job.done:
+        return job
+    job = runner.submit(label, fn, *args, **kwargs)
+    state[key] = job
+    return job
+
+
+def running_job(state: MutableMapping, key: str) -> Optional[Job]:
+    """
+    Trabajo de la sesión que todavía no ha terminado, o None.
+    """
+    job = state.get(key)
+    return job if job is not None and not job.done else None
+
+
+def pop_finished_job(state: MutableMapping, key: str) -> Optional[Job]:
+    """
+    Saca de la sesión el trabajo `key` si ya ha terminado (para procesar su
+    resultado una sola vez). Devuelve None si no existe o sigue en curso.
+    """
+    job = state.get(key)
+    if job is None or not job.done:
+        return None
+    del state[key]
+    return job
@@ -1,16 +1,132 @@
+import codecs
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, Optional, Tuple, Union
 
-def read_data_file(filename: str, encoding: str = "utf-8") -> str:
+# Codificaciones que se prueban (en orden) cuando el fichero no tiene BOM
+_FALLBACK_ENCODINGS = ("utf-8", "cp1252", "latin-1")
+
+_BOMS = (
+	(codecs.BOM_UTF8, "utf-8-sig"),
+	(codecs.BOM_UTF16_LE, "utf-16"),
+	(codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+@dataclass(frozen=True)
+class CorpusRecord:
+	"""
+	Documento del corpus ya decodificado y normalizado.
+	"""
+	path: Path
+	text: str
+	sha256: str
+	encoding: str
+	size: int
+
+
+def read_data_file(filename: Union[str, Path], encoding: str = "utf-8") -> str:
 	"""
 	Leer un archivo de datos desde el directorio 'data'.
 	"""
+	filename = Path(filename)
 	if not filename.exists():
 		raise FileNotFoundError(f"Data file not found: {filename}")
 	return filename.read_text(encoding=encoding)
 
 
+def decode_bytes(raw: bytes) -> Tuple[str, str]:
+	"""
+	Detecta la codificación (BOM, UTF-8, cp1252 o latin-1) y devuelve
+	(texto, codificación) con los saltos de línea normalizados a "\\n".
+	"""
+	for bom, name in _BOMS:
+		if raw.startswith(bom):
+			text = raw.decode(name)
+			break
+	else:
+		for name in _FALLBACK_ENCODINGS:
+			try:
+				text = raw.decode(name)
+				break
+			except UnicodeDecodeError:
+				continue
+	return text.replace("\r\n", "\n").replace("\r", "\n"), name
+
+
+def iter_files(paths: Iterable[Union[str, Path]], pattern: str = "*.txt", recursive: bool = True) -> Iterator[Path]:
+	"""
+	Recorre de forma perezosa ficheros y directorios, en orden de nombre.
+	Para ordenarlo se lee el listado de cada directorio (solo las entradas,
+	no el contenido de los ficheros); los subdirectorios se recorren al llegar a ellos.
+	"""
+	for raw in paths:
+		path = Path(raw)
+		if not path.is_dir():
+			yield path
+			continue
+		entries = sorted(os.scandir(path), key=lambda e: e.name)
+		for entry in entries:
+			child = Path(entry.path)
+			if entry.is_dir():
+				if recursive:
+					yield from iter_files([child], pattern, recursive)
+			elif child.match(pattern):
+				yield child
+
 
+def _load(path: Path) -> CorpusRecord:
+	raw = path.read_bytes()
+	text, encoding = decode_bytes(raw)
+	digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+	return CorpusRecord(path=path, text=text, sha256=digest, encoding=encoding, size=len(raw))
 
 
+def iter_corpus(
+	paths: Iterable[Union[str, Path]],
+	pattern: str = "*.txt",
+	recursive: bool = True,
+	max_workers: int = 8,
+	dedupe: bool = True,
+	exclude: Iterable[Union[str, Path]] = (),
+) -> Iterator[CorpusRecord]:
+	"""
+	Generador de documentos (CVs u ofertas) de uno o varios directorios.
+
+	- Los ficheros se leen en paralelo con un pool de hilos, pero solo hay
+	  un número acotado de lecturas en vuelo (2 * max_workers), así que la
+	  memoria no crece con el tamaño del corpus.
+	- Los registros se devuelven en el orden del recorrido.
+	- Con dedupe, los documentos con el mismo contenido (tras normalizar
+	  codificación y saltos de línea) se devuelven una sola vez.
+	"""
+	if max_workers < 1:
+		raise ValueError("max_workers debe ser mayor o igual que 1.")
+	excluded = {Path(p).resolve() for p in exclude}
+	files = (p for p in iter_files(paths, pattern, recursive) if p.resolve() not in excluded)
+	seen = set()
+
+	def _unique(future) -> Optional[CorpusRecord]:
+		record = future.result()
+		if dedupe:
+			if record.sha256 in seen:
+				return None
+			seen.add(record.sha256)
+		return record
 
+	with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="corpus-loader") as executor:
+		in_flight = deque()
+		for path in files:
+			in_flight.append(executor.submit(_load, path))
+			if len(in_flight) >= 2 * max_workers:
+				record = _unique(in_flight.popleft())
+				if record is not None:
+					yield record
+		while in_flight:
+			record = _unique(in_flight.popleft())
+			if record is not None:
+				yield record
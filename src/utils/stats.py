@@ -0,0 +1,13 @@
+import math
+from typing import Sequence
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """
+    Percentil por el método del rango más cercano (0.0 sin muestras).
+    Lo comparten la telemetría, el umbral de hedging y los benchmarks.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(max(math.ceil(q * len(ordered)) - 1, 0), len(ordered) - 1)]
@@ -0,0 +1,462 @@
+"""
+Instrumentación de latencia, tokens y coste por etapa.
+
+Cada etapa (analyze, parse_offer, interview.agent, interview.tools,
+reevaluate...) se mide con un span que registra el tiempo de reloj, los
+tokens de entrada/salida del LLM (vía TelemetryCallbackHandler), el
+proveedor y modelo, los aciertos de caché y los reintentos, hedges y
+cambios al proveedor de respaldo (src.llm.factory.ResilientRunnable).
+
+Los spans terminados se agregan en memoria (exportables en formato texto de
+Prometheus) y, si se configura, se escriben en un fichero JSONL con el
+thread_id de la entrevista para poder analizarlos después:
+    python -m src.cli report --input telemetry.jsonl
+
+Activación por variables de entorno (desactivada por defecto):
+- VELORA_TELEMETRY=1: solo métricas en memoria.
+- VELORA_TELEMETRY_PATH: fichero JSONL de spans.
+- VELORA_METRICS_PORT: endpoint HTTP con las métricas (GET /metrics).
+Desactivada, telemetry_span devuelve un span vacío compartido y las
+llamadas al LLM no reciben callbacks adicionales.
+"""
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables.config import ensure_config, merge_configs
+
+from src.utils.stats import percentile
+
+# Precio por millón de tokens (entrada, salida) en USD de cada modelo
+MODEL_PRICES = {
+    "gpt-5": (1.25, 10.0),
+    "gemini-3-pro-preview": (2.0, 12.0),
+}
+
+# Límites (segundos) del histograma de duración de Prometheus
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Contadores de eventos de cada span
+SPAN_EVENTS = ("retries", "hedges", "fallbacks")
+
+_CURRENT_SPAN: ContextVar[Optional["Span"]] = ContextVar("velora_span", default=None)
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Coste estimado en USD (0 si el modelo no tiene precio conocido).
+    """
+    prices = MODEL_PRICES.get(model or "")
+    if prices is None:
+        # Nombres con versión o sufijo (gpt-5-2025-08-07)
+        prices = next((p for name, p in MODEL_PRICES.items() if model and model.startswith(name)), None)
+    if prices is None:
+        return 0.0
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """
+    Callback de LangChain que suma al span los tokens y el modelo de cada
+    llamada al LLM (incluidas las del proveedor de respaldo y los hedges).
+    """
+
+    run_inline = True
+
+    def __init__(self, span: "Span"):
+        self.span = span
+
+    def on_chat_model_start(self, serialized, messages, *, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name")
+        if model:
+            self.span.set(model=model)
+
+    def on_llm_end(self, response, **kwargs):
+        prompt = completion = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt += usage.get("input_tokens", 0)
+                    completion += usage.get("output_tokens", 0)
+        if not prompt and not completion:
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt, completion = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        self.span.add_usage(prompt, completion)
+
+
+class Span:
+    """
+    Medida de una etapa. Se usa como context manager (también en código async).
+    """
+
+    def __init__(self, telemetry: "Telemetry", stage: str, thread_id: Optional[str] = None, provider: Optional[str] = None, model: Optional[str] = None, **attrs):
+        self.telemetry = telemetry
+        self.stage = stage
+        self.thread_id = thread_id
+        self.provider = provider
+        self.model = model
+        self.attrs = attrs
+        self.parent = None
+        self.timestamp = None
+        self.duration = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hit = False
+        self.events = dict.fromkeys(SPAN_EVENTS, 0)
+        self.error = None
+        self._lock = threading.Lock()
+        self._start = None
+        self._token = None
+
+    def __enter__(self):
+        parent = _CURRENT_SPAN.get()
+        if parent is not None:
+            self.parent = parent.stage
+            # Las etapas anidadas heredan el hilo y el proveedor
+            self.thread_id = self.thread_id or parent.thread_id
+            self.provider = self.provider or parent.provider
+        self._token = _CURRENT_SPAN.set(self)
+        self.timestamp = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        _CURRENT_SPAN.reset(self._token)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.telemetry.record(self)
+        return False
+
+    def set(self, **attrs):
+        for key, value in attrs.items():
+            if key in ("thread_id", "provider", "model", "cache_hit"):
+                setattr(self, key, value)
+            else:
+                self.attrs[key] = value
+
+    def add_usage(self, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def increment(self, event: str, n: int = 1):
+        with self._lock:
+            self.events[event] = self.events.get(event, 0) + n
+
+    def config(self) -> dict:
+        """
+        Config de LangChain con el callback del span añadido a los heredados
+        (no sustituye, p. ej., a los callbacks de streaming de LangGraph).
+        """
+        return merge_configs(ensure_config(), {"callbacks": [TelemetryCallbackHandler(self)]})
+
+    def invoke(self, runnable, input):
+        return runnable.invoke(input, self.config())
+
+    async def ainvoke(self, runnable, input):
+        return await runnable.ainvoke(input, self.config())
+
+    @property
+    def cost(self) -> float:
+        return estimate_cost(self.model, self.prompt_tokens, self.completion_tokens)
+
+    def to_dict(self) -> dict:
+        record = {
+            "timestamp": round(self.timestamp, 6) if self.timestamp else None,
+            "stage": self.stage,
+            "parent": self.parent,
+            "thread_id": self.thread_id,
+            "provider": self.provider,
+            "model": self.model,
+            "duration_ms": round(self.duration * 1000, 3),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost, 8),
+            "cache_hit": self.cache_hit,
+            **self.events,
+            "error": self.error,
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        return record
+
+
+class _NoopSpan:
+    """
+    Span vacío de la telemetría desactivada: no mide ni guarda nada.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def add_usage(self, prompt_tokens: int, completion_tokens: int):
+        pass
+
+    def increment(self, event: str, n: int = 1):
+        pass
+
+    def invoke(self, runnable, input):
+        return runnable.invoke(input)
+
+    async def ainvoke(self, runnable, input):
+        return await runnable.ainvoke(input)
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonlSink:
+    """
+    Escribe cada span terminado como una línea JSON (seguro entre hilos).
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._fh = self.path.open("a", encoding="utf-8")
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+
+    def close(self):
+        with self._lock:
+            self._fh.close()
+
+
+class _StageMetrics:
+    def __init__(self):
+        self.count = 0
+        self.duration_sum = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.cache_hits = 0
+        self.errors = 0
+        self.events = dict.fromkeys(SPAN_EVENTS, 0)
+
+
+def _labels(**labels) -> str:
+    text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    return "{" + text + "}"
+
+
+class Telemetry:
+    """
+    Registro de spans: agregados por (etapa, proveedor) y sink JSONL opcional.
+    Las métricas de Prometheus no llevan thread_id (cardinalidad acotada);
+    el detalle por entrevista está en el JSONL.
+    """
+
+    def __init__(self, enabled: bool = False, sink: Optional[JsonlSink] = None):
+        self.enabled = enabled
+        self.sink = sink
+        self._lock = threading.Lock()
+        self._metrics: Dict[tuple, _StageMetrics] = {}
+
+    def span(self, stage: str, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, stage, **attrs)
+
+    def record(self, span: Span):
+        with self._lock:
+            metrics = self._metrics.setdefault((span.stage, span.provider or ""), _StageMetrics())
+            metrics.count += 1
+            metrics.duration_sum += span.duration
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if span.duration <= bound:
+                    metrics.buckets[i] += 1
+            metrics.prompt_tokens += span.prompt_tokens
+            metrics.completion_tokens += span.completion_tokens
+            metrics.cost += span.cost
+            metrics.cache_hits += span.cache_hit
+            metrics.errors += span.error is not None
+            for event, n in span.events.items():
+                metrics.events[event] = metrics.events.get(event, 0) + n
+        if self.sink is not None:
+            self.sink.write(span.to_dict())
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def prometheus(self) -> str:
+        """
+        Métricas agregadas en el formato de texto de Prometheus.
+        """
+        with self._lock:
+            items = sorted(self._metrics.items())
+            lines = [
+                "# HELP velora_stage_duration_seconds Duración de cada etapa.",
+                "# TYPE velora_stage_duration_seconds histogram",
+            ]
+            for (stage, provider), m in items:
+                for bound, count in zip(DURATION_BUCKETS, m.buckets):
+                    lines.append(f"velora_stage_duration_seconds_bucket{_labels(stage=stage, provider=provider, le=bound)} {count}")
+                lines.append(f"velora_stage_duration_seconds_bucket{_labels(stage=stage, provider=provider, le='+Inf')} {m.count}")
+                lines.append(f"velora_stage_duration_seconds_sum{_labels(stage=stage, provider=provider)} {m.duration_sum:.6f}")
+                lines.append(f"velora_stage_duration_seconds_count{_labels(stage=stage, provider=provider)} {m.count}")
+
+            lines += ["# HELP velora_llm_tokens_total Tokens consumidos por etapa.", "# TYPE velora_llm_tokens_total counter"]
+            for (stage, provider), m in items:
+                lines.append(f"velora_llm_tokens_total{_labels(stage=stage, provider=provider, kind='prompt')} {m.prompt_tokens}")
+                lines.append(f"velora_llm_tokens_total{_labels(stage=stage, provider=provider, kind='completion')} {m.completion_tokens}")
+
+            counters = [
+                ("velora_llm_cost_usd_total", "Coste estimado en USD.", lambda m: f"{m.cost:.8f}"),
+                ("velora_cache_hits_total", "Resultados servidos desde caché.", lambda m: m.cache_hits),
+                ("velora_stage_errors_total", "Etapas terminadas con error.", lambda m: m.errors),
+            ] + [
+                (f"velora_llm_{event}_total", f"Eventos '{event}' de las llamadas resilientes.", lambda m, e=event: m.events.get(e, 0))
+                for event in SPAN_EVENTS
+            ]
+            for name, help_text, value in counters:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for (stage, provider), m in items:
+                    lines.append(f"{name}{_labels(stage=stage, provider=provider)} {value(m)}")
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(telemetry: Telemetry, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Sirve GET /metrics en un hilo en segundo plano. Devuelve el servidor
+    (server.shutdown() para pararlo).
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = telemetry.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="velora-metrics", daemon=True).start()
+    return server
+
+
+# --- Instancia del proceso ---
+
+_TELEMETRY: Optional[Telemetry] = None
+_TELEMETRY_LOCK = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """
+    Telemetría del proceso, configurada desde el entorno en el primer uso.
+    """
+    global _TELEMETRY
+    if _TELEMETRY is None:
+        with _TELEMETRY_LOCK:
+            if _TELEMETRY is None:
+                path = os.getenv("VELORA_TELEMETRY_PATH")
+                port = os.getenv("VELORA_METRICS_PORT")
+                enabled = os.getenv("VELORA_TELEMETRY", "0") not in ("", "0") or bool(path) or bool(port)
+                telemetry = Telemetry(enabled=enabled, sink=JsonlSink(path) if path else None)
+                if port:
+                    start_metrics_server(telemetry, int(port))
+                _TELEMETRY = telemetry
+    return _TELEMETRY
+
+
+def set_telemetry(telemetry: Optional[Telemetry]) -> Optional[Telemetry]:
+    """
+    Sustituye la telemetría del proceso (None vuelve a leer el entorno).
+    Devuelve la anterior.
+    """
+    global _TELEMETRY
+    with _TELEMETRY_LOCK:
+        previous, _TELEMETRY = _TELEMETRY, telemetry
+    return previous
+
+
+def telemetry_span(stage: str, **attrs):
+    """
+    Span de la etapa `stage` en la telemetría del proceso.
+    """
+    return get_telemetry().span(stage, **attrs)
+
+
+def record_event(event: str, n: int = 1):
+    """
+    Suma un evento (retries, hedges, fallbacks) al span en curso, si lo hay.
+    """
+    span = _CURRENT_SPAN.get()
+    if span is not None:
+        span.increment(event, n)
+
+
+# --- Informe ---
+
+def load_spans(path: Union[str, Path]) -> List[dict]:
+    spans = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if line:
+                spans.append(json.loads(line))
+    return spans
+
+
+def summarize_spans(spans: Iterable[dict], by: str = "stage") -> List[dict]:
+    """
+    Resumen por etapa (o por "thread_id"): llamadas, p50/p95 de duración,
+    tokens, coste, aciertos de caché, reintentos y errores.
+    """
+    groups: Dict[str, List[dict]] = {}
+    for span in spans:
+        groups.setdefault(str(span.get(by) or "-"), []).append(span)
+    rows = []
+    for key, items in sorted(groups.items()):
+        durations = [s.get("duration_ms", 0.0) for s in items]
+        rows.append({
+            by: key,
+            "count": len(items),
+            "p50_ms": round(percentile(durations, 0.50), 3),
+            "p95_ms": round(percentile(durations, 0.95), 3),
+            "prompt_tokens": sum(s.get("prompt_tokens", 0) for s in items),
+            "completion_tokens": sum(s.get("completion_tokens", 0) for s in items),
+            "cost_usd": round(sum(s.get("cost_usd", 0.0) for s in items), 6),
+            "cache_hits": sum(bool(s.get("cache_hit")) for s in items),
+            "retries": sum(s.get("retries", 0) for s in items),
+            "errors": sum(s.get("error") is not None for s in items),
+        })
+    return rows
+
+
+def format_report(rows: List[dict], by: str = "stage") -> str:
+    header = f"{by:<24}{'n':>6}{'p50 ms':>11}{'p95 ms':>11}{'tok in':>10}{'tok out':>10}{'USD':>11}{'caché':>7}{'reint.':>7}{'err':>5}"
+    lines = [header]
+    for r in rows:
+        lines.append(
+            f"{r[by][:23]:<24}{r['count']:>6}{r['p50_ms']:>11}{r['p95_ms']:>11}{r['prompt_tokens']:>10}"
+            f"{r['completion_tokens']:>10}{r['cost_usd']:>11.4f}{r['cache_hits']:>7}{r['retries']:>7}{r['errors']:>5}"
+        )
+    return "\n".join(lines)
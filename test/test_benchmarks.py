@@ -0,0 +1,99 @@
+import asyncio
+import os
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from benchmarks.bench_import import PROVIDER_SDKS, parse_importtime, profile_import
+from benchmarks.fake_llm import FakeChatModel, LatencyDistribution, fake_structured_output, interview_script
+from benchmarks.harness import BenchmarkResult, compare, run_all
+from src.models.schemas import EvaluationVerdicts, OfferRequirements
+
+
+class TestFakeChatModel:
+
+    def test_latency_distributions_are_reproducible(self):
+        first = [LatencyDistribution("lognormal", mean=0.1, spread=0.5, seed=1).sample() for _ in range(3)]
+        second = [LatencyDistribution("lognormal", mean=0.1, spread=0.5, seed=1).sample() for _ in range(3)]
+        assert first == second
+        assert LatencyDistribution("constant", mean=0.2).sample() == 0.2
+        with pytest.raises(ValueError):
+            LatencyDistribution("pareto")
+
+    def test_script_and_token_usage(self):
+        llm = FakeChatModel(script=interview_script(["Python"], llm_greeting=True), output_tokens=7)
+        greeting = llm.invoke([HumanMessage(content="Saluda.")])
+        question = llm.invoke([HumanMessage(content="Me llamo Ana")])
+        tool_call = llm.invoke([HumanMessage(content="Usé Python")])
+
+        assert "¿Cómo te llamas?" in greeting.content
+        assert "Python" in question.content
+        assert tool_call.tool_calls[0]["args"]["skill"] == "Python"
+        assert greeting.usage_metadata["output_tokens"] == 7
+        assert llm.calls == 3
+
+    def test_structured_output_is_deterministic(self):
+        messages = [
+            SystemMessage(content="Sistema"),
+            HumanMessage(content="REQUISITOS:\n- [OBLIGATORIO] Python\n- [OPCIONAL] Docker"),
+            HumanMessage(content="CV con Python"),
+        ]
+        first = fake_structured_output(EvaluationVerdicts, messages)
+        assert [(v.requirement, v.mandatory) for v in first.verdicts] == [("Python", True), ("Docker", False)]
+        assert first == fake_structured_output(EvaluationVerdicts, messages)
+
+        offer = fake_structured_output(OfferRequirements, [HumanMessage(content="- Python\n- Valorable Go")])
+        assert [r.mandatory for r in offer.requirements] == [True, False]
+
+    def test_async_structured_output(self):
+        chain = FakeChatModel().with_structured_output(OfferRequirements)
+        result = asyncio.run(chain.ainvoke([HumanMessage(content="- Python")]))
+        assert result.requirements[0].name == "Python"
+
+
+class TestHarness:
+
+    def test_run_all_without_network(self):
+        """Ejecución mínima para CI: todos los caminos funcionan y el overhead es razonable."""
+        results = {r.name: r for r in run_all(cvs=6, interviews=1, concurrency=3)}
+
+        assert set(results) == {"analyze", "analyze_many(x3)", "interview_turn", "interview_turn_fused"}
+        assert results["analyze"].operations == 6
+        assert results["interview_turn"].operations == 6
+        assert results["interview_turn_fused"].operations == 6
+        for r in results.values():
+            assert r.p50_ms <= r.p95_ms <= r.p99_ms
+            assert r.peak_memory_kb > 0
+        # Presupuesto holgado del overhead propio por análisis (sin latencia de LLM)
+        assert results["analyze"].p95_ms < 250
+
+    def test_compare_detects_regressions(self):
+        current = [BenchmarkResult("analyze", 10, 1.0, 10.0, 1.0, 3.0, 4.0, 10.0)]
+        assert compare(current, {"analyze": {"p95_ms": 2.5}}, tolerance=0.5) == []
+        assert len(compare(current, {"analyze": {"p95_ms": 1.0}}, tolerance=0.5)) == 1
+
+
+# Presupuesto de arranque en frío del entrevistador (configurable para CI lentos)
+IMPORT_BUDGET_MS = float(os.getenv("VELORA_IMPORT_BUDGET_MS", 2000))
+
+
+class TestImportTime:
+
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     langchain_core.messages\n"
+            "import time:      3000 |       3120 |   src.core.context\n"
+            "import time:       500 |       3620 | src.core.interviewer\n"
+            "otra línea\n"
+        )
+        entries = parse_importtime(output)
+        assert [(e.name, e.depth) for e in entries] == [
+            ("langchain_core.messages", 2), ("src.core.context", 1), ("src.core.interviewer", 0),
+        ]
+        assert entries[-1].cumulative_us == 3620
+
+    def test_startup_does_not_load_provider_sdks_and_fits_budget(self):
+        profile = profile_import("src.core.interviewer")
+        assert not [sdk for sdk in PROVIDER_SDKS if sdk in profile.loaded]
+        assert profile.total_ms < IMPORT_BUDGET_MS, f"Importación en {profile.total_ms:.0f} ms"
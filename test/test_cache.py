@@ -0,0 +1,108 @@
+import pytest
+
+from src.core.cache import (
+    CacheBackend,
+    EvaluationCache,
+    InMemoryCacheBackend,
+    SQLiteCacheBackend,
+    make_cache_key,
+)
+from src.models.schemas import EvaluationResult
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _result(score=80):
+    return EvaluationResult(score=score, discarded=False, matching_requirements=["Python"])
+
+
+class TestCacheKey:
+
+    def test_key_ignores_whitespace_and_line_endings(self):
+        a = make_cache_key("Python\r\nDocker", "CV  uno", "openai", "gpt-5", "v1", "01/01/2026")
+        b = make_cache_key("Python\nDocker ", "CV uno", "OpenAI", "gpt-5", "v1", "01/01/2026")
+        assert a == b
+
+    def test_key_changes_with_prompt_model_and_date(self):
+        base = ("Oferta", "CV", "openai", "gpt-5", "v1", "01/01/2026")
+        key = make_cache_key(*base)
+        assert key != make_cache_key("Oferta", "CV", "openai", "gpt-5", "v2", "01/01/2026")
+        assert key != make_cache_key("Oferta", "CV", "gemini", "gemini-3-pro-preview", "v1", "01/01/2026")
+        assert key != make_cache_key("Oferta", "CV", "openai", "gpt-5", "v1", "02/01/2026")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend_factory(request, tmp_path):
+    def factory(**kwargs):
+        if request.param == "memory":
+            return InMemoryCacheBackend(**kwargs)
+        return SQLiteCacheBackend(tmp_path / "cache.sqlite", **kwargs)
+    return factory
+
+
+class TestBackends:
+
+    def test_set_and_get(self, backend_factory):
+        backend = backend_factory()
+        backend.set("k", "v")
+        assert backend.get("k") == "v"
+        assert backend.get("otra") is None
+
+    def test_ttl_expiration(self, backend_factory):
+        clock = FakeClock()
+        backend = backend_factory(ttl=60, clock=clock)
+        backend.set("k", "v")
+        clock.now += 30
+        assert backend.get("k") == "v"
+        clock.now += 31
+        assert backend.get("k") is None
+        assert len(backend) == 0
+
+    def test_lru_eviction(self, backend_factory):
+        clock = FakeClock()
+        backend = backend_factory(max_entries=2, clock=clock)
+        backend.set("a", "1")
+        clock.now += 1
+        backend.set("b", "2")
+        clock.now += 1
+        backend.get("a")  # 'a' pasa a ser la más reciente
+        clock.now += 1
+        backend.set("c", "3")
+
+        assert len(backend) == 2
+        assert backend.get("b") is None
+        assert backend.get("a") == "1"
+        assert backend.get("c") == "3"
+
+    def test_sqlite_persists_between_instances(self, tmp_path):
+        path = tmp_path / "cache.sqlite"
+        SQLiteCacheBackend(path).set("k", "v")
+        assert SQLiteCacheBackend(path).get("k") == "v"
+
+    def test_incomplete_backend_fails_at_instantiation(self):
+        class GetOnly(CacheBackend):
+            def get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            GetOnly()
+
+
+class TestEvaluationCache:
+
+    def test_roundtrip_and_counters(self):
+        cache = EvaluationCache()
+        assert cache.get("k") is None
+        cache.set("k", _result(90))
+
+        cached = cache.get("k")
+        assert cached == _result(90)
+        assert cache.stats["hits"] == 1
+        assert cache.stats["misses"] == 1
+        assert cache.stats["hit_rate"] == 0.5
@@ -0,0 +1,164 @@
+import asyncio
+import sqlite3
+
+import pytest
+from unittest.mock import MagicMock, patch
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.core.checkpoint import SQLiteCheckpointer, get_checkpointer
+from src.core.interviewer import InterviewTemplates, Interviewer
+
+
+# Saludo y despedida generados por el LLM: las respuestas de cada test siguen ese guion
+LLM_TURNS = InterviewTemplates(greeting=None, farewell=None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _make_interviewer(checkpointer, replies):
+    mock_base = MagicMock()
+    mock_with_tools = MagicMock()
+    mock_base.bind_tools.return_value = mock_with_tools
+    mock_with_tools.invoke.side_effect = replies
+    with patch('src.core.interviewer.get_llm', return_value=mock_base):
+        return Interviewer(provider="openai", checkpointer=checkpointer, templates=LLM_TURNS)
+
+
+class TestSQLiteCheckpointer:
+
+    def test_uses_wal_mode(self, tmp_path):
+        path = tmp_path / "cp.sqlite"
+        SQLiteCheckpointer(path)
+        mode = sqlite3.connect(str(path)).execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+    def test_state_survives_restart(self, tmp_path):
+        """Un proceso nuevo (otro Interviewer y otra conexión) recupera la entrevista."""
+        path = tmp_path / "cp.sqlite"
+        first = _make_interviewer(SQLiteCheckpointer(path), [AIMessage(content="Hola, ¿cómo te llamas?")])
+        first.initialize_interview(["Python", "Docker"], "thread_1")
+
+        second = _make_interviewer(SQLiteCheckpointer(path), [AIMessage(content="Cuéntame sobre Python")])
+        state = second.graph.get_state({"configurable": {"thread_id": "thread_1"}}).values
+        assert state["skills_pending"] == ["Python", "Docker"]
+
+        second.process_message("Me llamo Ana", "thread_1")
+        transcript = second.get_transcript("thread_1")
+        assert "Hola, ¿cómo te llamas?" in transcript
+        assert "Me llamo Ana" in transcript
+
+    def test_tool_calls_roundtrip(self, tmp_path):
+        """El grafo con herramientas funciona igual que con MemorySaver."""
+        tool_call = {"name": "registrar_validacion", "args": {"skill": "Python", "conclusion": "Ok"}, "id": "call_1"}
+        interviewer = _make_interviewer(
+            SQLiteCheckpointer(tmp_path / "cp.sqlite"),
+            [AIMessage(content="Hola"), AIMessage(content="", tool_calls=[tool_call]), AIMessage(content="Siguiente")],
+        )
+        interviewer.initialize_interview(["Python", "Java"], "thread_tools")
+        interviewer.process_message("Uso Python a diario", "thread_tools")
+
+        state = interviewer.graph.get_state({"configurable": {"thread_id": "thread_tools"}}).values
+        assert state["skills_pending"] == ["Java"]
+
+    def test_async_api(self, tmp_path):
+        checkpointer = SQLiteCheckpointer(tmp_path / "cp.sqlite")
+        fake_llm = MagicMock()
+        fake_llm.bind_tools.return_value = fake_llm
+
+        async def ainvoke(messages):
+            return AIMessage(content="Hola")
+        fake_llm.ainvoke = ainvoke
+
+        with patch('src.core.interviewer.get_llm', return_value=fake_llm):
+            interviewer = Interviewer(provider="openai", checkpointer=checkpointer, templates=LLM_TURNS)
+
+        async def run():
+            await interviewer.ainitialize_interview(["Python"], "t_async")
+            return await interviewer.aget_transcript("t_async")
+
+        assert "Recruiter: Hola" in asyncio.run(run())
+
+    def test_purge_finished_threads(self, tmp_path):
+        clock = FakeClock()
+        checkpointer = SQLiteCheckpointer(tmp_path / "cp.sqlite", clock=clock)
+        interviewer = _make_interviewer(checkpointer, [
+            AIMessage(content="Hola"),
+            AIMessage(content="Gracias, hemos terminado [FIN_ENTREVISTA]"),
+            AIMessage(content="Hola"),
+        ])
+        interviewer.initialize_interview(["Python"], "finished")
+        interviewer.process_message("Adiós", "finished")
+        interviewer.initialize_interview(["Python"], "active")
+
+        clock.now += 3600
+        assert checkpointer.purge_finished(ttl=60) == 1
+
+        assert checkpointer.get_tuple({"configurable": {"thread_id": "finished"}}) is None
+        assert checkpointer.get_tuple({"configurable": {"thread_id": "active"}}) is not None
+
+    def test_purge_idle_threads(self, tmp_path):
+        clock = FakeClock()
+        checkpointer = SQLiteCheckpointer(tmp_path / "cp.sqlite", clock=clock)
+        interviewer = _make_interviewer(checkpointer, [AIMessage(content="Hola")])
+        interviewer.initialize_interview(["Python"], "abandoned")
+
+        clock.now += 3600
+        assert checkpointer.purge_finished(ttl=60) == 0
+        assert checkpointer.purge_finished(ttl=60, max_idle=600) == 1
+
+    def test_purges_automatically_on_write(self, tmp_path):
+        clock = FakeClock()
+        checkpointer = SQLiteCheckpointer(tmp_path / "cp.sqlite", clock=clock, ttl=60, purge_interval=300)
+        interviewer = _make_interviewer(checkpointer, [
+            AIMessage(content="Hola"),
+            AIMessage(content="Gracias, hemos terminado [FIN_ENTREVISTA]"),
+            AIMessage(content="Hola"),
+            AIMessage(content="Hola"),
+        ])
+        interviewer.initialize_interview(["Python"], "finished")
+        interviewer.process_message("Adiós", "finished")
+
+        # Antes del intervalo de purga no se borra nada
+        clock.now += 120
+        interviewer.initialize_interview(["Python"], "new")
+        assert checkpointer.get_tuple({"configurable": {"thread_id": "finished"}}) is not None
+
+        clock.now += 300
+        interviewer.initialize_interview(["Python"], "newer")
+        assert checkpointer.get_tuple({"configurable": {"thread_id": "finished"}}) is None
+        assert checkpointer.get_tuple({"configurable": {"thread_id": "new"}}) is not None
+
+    def test_rejects_files_from_the_previous_format(self, tmp_path):
+        path = tmp_path / "cp.sqlite"
+        with sqlite3.connect(str(path)) as conn:
+            conn.execute("CREATE TABLE blobs (thread_id TEXT)")
+        with pytest.raises(ValueError):
+            SQLiteCheckpointer(path)
+
+
+class TestGetCheckpointer:
+
+    def test_memory_by_default(self, monkeypatch):
+        monkeypatch.delenv("VELORA_CHECKPOINTER", raising=False)
+        assert isinstance(get_checkpointer(), MemorySaver)
+
+    def test_sqlite_is_shared_per_path(self, tmp_path):
+        path = tmp_path / "cp.sqlite"
+        assert get_checkpointer("sqlite", path) is get_checkpointer("sqlite", path)
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            get_checkpointer("redis")
+
+    def test_sqlite_purge_limits_from_env(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("VELORA_CHECKPOINT_TTL", "120")
+        monkeypatch.setenv("VELORA_CHECKPOINT_MAX_IDLE", "0")
+        checkpointer = get_checkpointer("sqlite", tmp_path / "env.sqlite")
+        assert (checkpointer.ttl, checkpointer.max_idle) == (120.0, None)
@@ -0,0 +1,201 @@
+import csv
+import json
+
+import pytest
+
+from src.cli import build_parser, main, run_rank
+from src.core.checkpoint import SQLiteCheckpointer
+from src.models.schemas import BatchItemResult, EvaluationResult
+
+
+class FakeAnalyzer:
+    """
+    Sustituto de CVAnalyzer: la puntuación es el número que aparece en el CV.
+    Con interrupt_after simula una interrupción a mitad del lote.
+    """
+
+    def __init__(self, interrupt_after=None):
+        self.interrupt_after = interrupt_after
+        self.evaluated = []
+        self.batches = []
+
+    def analyze_many(self, offer_text, cvs, max_concurrency=4, timeout=None, on_item=None, prefilter=None):
+        results = []
+        self.batches.append(len(cvs))
+        for i, cv in enumerate(cvs):
+            if self.interrupt_after is not None and len(self.evaluated) == self.interrupt_after:
+                raise KeyboardInterrupt
+            if prefilter == "skip" and "Java" in cv:
+                item = BatchItemResult(index=i, prefiltered=True, skipped=True, missing_mandatory=["Python"])
+                on_item(item)
+                results.append(item)
+                continue
+            self.evaluated.append(cv)
+            if "roto" in cv:
+                item = BatchItemResult(index=i, error="ValueError: CV ilegible")
+            else:
+                score = int(cv.split()[-1])
+                item = BatchItemResult(index=i, result=EvaluationResult(
+                    score=score, discarded=score < 20, matching_requirements=[]
+                ))
+            on_item(item)
+            results.append(item)
+        return results
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "oferta.txt").write_text("Oferta Python", encoding="utf-8")
+    for name, score in [("cv_a", 40), ("cv_b", 90), ("cv_c", 10), ("cv_d", 70)]:
+        (data / f"{name}.txt").write_text(f"CV {name} {score}", encoding="utf-8")
+    return data
+
+
+def _args(corpus, output, *extra):
+    return build_parser().parse_args([
+        "rank", "--offer", str(corpus / "oferta.txt"), "--cvs", str(corpus),
+        "--output", str(output), "--quiet", *extra,
+    ])
+
+
+class TestRankCommand:
+
+    def test_writes_ranked_csv_excluding_offer(self, corpus, tmp_path):
+        output = tmp_path / "ranking.csv"
+        analyzer = FakeAnalyzer()
+
+        assert run_rank(_args(corpus, output), analyzer=analyzer) == 0
+
+        with output.open(encoding="utf-8") as fh:
+            rows = list(csv.DictReader(fh))
+        assert [r["file"].rsplit("/", 1)[-1] for r in rows] == ["cv_b.txt", "cv_d.txt", "cv_a.txt", "cv_c.txt"]
+        assert [r["rank"] for r in rows] == ["1", "2", "3", "4"]
+        assert rows[-1]["discarded"] == "True"
+        assert not any("Oferta" in cv for cv in analyzer.evaluated)
+
+    def test_other_offers_in_the_directory_are_not_ranked(self, corpus, tmp_path):
+        (corpus / "oferta2.txt").write_text("Otra oferta 50", encoding="utf-8")
+        analyzer = FakeAnalyzer()
+
+        assert run_rank(_args(corpus, tmp_path / "ranking.csv"), analyzer=analyzer) == 0
+        assert len(analyzer.evaluated) == 4
+        assert not any("oferta" in cv.lower() for cv in analyzer.evaluated)
+
+        # Con --exclude vacío solo se excluye la propia oferta
+        analyzer = FakeAnalyzer()
+        assert run_rank(_args(corpus, tmp_path / "todo.csv", "--exclude"), analyzer=analyzer) == 0
+        assert "Otra oferta 50" in analyzer.evaluated
+
+    def test_jsonl_output_with_errors_last(self, corpus, tmp_path):
+        (corpus / "cv_e.txt").write_text("CV roto", encoding="utf-8")
+        output = tmp_path / "ranking.jsonl"
+
+        assert run_rank(_args(corpus, output), analyzer=FakeAnalyzer()) == 1
+
+        rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+        assert rows[0]["score"] == 90
+        assert rows[-1]["file"].endswith("cv_e.txt")
+        assert rows[-1]["error"] == "ValueError: CV ilegible"
+
+    def test_resumes_from_checkpoint(self, corpus, tmp_path):
+        output = tmp_path / "ranking.csv"
+
+        with pytest.raises(KeyboardInterrupt):
+            run_rank(_args(corpus, output), analyzer=FakeAnalyzer(interrupt_after=2))
+        checkpoint = tmp_path / "ranking.csv.checkpoint.jsonl"
+        assert len(checkpoint.read_text(encoding="utf-8").splitlines()) == 2
+
+        resumed = FakeAnalyzer()
+        assert run_rank(_args(corpus, output), analyzer=resumed) == 0
+        assert len(resumed.evaluated) == 2
+
+        with output.open(encoding="utf-8") as fh:
+            assert len(list(csv.DictReader(fh))) == 4
+
+    def test_corpus_is_evaluated_in_bounded_windows(self, corpus, tmp_path):
+        output = tmp_path / "ranking.csv"
+        analyzer = FakeAnalyzer()
+
+        assert run_rank(_args(corpus, output, "--window", "3"), analyzer=analyzer) == 0
+
+        assert analyzer.batches == [3, 1]
+        with output.open(encoding="utf-8") as fh:
+            assert [r["rank"] for r in csv.DictReader(fh)] == ["1", "2", "3", "4"]
+
+    def test_checkpoint_of_other_offer_is_ignored(self, corpus, tmp_path):
+        output = tmp_path / "ranking.csv"
+        run_rank(_args(corpus, output), analyzer=FakeAnalyzer())
+
+        (corpus / "oferta.txt").write_text("Otra oferta", encoding="utf-8")
+        analyzer = FakeAnalyzer()
+        run_rank(_args(corpus, output), analyzer=analyzer)
+        assert len(analyzer.evaluated) == 4
+
+
+    @pytest.mark.parametrize("changed", [["--provider", "gemini"], ["--prefilter", "send"]])
+    def test_checkpoint_of_other_configuration_is_ignored(self, corpus, tmp_path, changed):
+        output = tmp_path / "ranking.csv"
+        run_rank(_args(corpus, output), analyzer=FakeAnalyzer())
+
+        analyzer = FakeAnalyzer()
+        run_rank(_args(corpus, output, *changed), analyzer=analyzer)
+        assert len(analyzer.evaluated) == 4
+
+    def test_checkpoint_of_other_prompt_version_is_ignored(self, corpus, tmp_path, monkeypatch):
+        output = tmp_path / "ranking.csv"
+        run_rank(_args(corpus, output), analyzer=FakeAnalyzer())
+
+        monkeypatch.setattr("src.cli.sys_prompt_cv_evaluator", "Prompt nuevo")
+        analyzer = FakeAnalyzer()
+        run_rank(_args(corpus, output), analyzer=analyzer)
+        assert len(analyzer.evaluated) == 4
+
+    def test_prefilter_skips_are_unscored_and_not_retried(self, corpus, tmp_path):
+        (corpus / "cv_java.txt").write_text("CV Java 0", encoding="utf-8")
+        output = tmp_path / "ranking.csv"
+
+        assert run_rank(_args(corpus, output, "--prefilter", "skip"), analyzer=FakeAnalyzer()) == 0
+        with output.open(encoding="utf-8") as fh:
+            rows = list(csv.DictReader(fh))
+        # Después de los evaluados (también de los descartados) y sin puntuación
+        assert rows[-1]["file"].endswith("cv_java.txt")
+        assert (rows[-1]["score"], rows[-1]["discarded"], rows[-1]["prefiltered"]) == ("", "", "True")
+        assert rows[-1]["missing_mandatory"] == "Python"
+
+        resumed = FakeAnalyzer()
+        assert run_rank(_args(corpus, output, "--prefilter", "skip"), analyzer=resumed) == 0
+        assert resumed.evaluated == []
+
+
+class TestReportCommand:
+
+    def test_prints_p50_p95_per_stage(self, tmp_path, capsys):
+        telemetry = tmp_path / "telemetry.jsonl"
+        spans = [{"stage": "analyze", "duration_ms": ms, "thread_id": None} for ms in (10, 20, 30)]
+        spans.append({"stage": "interview.agent", "duration_ms": 900, "thread_id": "t-1"})
+        telemetry.write_text("\n".join(json.dumps(s) for s in spans) + "\n", encoding="utf-8")
+
+        assert main(["report", "--input", str(telemetry), "--stage", "analyze"]) == 0
+        out = capsys.readouterr().out
+        assert "p95 ms" in out
+        assert "analyze" in out and "interview.agent" not in out
+
+        assert main(["report", "--input", str(tmp_path / "no_existe.jsonl")]) == 2
+
+
+class TestPurgeCheckpointsCommand:
+
+    def test_purges_finished_threads(self, tmp_path, capsys):
+        path = tmp_path / "cp.sqlite"
+        checkpointer = SQLiteCheckpointer(path, clock=lambda: 0.0)
+        checkpointer.mark_finished("terminada")
+        checkpointer.close()
+
+        assert main(["purge-checkpoints", "--path", str(path), "--ttl", "60"]) == 0
+        assert "1 entrevistas eliminadas" in capsys.readouterr().err
+
+    def test_missing_file(self, tmp_path):
+        assert main(["purge-checkpoints", "--path", str(tmp_path / "no.sqlite")]) == 2
+
@@ -0,0 +1,105 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from unittest.mock import MagicMock, patch
+
+from src.core.context import ContextWindowConfig, build_context, count_tokens
+from src.core.interviewer import Interviewer
+
+
+def _validation_turn(skill, answer="Respuesta larga " * 5):
+    call_id = f"call_{skill}"
+    return [
+        HumanMessage(content=f"Experiencia con {skill}: {answer}"),
+        AIMessage(content="", tool_calls=[{
+            "name": "registrar_validacion",
+            "args": {"skill": skill, "conclusion": f"Experiencia sólida en {skill}"},
+            "id": call_id,
+        }]),
+        ToolMessage(content=f"Validación guardada para '{skill}'.", tool_call_id=call_id, name="registrar_validacion"),
+        AIMessage(content=f"Genial. Siguiente pregunta tras {skill}."),
+    ]
+
+
+def _chat_turn(text):
+    return [HumanMessage(content=text), AIMessage(content=f"Respuesta a {text}")]
+
+
+def _history(*turns):
+    messages = [SystemMessage(content="Eres Alex, reclutador.")]
+    for turn in turns:
+        messages.extend(turn)
+    return messages
+
+
+class TestBuildContext:
+
+    def test_short_history_is_unchanged(self):
+        messages = _history(_chat_turn("Hola"), _validation_turn("Python"))
+        assert build_context(messages, ContextWindowConfig(keep_last_turns=6)) == messages
+
+    def test_old_validations_are_collapsed_into_summary(self):
+        messages = _history(
+            _validation_turn("Python"), _validation_turn("Docker"),
+            _chat_turn("uno"), _chat_turn("dos"),
+        )
+        context = build_context(messages, ContextWindowConfig(keep_last_turns=2))
+
+        # El prompt de sistema no cambia: el resumen va en un mensaje aparte
+        assert context[0] == messages[0]
+        assert isinstance(context[1], SystemMessage)
+        assert "- Python: Experiencia sólida en Python" in context[1].content
+        assert "- Docker: Experiencia sólida en Docker" in context[1].content
+        assert not any(isinstance(m, ToolMessage) for m in context)
+        assert [m.content for m in context[2:]] == ["uno", "Respuesta a uno", "dos", "Respuesta a dos"]
+
+    def test_conversation_after_last_validation_is_kept(self):
+        """Lo hablado sobre un requisito aún pendiente no se pierde aunque sea antiguo."""
+        messages = _history(
+            _validation_turn("Python"),
+            _chat_turn("Sobre Kubernetes..."), _chat_turn("más detalles"), _chat_turn("último"),
+        )
+        context = build_context(messages, ContextWindowConfig(keep_last_turns=1))
+        contents = [m.content for m in context]
+        assert "Sobre Kubernetes..." in contents
+        assert context[0] == messages[0]
+        assert "- Python:" in context[1].content
+
+    def test_tool_calls_are_never_split(self):
+        messages = _history(*[_validation_turn(s) for s in ["A", "B", "C", "D"]])
+        context = build_context(messages, ContextWindowConfig(keep_last_turns=1, max_tokens=10))
+
+        for i, msg in enumerate(context):
+            if isinstance(msg, ToolMessage):
+                assert context[i - 1].tool_calls[0]["id"] == msg.tool_call_id
+
+    def test_token_budget_is_enforced(self):
+        messages = _history(*[_chat_turn("texto largo " * 50) for _ in range(20)])
+        config = ContextWindowConfig(keep_last_turns=20, max_tokens=500)
+        context = build_context(messages, config)
+
+        assert count_tokens(messages) > 500
+        assert count_tokens(context) <= 500
+        # El último turno siempre se conserva
+        assert context[-1] == messages[-1]
+        assert context[0] == messages[0]
+
+
+class TestInterviewerUsesContextWindow:
+
+    def test_llm_receives_bounded_context(self):
+        mock_base = MagicMock()
+        mock_with_tools = MagicMock()
+        mock_base.bind_tools.return_value = mock_with_tools
+        mock_with_tools.invoke.return_value = AIMessage(content="Siguiente pregunta")
+
+        with patch('src.core.interviewer.get_llm', return_value=mock_base):
+            interviewer = Interviewer(provider="openai", context_config=ContextWindowConfig(keep_last_turns=1))
+
+        config = {"configurable": {"thread_id": "ctx"}}
+        history = _history(_validation_turn("Python"), _chat_turn("uno"))
+        interviewer.graph.update_state(config, {"messages": history, "skills_pending": ["Docker"]})
+        interviewer.process_message("dos", "ctx")
+
+        sent = mock_with_tools.invoke.call_args[0][0]
+        assert sent[0] == history[0]
+        assert "- Python:" in sent[1].content
+        assert [m.content for m in sent[2:]] == ["uno", "Respuesta a uno", "dos"]
@@ -1,9 +1,24 @@
+import asyncio
+import openai
 import pytest
 import os
+import threading
+import time
 from unittest.mock import patch, MagicMock
 
+from langchain_core.runnables import RunnableLambda
 
-from src.llm.factory import get_llm, get_safe_content
+from src.llm.factory import get_llm, get_safe_content, close_llm_clients, reset_llm_registry
+from src.llm.factory import LLMDeadlineExceeded, ResiliencePolicy, ResilientRunnable, get_resilient_llm, llm_deadline
+from src.models.schemas import EvaluationVerdicts
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    """Cada test parte con el registro de clientes vacío."""
+    reset_llm_registry()
+    yield
+    reset_llm_registry()
 
 class TestContentParser:
     """Test para la función de utilidad get_safe_content"""
@@ -50,6 +65,7 @@ class TestLLMFactory:
             assert kwargs["model"] == "gpt-5"
             assert kwargs["api_key"] == "sk-fake-key-123"
             assert kwargs["temperature"] == 0
+            assert "max_retries" not in kwargs
             
             # Verificamos que devuelve la instancia mockeada
             assert llm == mock_chat_openai.return_value
@@ -106,4 +122,220 @@ class TestLLMFactory:
     def test_factory_unknown_provider(self):
         """Verifica que devuelve None si el proveedor no existe."""
         result = get_llm("modelo_inventado")
-        assert result is None
\ No newline at end of file
+        assert result is None
+
+    def test_provider_classes_are_loaded_lazily(self):
+        """Las clases de los SDKs se resuelven como atributos del módulo en su primer uso."""
+        import src.llm.factory as factory
+        from langchain_openai import ChatOpenAI
+
+        assert factory.ChatOpenAI is ChatOpenAI
+        with pytest.raises(AttributeError):
+            factory.ChatInventado
+
+
+class TestClientRegistry:
+    """Tests para el registro de clientes compartidos"""
+
+    @patch("src.llm.factory.ChatOpenAI")
+    def test_same_config_reuses_client(self, mock_chat_openai):
+        """Dos llamadas con el mismo proveedor, modelo y temperatura comparten instancia."""
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "sk-fake"}):
+            first = get_llm("openai")
+            second = get_llm("OpenAI")
+
+        assert first is second
+        mock_chat_openai.assert_called_once()
+
+    @patch("src.llm.factory.ChatOpenAI")
+    def test_different_temperature_creates_new_client(self, mock_chat_openai):
+        mock_chat_openai.side_effect = lambda **kwargs: MagicMock()
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "sk-fake"}):
+            cold = get_llm("openai", temperature=0)
+            warm = get_llm("openai", temperature=0.7)
+
+        assert cold is not warm
+        assert mock_chat_openai.call_count == 2
+
+    @patch("src.llm.factory.ChatOpenAI")
+    def test_close_releases_http_pools(self, mock_chat_openai):
+        """close_llm_clients cierra los pools HTTP y fuerza a crear un cliente nuevo."""
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "sk-fake"}):
+            get_llm("openai")
+            http_client = mock_chat_openai.call_args.kwargs["http_client"]
+            # Pools con los valores por defecto del SDK de OpenAI
+            assert isinstance(http_client, openai.DefaultHttpxClient)
+            assert http_client.follow_redirects
+
+            close_llm_clients()
+            assert http_client.is_closed
+
+            get_llm("openai")
+            assert mock_chat_openai.call_count == 2
+
+    @patch("src.llm.factory.ChatOpenAI")
+    def test_registry_is_thread_safe(self, mock_chat_openai):
+        """Muchos hilos pidiendo el mismo cliente a la vez solo crean una instancia."""
+        mock_chat_openai.side_effect = lambda **kwargs: MagicMock()
+        results = []
+
+        def worker():
+            results.append(get_llm("openai"))
+
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "sk-fake"}):
+            threads = [threading.Thread(target=worker) for _ in range(20)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert mock_chat_openai.call_count == 1
+        assert all(r is results[0] for r in results)
+
+
+class TransientError(Exception):
+    status_code = 503
+
+
+class TestResilientRunnable:
+    """Tests para las llamadas resilientes (deadline, reintentos, hedging y respaldo)"""
+
+    @staticmethod
+    def _flaky(failures, result="ok", error=TransientError):
+        calls = []
+
+        def call(_):
+            calls.append(1)
+            if len(calls) <= failures:
+                raise error("fallo")
+            return result
+
+        return RunnableLambda(call), calls
+
+    def test_retries_transient_errors_with_backoff(self):
+        target, calls = self._flaky(2)
+        sleeps = []
+        runnable = ResilientRunnable([target], ResiliencePolicy(max_retries=2, hedge_percentile=None), sleep=sleeps.append)
+
+        assert runnable.invoke("x") == "ok"
+        assert len(calls) == 3
+        assert len(sleeps) == 2
+        assert all(0 <= s <= 1.0 for s in sleeps)
+
+    def test_falls_back_after_exhausting_retries(self):
+        primary, primary_calls = self._flaky(10)
+        verdicts = EvaluationVerdicts(verdicts=[], explaination="respaldo")
+        fallback = RunnableLambda(lambda _: verdicts)
+        runnable = ResilientRunnable(
+            [primary, fallback], ResiliencePolicy(max_retries=1, hedge_percentile=None), sleep=lambda s: None
+        )
+
+        assert runnable.invoke("x") is verdicts
+        assert len(primary_calls) == 2
+
+    def test_non_retryable_error_goes_straight_to_fallback(self):
+        primary, primary_calls = self._flaky(10, error=ValueError)
+        runnable = ResilientRunnable(
+            [primary, RunnableLambda(lambda _: "respaldo")], ResiliencePolicy(hedge_percentile=None), sleep=lambda s: None
+        )
+
+        assert runnable.invoke("x") == "respaldo"
+        assert len(primary_calls) == 1
+
+    def test_raises_last_error_when_everything_fails(self):
+        primary, _ = self._flaky(10, error=ValueError)
+        runnable = ResilientRunnable([primary], ResiliencePolicy(hedge_percentile=None))
+        with pytest.raises(ValueError):
+            runnable.invoke("x")
+
+    def test_deadline(self):
+        slow = RunnableLambda(lambda _: time.sleep(1) or "tarde")
+        runnable = ResilientRunnable([slow], ResiliencePolicy(deadline=0.1, hedge_percentile=None))
+
+        start = time.monotonic()
+        with pytest.raises(LLMDeadlineExceeded):
+            runnable.invoke("x")
+        assert time.monotonic() - start < 0.5
+
+    def test_caller_deadline_is_stricter_than_policy(self):
+        slow = RunnableLambda(lambda _: time.sleep(1) or "tarde")
+        runnable = ResilientRunnable([slow], ResiliencePolicy(deadline=10, hedge_percentile=None))
+
+        start = time.monotonic()
+        with llm_deadline(0.1), pytest.raises(LLMDeadlineExceeded):
+            runnable.invoke("x")
+        assert time.monotonic() - start < 0.5
+        # Fuera del bloque vuelve a regir solo la política
+        assert runnable._deadline_at() > time.monotonic() + 5
+
+    def test_hedges_slow_requests(self):
+        calls = []
+
+        def call(_):
+            calls.append(1)
+            # La primera petición se queda colgada; la de cobertura responde rápido
+            time.sleep(1 if len(calls) == 1 else 0)
+            return f"respuesta {len(calls)}"
+
+        runnable = ResilientRunnable([RunnableLambda(call)], ResiliencePolicy(hedge_after=0.05))
+        start = time.monotonic()
+        assert runnable.invoke("x") == "respuesta 2"
+        assert time.monotonic() - start < 0.5
+        assert runnable.hedges == 1
+
+    def test_hedges_are_capped_in_flight(self):
+        def call(_):
+            time.sleep(0.1)
+            return "ok"
+
+        runnable = ResilientRunnable([RunnableLambda(call)], ResiliencePolicy(hedge_after=0.01, max_hedges_in_flight=0))
+        assert runnable.invoke("x") == "ok"
+        assert runnable.hedges == 0
+
+    def test_hedge_threshold_from_latency_percentile(self):
+        runnable = ResilientRunnable([RunnableLambda(lambda _: "ok")], ResiliencePolicy(hedge_percentile=0.9, hedge_min_samples=10))
+        assert runnable._hedge_delay() is None
+        for latency in range(1, 11):
+            runnable.latency.record(latency / 10)
+        assert runnable._hedge_delay() == 0.9
+
+    def test_async_hedging_and_fallback(self):
+        async def slow_then_fail(_):
+            await asyncio.sleep(0.05)
+            raise TransientError("caído")
+
+        async def fallback(_):
+            return "respaldo"
+
+        runnable = ResilientRunnable(
+            [RunnableLambda(lambda _: None, afunc=slow_then_fail), RunnableLambda(lambda _: None, afunc=fallback)],
+            ResiliencePolicy(max_retries=1, hedge_after=0.01),
+            sleep=lambda s: None,
+        )
+        assert asyncio.run(runnable.ainvoke("x")) == "respaldo"
+        assert runnable.hedges >= 1
+
+    @patch("src.llm.factory.ChatGoogleGenerativeAI")
+    @patch("src.llm.factory.ChatOpenAI")
+    def test_get_resilient_llm_uses_other_provider_as_fallback(self, mock_openai, mock_gemini):
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "sk-fake", "GOOGLE_API_KEY": "g-fake"}):
+            llm = get_resilient_llm("openai")
+        assert llm.targets == [mock_openai.return_value, mock_gemini.return_value]
+        # Los reintentos son solo los de la política, no los del SDK
+        assert mock_openai.call_args.kwargs["max_retries"] == 0
+        assert mock_gemini.call_args.kwargs["max_retries"] == 0
+
+        structured = llm.with_structured_output(EvaluationVerdicts)
+        assert isinstance(structured, ResilientRunnable)
+        mock_openai.return_value.with_structured_output.assert_called_once_with(EvaluationVerdicts)
+        mock_gemini.return_value.with_structured_output.assert_called_once_with(EvaluationVerdicts)
+
+    @patch("src.llm.factory.ChatOpenAI")
+    def test_get_resilient_llm_without_fallback_key(self, mock_openai):
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "sk-fake"}, clear=True):
+            assert len(get_resilient_llm("openai").targets) == 1
+            assert len(get_resilient_llm("openai", policy=ResiliencePolicy(fallback=False)).targets) == 1
+
+    def test_get_resilient_llm_unknown_provider(self):
+        with pytest.raises(ValueError):
+            get_resilient_llm("modelo_inventado")
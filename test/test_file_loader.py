@@ -0,0 +1,78 @@
+import codecs
+
+import pytest
+
+from src.utils import file_loader
+from src.utils.file_loader import decode_bytes, iter_corpus, read_data_file
+
+
+@pytest.fixture
+def corpus(tmp_path):
+	(tmp_path / "a.txt").write_bytes("Diseño Django\r\nSevilla".encode("utf-8"))
+	(tmp_path / "b.txt").write_bytes("Diseño Django\nSevilla".encode("cp1252"))
+	(tmp_path / "c.txt").write_bytes(codecs.BOM_UTF16_LE + "Ingeniería".encode("utf-16-le"))
+	(tmp_path / "notas.md").write_text("ignorar", encoding="utf-8")
+	sub = tmp_path / "sub"
+	sub.mkdir()
+	(sub / "d.txt").write_text("Año 2024\rMadrid", encoding="utf-8")
+	return tmp_path
+
+
+class TestReadDataFile:
+
+	def test_accepts_str_and_path(self, tmp_path):
+		path = tmp_path / "cv.txt"
+		path.write_text("hola", encoding="utf-8")
+		assert read_data_file(str(path)) == "hola"
+		assert read_data_file(path) == "hola"
+
+	def test_missing_file(self, tmp_path):
+		with pytest.raises(FileNotFoundError):
+			read_data_file(tmp_path / "no_existe.txt")
+
+
+class TestDecodeBytes:
+
+	@pytest.mark.parametrize("raw, encoding", [
+		("Diseño\r\nAPI".encode("utf-8"), "utf-8"),
+		(codecs.BOM_UTF8 + "Diseño\r\nAPI".encode("utf-8"), "utf-8-sig"),
+		("Diseño\r\nAPI".encode("cp1252"), "cp1252"),
+		(codecs.BOM_UTF16_BE + "Diseño\r\nAPI".encode("utf-16-be"), "utf-16"),
+	])
+	def test_detects_encoding_and_normalizes_newlines(self, raw, encoding):
+		assert decode_bytes(raw) == ("Diseño\nAPI", encoding)
+
+
+class TestIterCorpus:
+
+	def test_yields_unique_records_in_order(self, corpus):
+		records = list(iter_corpus([corpus], max_workers=2))
+		assert [r.path.name for r in records] == ["a.txt", "c.txt", "d.txt"]
+		assert records[0].text == "Diseño Django\nSevilla"
+		assert records[1].text == "Ingeniería"
+		assert records[2].text == "Año 2024\nMadrid"
+
+	def test_without_dedupe_and_recursion(self, corpus):
+		records = list(iter_corpus([corpus], recursive=False, dedupe=False))
+		assert [r.path.name for r in records] == ["a.txt", "b.txt", "c.txt"]
+		assert records[0].sha256 == records[1].sha256
+		assert records[1].encoding == "cp1252"
+
+	def test_exclude(self, corpus):
+		records = iter_corpus([corpus], exclude=[corpus / "a.txt"], dedupe=False)
+		assert "a.txt" not in [r.path.name for r in records]
+
+	def test_is_lazy(self, corpus, monkeypatch):
+		loaded = []
+		original = file_loader._load
+		monkeypatch.setattr(file_loader, "_load", lambda path: loaded.append(path) or original(path))
+
+		for i in range(50):
+			(corpus / f"cv_{i:03d}.txt").write_text(f"CV {i}", encoding="utf-8")
+		records = iter_corpus([corpus], max_workers=2)
+		first = next(records)
+		records.close()
+
+		assert first.path.name == "a.txt"
+		# Solo se han leído los ficheros de la ventana en vuelo, no los 54
+		assert len(loaded) <= 8
@@ -1,9 +1,22 @@
+import asyncio
+import json
+import re
+import time
+
 import pytest
-from unittest.mock import MagicMock, patch
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage
+from unittest.mock import AsyncMock, MagicMock, patch
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, AIMessageChunk, ToolMessage
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.output_parsers import PydanticOutputParser
+from langgraph.constants import TAG_NOSTREAM
 
+from benchmarks.fake_llm import FakeChatModel
 # Importación correcta basada en tu estructura de carpetas
-from src.core.interviewer import Interviewer, AgentState
+from src.core.context import ContextWindowConfig
+from src.core.interviewer import END_TOKEN, Interviewer, EndTokenFilter, InterviewTemplates
+from src.core.scoring import score_verdicts
+from src.models.schemas import EvaluationVerdicts, InterviewTurn, RequirementVerdict, SkillValidation
 
 class TestInterviewer:
 
@@ -86,6 +99,40 @@ class TestInterviewer:
         args = mock_instance.analyze.call_args[0]
         assert "=== TRANSCRIPCIÓN ENTREVISTA ===" in args[1]
 
+    @patch('src.core.interviewer.CVAnalyzer')
+    def test_incremental_reevaluate_only_not_found(self, mock_analyzer_cls, interviewer):
+        initial = score_verdicts(EvaluationVerdicts(verdicts=[
+            RequirementVerdict(requirement="Python", mandatory=True, verdict="CUMPLE"),
+            RequirementVerdict(requirement="Docker", mandatory=False, verdict="NO_MENCIONA"),
+        ]))
+        mock_state = MagicMock()
+        mock_state.values = {"messages": [AIMessage(content="Test")], "ledger": {"Docker": "Lo usa a diario"}}
+        interviewer.graph.get_state = MagicMock(return_value=mock_state)
+        mock_analyzer_cls.return_value.analyze.return_value = score_verdicts(EvaluationVerdicts(verdicts=[
+            RequirementVerdict(requirement="Docker", mandatory=False, verdict="CUMPLE"),
+        ]))
+
+        final = interviewer.reevaluate("Oferta", "CV muy largo", "t_inc", initial_result=initial)
+
+        args, kwargs = mock_analyzer_cls.return_value.analyze.call_args
+        assert "CV muy largo" not in args[1]
+        assert "- Docker: Lo usa a diario" in args[1]
+        assert [r.name for r in kwargs["requirements"].requirements] == ["Docker"]
+        assert final.score == 100
+        assert final.not_found_requirements == []
+
+    @patch('src.core.interviewer.CVAnalyzer')
+    def test_incremental_reevaluate_without_pending_skips_llm(self, mock_analyzer_cls, interviewer):
+        initial = score_verdicts(EvaluationVerdicts(verdicts=[
+            RequirementVerdict(requirement="Python", mandatory=True, verdict="CUMPLE"),
+        ]))
+        mock_state = MagicMock()
+        mock_state.values = {"messages": []}
+        interviewer.graph.get_state = MagicMock(return_value=mock_state)
+
+        assert interviewer.reevaluate("Oferta", "CV", "t_none", initial_result=initial) is initial
+        mock_analyzer_cls.return_value.analyze.assert_not_called()
+
     def test_logic_skill_removal_mocking_llm(self, interviewer):
         """
         Verifica la lógica de eliminación de skills simulando la respuesta del LLM.
@@ -121,4 +168,377 @@ class TestInterviewer:
         
         # Python debe haber sido eliminado de la lista
         assert "Python" not in final_state["skills_pending"]
-        assert "Java" in final_state["skills_pending"]
\ No newline at end of file
+        assert "Java" in final_state["skills_pending"]
+
+class FakeAsyncLLM:
+    """
+    LLM falso con latencia simulada. Cuenta cuántas llamadas hay en vuelo
+    a la vez para comprobar que las sesiones se solapan.
+    """
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def bind_tools(self, tools):
+        return self
+
+    async def ainvoke(self, messages):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        return AIMessage(content="Hola, ¿cómo te llamas?")
+
+
+class TestInterviewerAsync:
+
+    @pytest.fixture
+    def fake_llm(self):
+        return FakeAsyncLLM(latency=0.2)
+
+    @pytest.fixture
+    def interviewer(self, fake_llm):
+        with patch('src.core.interviewer.get_llm', return_value=fake_llm):
+            return Interviewer(provider="openai")
+
+    def test_concurrent_sessions_overlap(self, interviewer, fake_llm):
+        """50 entrevistas concurrentes en un solo event loop no se serializan."""
+        sessions = 50
+
+        async def run_session(i):
+            thread_id = f"async_thread_{i}"
+            await interviewer.ainitialize_interview(["Python"], thread_id)
+            return await interviewer.aprocess_message("Me llamo Ana", thread_id)
+
+        async def run_all():
+            return await asyncio.gather(*(run_session(i) for i in range(sessions)))
+
+        start = time.monotonic()
+        responses = asyncio.run(run_all())
+        elapsed = time.monotonic() - start
+
+        assert len(responses) == sessions
+        assert all(isinstance(r, AIMessage) for r in responses)
+        # En serie serían 50 * 2 * 0.2s = 20s
+        assert elapsed < 5
+        assert fake_llm.max_in_flight > sessions // 2
+
+    def test_async_state_is_isolated_per_thread(self, interviewer):
+        async def run():
+            await interviewer.ainitialize_interview(["Python"], "t_a")
+            await interviewer.ainitialize_interview(["Docker"], "t_b")
+            await interviewer.aprocess_message("Respuesta A", "t_a")
+            return await interviewer.aget_transcript("t_a"), await interviewer.aget_transcript("t_b")
+
+        transcript_a, transcript_b = asyncio.run(run())
+        assert "Respuesta A" in transcript_a
+        assert "Respuesta A" not in transcript_b
+
+    @patch('src.core.interviewer.CVAnalyzer')
+    def test_areevaluate_uses_async_analyzer(self, mock_analyzer_cls, interviewer):
+        mock_instance = MagicMock()
+        mock_instance.aanalyze = AsyncMock(return_value="resultado")
+        mock_analyzer_cls.return_value = mock_instance
+
+        async def run():
+            await interviewer.ainitialize_interview(["Python"], "t_eval")
+            return await interviewer.areevaluate("Oferta", "CV", "t_eval")
+
+        assert asyncio.run(run()) == "resultado"
+        args = mock_instance.aanalyze.call_args[0]
+        assert "=== TRANSCRIPCIÓN ENTREVISTA ===" in args[1]
+
+
+class StreamingFakeLLM(GenericFakeChatModel):
+    """Modelo falso de LangChain que emite la respuesta por fragmentos."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class ToolStreamingFakeLLM(StreamingFakeLLM):
+    """Como StreamingFakeLLM, pero emite también las tool calls (en un último fragmento)."""
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._generate(messages, stop=stop, run_manager=run_manager, **kwargs).generations[0].message
+        for token in re.split(r"(\s)", message.content):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ]))
+
+
+class TestEndTokenFilter:
+
+    @pytest.mark.parametrize("chunks", [
+        ["Gracias por tu tiempo. [FIN_ENTREVISTA]"],
+        ["Gracias por tu tiempo. [FIN_", "ENTREVISTA]"],
+        ["Gracias por tu tiempo. [", "FIN", "_ENTRE", "VISTA", "]"],
+        list("Gracias por tu tiempo. [FIN_ENTREVISTA]"),
+    ])
+    def test_token_is_removed_across_chunk_boundaries(self, chunks):
+        token_filter = EndTokenFilter()
+        text = "".join(token_filter.feed(c) for c in chunks) + token_filter.flush()
+        assert text == "Gracias por tu tiempo. "
+        assert token_filter.finished
+
+    def test_partial_prefix_that_does_not_complete_is_emitted(self):
+        token_filter = EndTokenFilter()
+        text = "".join(token_filter.feed(c) for c in ["Lista [FIN", "AL] de pasos"]) + token_filter.flush()
+        assert text == "Lista [FINAL] de pasos"
+        assert not token_filter.finished
+
+    def test_incomplete_token_at_end_is_flushed(self):
+        token_filter = EndTokenFilter()
+        text = token_filter.feed("Hasta luego [FIN_") + token_filter.flush()
+        assert text == "Hasta luego [FIN_"
+        assert not token_filter.finished
+
+
+class TestInterviewerStreaming:
+
+    def _make(self, replies):
+        llm = StreamingFakeLLM(messages=iter(replies))
+        with patch('src.core.interviewer.get_llm', return_value=llm):
+            interviewer = Interviewer(provider="openai")
+        config = {"configurable": {"thread_id": "stream"}}
+        interviewer.graph.update_state(config, {
+            "messages": [SystemMessage(content="Sistema")],
+            "skills_pending": ["Python"],
+        })
+        return interviewer
+
+    def test_stream_yields_chunks_and_records_ttft(self):
+        interviewer = self._make([AIMessage(content="Cuéntame un proyecto con Python")])
+        chunks = list(interviewer.stream_message("Hola", "stream"))
+
+        assert len(chunks) > 1
+        assert "".join(chunks) == "Cuéntame un proyecto con Python"
+        assert interviewer.last_ttft is not None
+        assert interviewer.last_stream_finished is False
+        assert interviewer.last_response.content == "Cuéntame un proyecto con Python"
+
+    def test_stream_detects_end_of_interview(self):
+        interviewer = self._make([AIMessage(content="Muchas gracias, hemos terminado [FIN_ENTREVISTA]")])
+        text = "".join(interviewer.stream_message("Adiós", "stream"))
+
+        assert "[FIN" not in text
+        assert text.strip() == "Muchas gracias, hemos terminado"
+        assert interviewer.last_stream_finished is True
+
+    def test_text_from_tool_call_turns_is_saved(self):
+        """El texto mostrado antes de registrar_validacion forma parte de last_response."""
+        tool_call = {"name": "registrar_validacion", "args": {"skill": "Python", "conclusion": "Ok"}, "id": "call_1"}
+        llm = ToolStreamingFakeLLM(messages=iter([
+            AIMessage(content="Perfecto, lo apunto.", tool_calls=[tool_call]),
+            AIMessage(content="¿Y tu experiencia con Docker?"),
+        ]))
+        with patch('src.core.interviewer.get_llm', return_value=llm):
+            interviewer = Interviewer(provider="openai")
+        interviewer.graph.update_state({"configurable": {"thread_id": "stream"}}, {
+            "messages": [SystemMessage(content="Sistema")],
+            "skills_pending": ["Python", "Docker"],
+        })
+
+        text = "".join(interviewer.stream_message("Uso Python a diario", "stream"))
+
+        assert "Perfecto, lo apunto." in text and "Docker" in text
+        assert interviewer.last_response.content == text.strip()
+
+    def test_async_stream(self):
+        interviewer = self._make([AIMessage(content="Hola de nuevo")])
+
+        async def collect():
+            return [c async for c in interviewer.astream_message("Hola", "stream")]
+
+        assert "".join(asyncio.run(collect())) == "Hola de nuevo"
+
+
+class TestInterviewTemplates:
+
+    @staticmethod
+    def _make(replies, templates=None):
+        llm = StreamingFakeLLM(messages=iter(replies))
+        with patch('src.core.interviewer.get_llm', return_value=llm):
+            return Interviewer(provider="openai", templates=templates)
+
+    def test_greeting_is_injected_without_llm(self):
+        interviewer = self._make([])
+        interviewer.llm_with_tools = MagicMock()
+
+        greeting = interviewer.initialize_interview(["Python"], "t_greet")
+
+        interviewer.llm_with_tools.invoke.assert_not_called()
+        assert "Alex" in greeting.content and "¿cómo te llamas?" in greeting.content
+        state = interviewer.graph.get_state({"configurable": {"thread_id": "t_greet"}}).values
+        assert state["messages"][-1] == greeting
+        assert state["skills_pending"] == ["Python"]
+
+    def test_farewell_closes_without_llm_after_last_validation(self):
+        tool_call = {"name": "registrar_validacion", "args": {"skill": "Python", "conclusion": "Ok"}, "id": "call_1"}
+        interviewer = self._make([])
+        # Una sola respuesta del LLM: la llamada a la herramienta
+        interviewer.llm_with_tools = MagicMock()
+        interviewer.llm_with_tools.invoke.side_effect = [AIMessage(content="", tool_calls=[tool_call])]
+        interviewer.initialize_interview(["Python"], "t_bye")
+
+        text = "".join(interviewer.stream_message("Uso Python a diario", "t_bye"))
+
+        assert text.strip() == InterviewTemplates().farewell
+        assert interviewer.last_stream_finished is True
+        assert interviewer.last_response.content.endswith(END_TOKEN)
+        assert interviewer.llm_with_tools.invoke.call_count == 1
+
+    def test_async_greeting(self):
+        interviewer = self._make([], templates=InterviewTemplates.for_language("en", name="Sam"))
+        greeting = asyncio.run(interviewer.ainitialize_interview(["Python"], "t_en"))
+        assert greeting.content.startswith("Hi! I'm Sam")
+        # El prompt de sistema usa el mismo nombre e idioma que las plantillas
+        system = interviewer.graph.get_state({"configurable": {"thread_id": "t_en"}}).values["messages"][0].content
+        assert "Eres Sam" in system and "Alex" not in system
+        assert "en inglés" in system
+
+    def test_templates_configuration(self, monkeypatch):
+        with pytest.raises(ValueError):
+            InterviewTemplates.for_language("fr")
+        assert InterviewTemplates.for_language("EN").farewell_message().content.endswith(END_TOKEN)
+
+        monkeypatch.setenv("VELORA_INTERVIEW_TEMPLATES", "0")
+        assert InterviewTemplates.from_env() == InterviewTemplates(greeting=None, farewell=None)
+        monkeypatch.setenv("VELORA_INTERVIEW_TEMPLATES", "1")
+        monkeypatch.setenv("VELORA_INTERVIEW_LANGUAGE", "en")
+        assert InterviewTemplates.from_env() == InterviewTemplates.for_language("en")
+        monkeypatch.setenv("VELORA_INTERVIEW_TEMPLATES", "0")
+        assert InterviewTemplates.from_env().language == "en"
+
+    def test_llm_turns_when_templates_are_disabled(self):
+        interviewer = self._make([AIMessage(content="Hola, soy el LLM")], templates=InterviewTemplates(greeting=None, farewell=None))
+        assert interviewer.initialize_interview(["Python"], "t_llm").content == "Hola, soy el LLM"
+
+
+class TestFusedMode:
+
+    @staticmethod
+    def _make(llm=None, templates=None):
+        with patch('src.core.interviewer.get_llm', return_value=llm or FakeChatModel()):
+            return Interviewer(provider="openai", templates=templates, mode="fused")
+
+    def test_one_llm_call_per_candidate_turn(self):
+        llm = FakeChatModel()
+        interviewer = self._make(llm)
+        interviewer.initialize_interview(["Python", "Docker"], "t_fused")
+
+        replies = [interviewer.process_message(answer, "t_fused").content
+                   for answer in ["Me llamo Ana", "Uso Python a diario", "Docker en producción"]]
+
+        # Sin la vuelta extra agente -> tools -> agente: una llamada por mensaje del candidato
+        assert llm.calls == 3
+        assert replies[0] == "Gracias. ¿Y tu experiencia con Python?"
+        assert replies[-1].endswith(END_TOKEN)
+        assert set(interviewer.get_ledger("t_fused")) == {"Python", "Docker"}
+        state = interviewer.graph.get_state({"configurable": {"thread_id": "t_fused"}}).values
+        assert state["skills_pending"] == []
+        assert not any(isinstance(m, ToolMessage) or getattr(m, "tool_calls", None) for m in state["messages"])
+        assert "registrar_validacion" not in state["messages"][0].content
+
+    def test_batched_validations_and_llm_farewell(self):
+        interviewer = self._make(templates=InterviewTemplates(greeting=None, farewell=None))
+        interviewer.llm_turn = MagicMock()
+        interviewer.llm_turn.invoke.side_effect = [
+            InterviewTurn(reply="Hola, ¿cómo te llamas?"),
+            InterviewTurn(
+                validations=[
+                    SkillValidation(skill="python 3", conclusion="Backend con Django"),
+                    SkillValidation(skill="Docker", conclusion="Despliegues con Compose"),
+                ],
+                reply=f"Gracias por tu tiempo. {END_TOKEN}",
+            ),
+        ]
+        interviewer.memory.mark_finished = MagicMock()
+
+        assert interviewer.initialize_interview(["Python", "Docker"], "t_batch").content == "Hola, ¿cómo te llamas?"
+        response = interviewer.process_message("Soy Ana: Python y Docker en mi último puesto", "t_batch")
+
+        assert response.content.endswith(END_TOKEN)
+        interviewer.memory.mark_finished.assert_called_once_with("t_batch")
+        assert interviewer.get_ledger("t_batch") == {"Python": "Backend con Django", "Docker": "Despliegues con Compose"}
+        # El modelo recibe los requisitos pendientes al final del contexto
+        last_input = interviewer.llm_turn.invoke.call_args.args[0]
+        assert last_input[-1].content == "SISTEMA: Requisitos pendientes: [Python, Docker]"
+        # Fuera del rol de sistema: el único SystemMessage es el prompt fijo
+        assert isinstance(last_input[-1], HumanMessage)
+        assert [m for m in last_input if isinstance(m, SystemMessage)] == last_input[:1]
+
+    def test_ending_is_decided_after_applying_validations(self):
+        llm = MagicMock()
+        llm.invoke.return_value = AIMessage(content=f"Gracias, hemos terminado. {END_TOKEN}")
+        interviewer = self._make(llm, templates=InterviewTemplates(greeting=None, farewell=None))
+        interviewer.llm_turn = MagicMock()
+        interviewer.llm_turn.invoke.side_effect = [
+            InterviewTurn(reply="Hola, ¿cómo te llamas?"),
+            # La respuesta se generó con Python aún pendiente: no es la despedida
+            InterviewTurn(validations=[SkillValidation(skill="Python", conclusion="Django")], reply="¿Algo más?"),
+        ]
+
+        interviewer.initialize_interview(["Python"], "t_end")
+        response = interviewer.process_message("Soy Ana, uso Python con Django", "t_end")
+
+        assert response.content.endswith(END_TOKEN)
+        assert llm.invoke.call_count == 1
+        messages = interviewer.graph.get_state({"configurable": {"thread_id": "t_end"}}).values["messages"]
+        assert "¿Algo más?" not in [m.content for m in messages]
+
+    def test_collapsed_turns_are_summarized_from_ledger(self):
+        interviewer = self._make(templates=InterviewTemplates(greeting=None, farewell=None))
+        interviewer.context_config = ContextWindowConfig(max_tokens=1)
+        interviewer.llm_turn = MagicMock()
+        interviewer.llm_turn.invoke.side_effect = [
+            InterviewTurn(reply="Hola, ¿cómo te llamas?"),
+            InterviewTurn(validations=[SkillValidation(skill="Python", conclusion="Django")], reply="¿Y Docker?"),
+            InterviewTurn(reply="¿Con qué orquestador?"),
+            InterviewTurn(reply="¿Algo más sobre Docker?"),
+        ]
+
+        interviewer.initialize_interview(["Python", "Docker"], "t_sum")
+        for answer in ["Ana, Python con Django", "Docker en local", "Ninguno"]:
+            interviewer.process_message(answer, "t_sum")
+
+        sent = interviewer.llm_turn.invoke.call_args.args[0]
+        assert "Python: Django" in sent[1].content
+        assert "Ana, Python con Django" not in [m.content for m in sent]
+
+    def test_structured_output_is_not_streamed(self):
+        interviewer = self._make()
+        interviewer.initialize_interview(["Python"], "t_json")
+        model = GenericFakeChatModel(messages=iter([AIMessage(content='{"validations": [], "reply": "Hola Ana"}')]))
+        interviewer.llm_turn = (model | PydanticOutputParser(pydantic_object=InterviewTurn)).with_config(tags=[TAG_NOSTREAM])
+
+        assert list(interviewer.stream_message("Me llamo Ana", "t_json")) == ["Hola Ana"]
+        assert interviewer.last_response.content == "Hola Ana"
+
+    def test_async_turns(self):
+        interviewer = self._make()
+
+        async def run():
+            await interviewer.ainitialize_interview(["Python"], "t_async")
+            await interviewer.aprocess_message("Me llamo Ana", "t_async")
+            return "".join([c async for c in interviewer.astream_message("Python a diario", "t_async")])
+
+        assert asyncio.run(run()).strip() == InterviewTemplates().farewell
+        assert interviewer.last_stream_finished is True
+
+    def test_mode_configuration(self, monkeypatch):
+        with pytest.raises(ValueError):
+            with patch('src.core.interviewer.get_llm', return_value=FakeChatModel()):
+                Interviewer(provider="openai", mode="batch")
+        monkeypatch.setenv("VELORA_INTERVIEW_MODE", "fused")
+        with patch('src.core.interviewer.get_llm', return_value=FakeChatModel()):
+            assert Interviewer(provider="openai").mode == "fused"
+
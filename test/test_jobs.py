@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from src.ui.jobs import JOB_DONE, JOB_FAILED, JOB_PENDING, JOB_RUNNING, JobRunner, pop_finished_job, running_job, start_job
+
+
+@pytest.fixture
+def runner():
+    runner = JobRunner(max_workers=2)
+    yield runner
+    runner.shutdown()
+
+
+class TestJobRunner:
+
+    def test_job_runs_in_background(self, runner):
+        gate = threading.Event()
+        job = runner.submit("análisis", lambda: gate.wait(5) and 42)
+
+        # El envío no espera al trabajo
+        assert not job.done
+        assert job.status in (JOB_PENDING, JOB_RUNNING)
+        assert runner.active == 1
+        with pytest.raises(RuntimeError):
+            job.result()
+
+        gate.set()
+        job.future.result(timeout=5)
+        assert job.status == JOB_DONE
+        assert job.result() == 42
+        assert job.error is None
+        # El contador se actualiza en el callback de fin del futuro
+        deadline = time.monotonic() + 5
+        while runner.active and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert runner.active == 0
+
+    def test_failed_job_keeps_the_error(self, runner):
+        def boom():
+            raise ValueError("oferta vacía")
+
+        job = runner.submit("análisis", boom)
+        job.future.exception(timeout=5)
+
+        assert job.status == JOB_FAILED
+        assert isinstance(job.error, ValueError)
+        with pytest.raises(ValueError):
+            job.result()
+
+
+class TestSessionJobs:
+
+    def test_start_job_does_not_duplicate_running_jobs(self, runner):
+        state = {}
+        gate = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            gate.wait(5)
+            return "ok"
+
+        first = start_job(state, "analysis_job", runner, "análisis", work)
+        second = start_job(state, "analysis_job", runner, "análisis", work)
+
+        assert first is second
+        assert running_job(state, "analysis_job") is first
+        # Mientras sigue en curso no se saca de la sesión
+        assert pop_finished_job(state, "analysis_job") is None
+
+        gate.set()
+        first.future.result(timeout=5)
+        assert running_job(state, "analysis_job") is None
+        assert pop_finished_job(state, "analysis_job") is first
+        assert "analysis_job" not in state
+        assert pop_finished_job(state, "analysis_job") is None
+        assert len(calls) == 1
+
+    def test_start_job_passes_arguments(self, runner):
+        state = {}
+        job = start_job(state, "reevaluate_job", runner, "reevaluación", lambda a, b=0: a + b, 1, b=2)
+        job.future.result(timeout=5)
+        assert pop_finished_job(state, "reevaluate_job").result() == 3
@@ -0,0 +1,96 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.core.interviewer import Interviewer
+from src.core.ledger import RequirementIndex, canonical_key, format_ledger
+
+
+class TestRequirementIndex:
+
+    def test_canonical_key_strips_accents_and_punctuation(self):
+        assert canonical_key("  Diseño de APIs, REST!  ") == "diseno de apis rest"
+        assert canonical_key("C++ / C#") == "c++ c#"
+        assert canonical_key("Node.js") == "node.js"
+
+    def test_short_names_do_not_match_inside_other_words(self):
+        index = RequirementIndex(["Django", "Go"])
+        assert index.match("Go") == "Go"
+        assert index.match("Django") == "Django"
+
+        index = RequirementIndex(["Django"])
+        assert index.match("Go") is None
+
+    def test_matches_by_whole_tokens(self):
+        index = RequirementIndex(["Experiencia mínima de 3 años en Python", "Docker y Kubernetes"])
+        assert index.match("python") == "Experiencia mínima de 3 años en Python"
+        assert index.match("Kubernetes") == "Docker y Kubernetes"
+
+    def test_prefers_the_closest_requirement(self):
+        index = RequirementIndex(["AWS", "AWS Lambda"])
+        assert index.match("AWS Lambda") == "AWS Lambda"
+        assert index.match("aws") == "AWS"
+
+    def test_fuzzy_match_respects_threshold(self):
+        index = RequirementIndex(["PostgreSQL"], threshold=0.85)
+        assert index.match("Postgre SQL") == "PostgreSQL"
+        assert RequirementIndex(["PostgreSQL"], threshold=0.99).match("Postgres") is None
+
+    def test_state_roundtrip(self):
+        index = RequirementIndex(["Python", "Inglés avanzado"])
+        restored = RequirementIndex.from_state(index.to_state())
+        assert restored.match("ingles") == "Inglés avanzado"
+        assert restored.threshold == index.threshold
+
+    def test_format_ledger(self):
+        assert format_ledger({"Python": "Sólido"}) == "- Python: Sólido"
+
+
+class TestInterviewerLedger:
+
+    @pytest.fixture
+    def interviewer(self):
+        mock_base = MagicMock()
+        mock_base.bind_tools.return_value = MagicMock()
+        with patch('src.core.interviewer.get_llm', return_value=mock_base):
+            return Interviewer(provider="openai")
+
+    def _run_validation(self, interviewer, skill, pending, conclusion="Ok"):
+        tool_call = {"name": "registrar_validacion", "args": {"skill": skill, "conclusion": conclusion}, "id": "call_1"}
+        interviewer.llm_with_tools.invoke.side_effect = [
+            AIMessage(content="", tool_calls=[tool_call]),
+            AIMessage(content="Siguiente"),
+        ]
+        config = {"configurable": {"thread_id": f"ledger_{skill}"}}
+        state = interviewer._initial_state(pending)
+        state["messages"].append(HumanMessage(content="Respuesta"))
+        interviewer.graph.update_state(config, state)
+        interviewer.graph.invoke(None, config=config)
+        return interviewer.graph.get_state(config).values
+
+    def test_go_does_not_remove_django(self, interviewer):
+        values = self._run_validation(interviewer, "Go", ["Django", "Docker"])
+        assert values["skills_pending"] == ["Django", "Docker"]
+        assert values["ledger"] == {"Go": "Ok"}
+
+    def test_conclusion_is_recorded_under_requirement(self, interviewer):
+        values = self._run_validation(interviewer, "python", ["Experiencia en Python", "Docker"], "3 años con Django")
+        assert values["skills_pending"] == ["Docker"]
+        assert values["ledger"] == {"Experiencia en Python": "3 años con Django"}
+
+    @patch('src.core.interviewer.CVAnalyzer')
+    def test_reevaluate_uses_ledger(self, mock_analyzer_cls, interviewer):
+        mock_state = MagicMock()
+        mock_state.values = {
+            "messages": [SystemMessage(content="S"), AIMessage(content="Pregunta larga")],
+            "ledger": {"Python": "Dominio avanzado"},
+        }
+        interviewer.graph.get_state = MagicMock(return_value=mock_state)
+
+        interviewer.reevaluate("Oferta", "CV", "t")
+
+        augmented_cv = mock_analyzer_cls.return_value.analyze.call_args[0][1]
+        assert "=== VALIDACIONES ENTREVISTA ===" in augmented_cv
+        assert "- Python: Dominio avanzado" in augmented_cv
+        assert "Pregunta larga" not in augmented_cv
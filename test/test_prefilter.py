@@ -0,0 +1,124 @@
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from benchmarks.bench_prefilter import parse_offer_locally
+from src.core.evaluator import CVAnalyzer
+from src.core.prefilter import RequirementPrefilter, normalize_terms, submission_order
+from src.models.schemas import EvaluationResult, OfferRequirement, OfferRequirements
+from src.utils.file_loader import read_data_file
+
+
+# Requisitos obligatorios que cada CV de data/ realmente no menciona (etiquetado a mano)
+_APIS = "Experiencia con APIs y despliegue en la nube"
+_NLP = "Experiencia en NLP o procesamiento de lenguaje natural"
+MISSING_EVIDENCE = {
+    ("oferta4.txt", "cv_candidato1.txt", _APIS),
+    ("oferta4.txt", "cv_candidato3.txt", _APIS),
+    ("oferta5.txt", "cv_candidato2.txt", _NLP),
+    ("oferta5.txt", "cv_candidato3.txt", _NLP),
+    ("oferta5.txt", "cv_candidato4.txt", _NLP),
+}
+
+
+def _requirements(*items):
+    return OfferRequirements(requirements=[OfferRequirement(name=n, mandatory=m) for n, m in items])
+
+
+class TestNormalizeTerms:
+
+    def test_aliases_and_phrases(self):
+        assert normalize_terms("Experiencia con Node.js y K8s") == {"nodejs", "kubernetes"}
+        assert "ml" in normalize_terms("Modelos de Machine Learning")
+        assert "nlp" in normalize_terms("Procesamiento de lenguaje natural")
+
+    def test_generic_words_and_numbers_are_ignored(self):
+        assert normalize_terms("Experiencia mínima de 3 años en Python") == {"python"}
+
+
+class TestRequirementPrefilter:
+
+    def test_flags_only_missing_mandatory(self):
+        prefilter = RequirementPrefilter(_requirements(("Python", True), ("Docker", False)))
+        decisions = prefilter.screen(["Desarrollo en python3", "Java y Docker"])
+
+        assert not decisions[0].flagged
+        assert decisions[1].missing_mandatory == ["Python"]
+
+    def test_any_term_counts_as_evidence(self):
+        prefilter = RequirementPrefilter(_requirements(("Desarrollo web con Python o Node.js", True)))
+        decisions = prefilter.screen(["Backend con JS en Node", "Solo C++"])
+        assert [d.flagged for d in decisions] == [False, True]
+
+    def test_submission_order_by_policy(self):
+        decisions = RequirementPrefilter(_requirements(("Python", True))).screen(["Java", "Python", "Go"])
+        assert submission_order(decisions, "skip") == [1]
+        assert submission_order(decisions, "deprioritize") == [1, 0, 2]
+        assert submission_order(decisions, "send") == [0, 1, 2]
+        with pytest.raises(ValueError):
+            submission_order(decisions, "otra")
+
+    def test_typos_match_by_similarity(self):
+        prefilter = RequirementPrefilter(_requirements(("Experiencia en Pyhton", True), ("Kubernetes", True)))
+        decisions = prefilter.screen(["Backend en Python y Kubernete", "Solo Java"])
+        assert [d.flagged for d in decisions] == [False, True]
+
+    def test_recall_on_sample_data(self):
+        """
+        Recall sin LLM sobre data/: ningún CV con evidencia de un requisito
+        obligatorio (etiquetado a mano en MISSING_EVIDENCE) se marca.
+        """
+        cvs = {path.name: read_data_file(path) for path in sorted(Path("data").glob("cv_*.txt"))}
+        flagged = set()
+        for offer in sorted(Path("data").glob("oferta*.txt")):
+            requirements = parse_offer_locally(read_data_file(offer))
+            for name, decision in zip(cvs, RequirementPrefilter(requirements).screen(list(cvs.values()))):
+                flagged.update((offer.name, name, req) for req in decision.missing_mandatory)
+
+        assert flagged, "el pre-filtro no marca nada: la prueba no comprobaría el recall"
+        assert flagged <= MISSING_EVIDENCE
+
+
+class TestAnalyzeManyPrefilter:
+
+    @pytest.fixture
+    def analyzer(self):
+        with patch('src.core.evaluator.get_llm'):
+            analyzer = CVAnalyzer(provider="openai")
+        analyzer.parse_offer = MagicMock(return_value=_requirements(("Python", True)))
+        analyzer.analyze = MagicMock(return_value=EvaluationResult(score=80, discarded=False, matching_requirements=["Python"]))
+        return analyzer
+
+    def test_skip_does_not_call_llm_for_flagged(self, analyzer):
+        results = analyzer.analyze_many("Oferta", ["Python", "Java"], prefilter="skip")
+
+        assert analyzer.analyze.call_count == 1
+        assert results[0].result.score == 80 and not results[0].prefiltered
+        # Sin evaluar: ni puntuación ni descarte inventados
+        assert results[1].prefiltered and results[1].skipped
+        assert results[1].result is None and results[1].error is None
+        assert results[1].missing_mandatory == ["Python"]
+
+    def test_send_keeps_the_flag_on_evaluated_items(self, analyzer):
+        results = analyzer.analyze_many("Oferta", ["Python", "Java"], prefilter="send")
+
+        assert analyzer.analyze.call_count == 2
+        assert not results[0].prefiltered and results[0].missing_mandatory == []
+        assert results[1].ok and results[1].prefiltered and not results[1].skipped
+        assert results[1].missing_mandatory == ["Python"]
+
+    def test_deprioritize_sends_flagged_last(self, analyzer):
+        calls = []
+        analyzer.analyze.side_effect = lambda offer, cv, requirements=None: calls.append(cv) or EvaluationResult(
+            score=50, discarded=False, matching_requirements=[]
+        )
+        results = analyzer.analyze_many("Oferta", ["Java", "Python"], max_concurrency=1, prefilter="deprioritize")
+
+        assert calls == ["Python", "Java"]
+        assert [r.index for r in results] == [0, 1]
+
+    def test_unknown_policy(self, analyzer):
+        with pytest.raises(ValueError):
+            analyzer.analyze_many("Oferta", ["Python"], prefilter="otra")
+        analyzer.parse_offer.assert_not_called()
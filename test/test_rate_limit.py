@@ -0,0 +1,171 @@
+import pytest
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from src.llm.rate_limit import (
+    AdaptiveConcurrencyController,
+    ProviderRateLimiter,
+    RateLimitUsageCallback,
+    TokenBucket,
+    is_rate_limit_error,
+)
+
+
+class FakeClock:
+    """Reloj falso: sleep() avanza el tiempo sin esperar de verdad."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class TestTokenBucket:
+
+    def test_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=clock)
+        bucket.consume(2)
+        assert bucket.wait_time(1) == pytest.approx(1.0)
+        clock.now += 1
+        assert bucket.wait_time(1) == 0
+
+
+class TestProviderRateLimiter:
+
+    def test_requests_per_minute(self):
+        """Con 60 rpm y ráfaga 1, tres peticiones necesitan 2 segundos."""
+        clock = FakeClock()
+        limiter = ProviderRateLimiter(60, request_burst=1, clock=clock, sleep=clock.sleep)
+
+        for _ in range(3):
+            assert limiter.acquire()
+
+        assert clock.now == pytest.approx(2.0)
+
+    def test_non_blocking_acquire(self):
+        clock = FakeClock()
+        limiter = ProviderRateLimiter(60, request_burst=1, clock=clock, sleep=clock.sleep)
+        assert limiter.acquire(blocking=False) is True
+        assert limiter.acquire(blocking=False) is False
+
+    def test_tokens_per_minute_with_usage_correction(self):
+        """Si una petición consume más tokens de lo estimado, la siguiente espera más."""
+        clock = FakeClock()
+        limiter = ProviderRateLimiter(
+            1000, tokens_per_minute=6000, estimated_tokens_per_request=1000,
+            clock=clock, sleep=clock.sleep,
+        )
+        limiter.acquire()
+        limiter.record_usage(6000)  # se han gastado los 6000 tokens del minuto
+
+        limiter.acquire()
+        # Hay que recuperar 1000 tokens a 100 tokens/s
+        assert clock.now == pytest.approx(10.0)
+
+    def test_integrates_with_chat_model(self):
+        """Un modelo local de LangChain usa el limitador y le reporta el uso real."""
+        clock = FakeClock()
+        limiter = ProviderRateLimiter(
+            60, tokens_per_minute=600, estimated_tokens_per_request=10,
+            request_burst=1, clock=clock, sleep=clock.sleep,
+        )
+        messages = iter([
+            AIMessage(content="uno", usage_metadata={"input_tokens": 5, "output_tokens": 5, "total_tokens": 10}),
+            AIMessage(content="dos", usage_metadata={"input_tokens": 5, "output_tokens": 5, "total_tokens": 10}),
+        ])
+        model = GenericFakeChatModel(
+            messages=messages, rate_limiter=limiter, callbacks=[RateLimitUsageCallback(limiter)]
+        )
+
+        assert model.invoke("hola").content == "uno"
+        assert model.invoke("hola").content == "dos"
+        assert clock.now == pytest.approx(1.0)
+
+
+class TestAdaptiveConcurrency:
+
+    def test_additive_increase_on_success(self):
+        controller = AdaptiveConcurrencyController(initial_limit=2, max_limit=10)
+        for _ in range(4):
+            controller.acquire()
+            controller.release(latency=0.1)
+        # +1/2 +1/2.5 +1/2.9 ... supera 3 tras unas pocas rondas
+        assert controller.limit == 3
+
+    def test_multiplicative_decrease_on_429(self):
+        controller = AdaptiveConcurrencyController(initial_limit=8)
+        controller.acquire()
+        controller.release(rate_limited=True)
+        assert controller.limit == 4
+
+    def test_decrease_on_high_latency(self):
+        controller = AdaptiveConcurrencyController(initial_limit=8, latency_target=1.0)
+        controller.acquire()
+        controller.release(latency=2.5)
+        assert controller.limit == 4
+
+    def test_track_detects_rate_limit_errors(self):
+        controller = AdaptiveConcurrencyController(initial_limit=4, min_limit=1)
+        with pytest.raises(RateLimitError):
+            with controller.track():
+                raise RateLimitError("Too many requests")
+        assert controller.limit == 2
+        assert controller.in_flight == 0
+
+    def test_other_errors_do_not_change_limit(self):
+        controller = AdaptiveConcurrencyController(initial_limit=4)
+        with pytest.raises(ValueError):
+            with controller.track():
+                raise ValueError("json inválido")
+        assert controller.limit == 4
+
+    def test_never_below_min_limit(self):
+        controller = AdaptiveConcurrencyController(initial_limit=2, min_limit=1)
+        for _ in range(5):
+            controller.acquire()
+            controller.release(rate_limited=True)
+        assert controller.limit == 1
+
+
+def test_is_rate_limit_error():
+    assert is_rate_limit_error(RateLimitError())
+    assert not is_rate_limit_error(ValueError("otro error"))
+
+
+def test_is_rate_limit_error_matches_sdk_types_and_status():
+    class ResourceExhausted(Exception):
+        pass
+
+    class ClientError(Exception):
+        def __init__(self, code, status):
+            super().__init__(f"{code} {status}")
+            self.code = code
+            self.status = status
+
+    assert is_rate_limit_error(ResourceExhausted("quota"))
+    assert is_rate_limit_error(ClientError(429, "RESOURCE_EXHAUSTED"))
+    # langchain-google-genai re-lanza el ClientError envuelto
+    try:
+        try:
+            raise ClientError(429, "RESOURCE_EXHAUSTED")
+        except ClientError as e:
+            raise RuntimeError("Error calling model") from e
+    except RuntimeError as wrapped:
+        assert is_rate_limit_error(wrapped)
+
+
+def test_is_rate_limit_error_ignores_429_in_message():
+    assert not is_rate_limit_error(Exception("request id req_4291abc failed"))
+    assert not is_rate_limit_error(ValueError("leídos 14290 bytes"))
+    assert not is_rate_limit_error(Exception("429 RESOURCE_EXHAUSTED"))
@@ -0,0 +1,131 @@
+from src.core.scoring import merge_verdicts, reconcile_verdicts, score_verdicts, rescore
+from src.models.schemas import EvaluationResult, EvaluationVerdicts, OfferRequirement, OfferRequirements, RequirementVerdict
+
+
+def _verdicts(*items):
+    return EvaluationVerdicts(verdicts=[
+        RequirementVerdict(requirement=name, mandatory=mandatory, verdict=verdict)
+        for name, mandatory, verdict in items
+    ])
+
+
+class TestScoreVerdicts:
+
+    def test_score_is_ratio_of_matched_requirements(self):
+        result = score_verdicts(_verdicts(
+            ("Python", True, "CUMPLE"),
+            ("Docker", True, "NO_MENCIONA"),
+            ("FastAPI", False, "CUMPLE"),
+            ("AWS", False, "NO_CUMPLE"),
+        ))
+        assert result.score == 50
+        assert result.discarded is False
+        assert result.matching_requirements == ["Python", "FastAPI"]
+        assert result.unmatching_requirements == ["AWS"]
+        assert result.not_found_requirements == ["Docker"]
+
+    def test_failed_mandatory_discards_with_zero_score(self):
+        result = score_verdicts(_verdicts(
+            ("Python", True, "NO_CUMPLE"),
+            ("FastAPI", False, "CUMPLE"),
+        ))
+        assert result.discarded is True
+        assert result.score == 0
+
+    def test_empty_verdicts_are_discarded(self):
+        result = score_verdicts(EvaluationVerdicts(verdicts=[]))
+        assert result.discarded is True
+        assert result.score == 0
+
+    def test_rescore_with_weights_without_llm(self):
+        result = score_verdicts(_verdicts(
+            ("Python", True, "CUMPLE"),
+            ("FastAPI", False, "NO_MENCIONA"),
+        ))
+        assert result.score == 50
+
+        reweighted = rescore(result, mandatory_weight=3.0, optional_weight=1.0)
+        assert reweighted.score == 75
+        assert reweighted.verdicts == result.verdicts
+
+
+class TestMergeVerdicts:
+
+    def test_updates_only_reevaluated_requirements(self):
+        base = score_verdicts(_verdicts(
+            ("Python", True, "CUMPLE"),
+            ("Docker", True, "NO_MENCIONA"),
+            ("AWS", False, "NO_MENCIONA"),
+        ))
+        update = _verdicts(("docker", False, "CUMPLE"))
+        update.explaination = "Explicó su uso de Docker."
+
+        merged = merge_verdicts(base, update)
+        assert merged.matching_requirements == ["Python", "Docker"]
+        assert merged.not_found_requirements == ["AWS"]
+        assert merged.score == 67
+        # La obligatoriedad original se conserva
+        assert [v.mandatory for v in merged.verdicts] == [True, True, False]
+        assert "Explicó su uso de Docker." in merged.explaination
+
+    def test_failed_mandatory_after_interview_discards(self):
+        base = score_verdicts(_verdicts(("Python", True, "CUMPLE"), ("Docker", True, "NO_MENCIONA")))
+        merged = merge_verdicts(base, _verdicts(("Docker", True, "NO_CUMPLE"), ("Kubernetes", False, "CUMPLE")))
+        assert merged.discarded is True
+        assert merged.score == 0
+        assert [v.requirement for v in merged.verdicts] == ["Python", "Docker"]
+
+
+class TestReconcileVerdicts:
+
+    OFFER = OfferRequirements(requirements=[
+        OfferRequirement(name="Python", mandatory=True),
+        OfferRequirement(name="Inglés C1", mandatory=True),
+        OfferRequirement(name="Docker", mandatory=False),
+    ])
+
+    def test_aligns_verdicts_with_offer_requirements(self):
+        verdicts = EvaluationVerdicts(verdicts=[
+            RequirementVerdict(requirement="[OBLIGATORIO] python", mandatory=False, verdict="CUMPLE"),
+            RequirementVerdict(requirement="ingles c1", mandatory=False, verdict="NO_CUMPLE"),
+            RequirementVerdict(requirement="Kubernetes", mandatory=True, verdict="NO_CUMPLE"),
+        ], explaination="ok")
+
+        reconciled = reconcile_verdicts(verdicts, self.OFFER)
+
+        assert [(v.requirement, v.mandatory, v.verdict) for v in reconciled.verdicts] == [
+            ("Python", True, "CUMPLE"),
+            ("Inglés C1", True, "NO_CUMPLE"),
+            ("Docker", False, "NO_MENCIONA"),
+        ]
+        assert reconciled.explaination == "ok"
+
+    def test_omitted_requirements_stay_in_the_denominator(self):
+        verdicts = EvaluationVerdicts(verdicts=[
+            RequirementVerdict(requirement="Python", mandatory=True, verdict="CUMPLE"),
+        ])
+
+        result = score_verdicts(reconcile_verdicts(verdicts, self.OFFER))
+
+        assert result.score == 33
+        assert result.not_found_requirements == ["Inglés C1", "Docker"]
+
+
+class TestEvaluationResultValidator:
+
+    def test_requirement_lists_are_reconciled(self):
+        result = EvaluationResult(
+            score=120,
+            discarded=False,
+            matching_requirements=["Python", "python", "Docker"],
+            unmatching_requirements=["Docker"],
+            not_found_requirements=["Python", "AWS"],
+        )
+        assert result.unmatching_requirements == ["Docker"]
+        assert result.matching_requirements == ["Python"]
+        assert result.not_found_requirements == ["AWS"]
+        assert result.score == 100
+
+    def test_discarded_forces_zero_score(self):
+        result = EvaluationResult(score=80, discarded=True, matching_requirements=[])
+        assert result.score == 0
@@ -0,0 +1,15 @@
+from src.utils.stats import percentile
+
+
+class TestPercentile:
+
+    def test_nearest_rank(self):
+        samples = [float(i) for i in range(1, 101)]
+        assert percentile(samples, 0.5) == 50
+        assert percentile(samples, 0.95) == 95
+        assert percentile(samples, 0.99) == 99
+
+    def test_bounds_and_empty(self):
+        assert percentile([], 0.5) == 0
+        assert percentile([3.0, 1.0, 2.0], 0.0) == 1.0
+        assert percentile([3.0, 1.0, 2.0], 1.0) == 3.0
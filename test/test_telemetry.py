@@ -0,0 +1,186 @@
+import asyncio
+import urllib.request
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from benchmarks.fake_llm import FakeChatModel, interview_script
+from src.core.cache import EvaluationCache
+from src.core.evaluator import CVAnalyzer
+from src.core.interviewer import Interviewer
+from src.llm.factory import ResiliencePolicy, ResilientRunnable
+from src.models.schemas import EvaluationVerdicts, RequirementVerdict
+from src.utils.telemetry import (
+    NOOP_SPAN,
+    JsonlSink,
+    Telemetry,
+    estimate_cost,
+    format_report,
+    load_spans,
+    set_telemetry,
+    start_metrics_server,
+    summarize_spans,
+    telemetry_span,
+)
+
+
+@pytest.fixture
+def telemetry(tmp_path):
+    sink = JsonlSink(tmp_path / "telemetry.jsonl")
+    telemetry = Telemetry(enabled=True, sink=sink)
+    previous = set_telemetry(telemetry)
+    yield telemetry
+    set_telemetry(previous)
+    sink.close()
+
+
+def _spans(telemetry):
+    return load_spans(telemetry.sink.path)
+
+
+class TestSpans:
+
+    def test_disabled_telemetry_is_a_shared_noop(self):
+        disabled = Telemetry(enabled=False)
+        span = disabled.span("analyze")
+        assert span is NOOP_SPAN
+
+        runnable = MagicMock()
+        with span:
+            span.invoke(runnable, {"cv": "x"})
+        # Sin callbacks añadidos: la llamada es la misma que sin telemetría
+        runnable.invoke.assert_called_once_with({"cv": "x"})
+        # Ninguna muestra, solo cabeceras
+        assert "{" not in disabled.prometheus()
+
+    def test_nested_spans_inherit_thread_and_record_errors(self, telemetry):
+        with telemetry_span("reevaluate", thread_id="t-1", provider="openai"):
+            with telemetry_span("analyze") as inner:
+                inner.set(cache_hit=True, requirements=2)
+        with pytest.raises(ValueError):
+            with telemetry_span("analyze", provider="openai"):
+                raise ValueError("fallo")
+
+        inner, outer, failed = _spans(telemetry)
+        assert (inner["stage"], inner["parent"], inner["thread_id"], inner["provider"]) == ("analyze", "reevaluate", "t-1", "openai")
+        assert inner["cache_hit"] is True and inner["attrs"] == {"requirements": 2}
+        assert outer["duration_ms"] >= inner["duration_ms"]
+        assert failed["error"] == "ValueError"
+
+    def test_callback_records_tokens_and_cost(self, telemetry):
+        llm = FakeChatModel(output_tokens=10)
+        with telemetry_span("interview.agent", provider="openai", model="gpt-5") as span:
+            span.invoke(llm, [HumanMessage(content="x" * 400)])
+
+        record = _spans(telemetry)[0]
+        assert record["prompt_tokens"] == 101
+        assert record["completion_tokens"] == 10
+        assert record["cost_usd"] == pytest.approx(estimate_cost("gpt-5", 101, 10))
+        assert estimate_cost("gpt-5-2025-08-07", 1_000_000, 0) == 1.25
+        assert estimate_cost("modelo-desconocido", 10, 10) == 0.0
+
+    def test_async_span(self, telemetry):
+        async def run():
+            with telemetry_span("analyze") as span:
+                return await span.ainvoke(FakeChatModel(), [HumanMessage(content="hola")])
+
+        asyncio.run(run())
+        assert _spans(telemetry)[0]["completion_tokens"] == 50
+
+    def test_resilient_calls_count_retries_and_fallbacks(self, telemetry):
+        calls = []
+
+        def flaky(_):
+            calls.append(1)
+            raise TimeoutError("lento")
+
+        runnable = ResilientRunnable(
+            [RunnableLambda(flaky), RunnableLambda(lambda _: "respaldo")],
+            ResiliencePolicy(max_retries=1, hedge_percentile=None), sleep=lambda s: None,
+        )
+        with telemetry_span("analyze"):
+            assert runnable.invoke("x") == "respaldo"
+
+        record = _spans(telemetry)[0]
+        assert (record["retries"], record["fallbacks"], record["hedges"]) == (1, 1, 0)
+
+
+class TestInstrumentation:
+
+    @patch('src.core.evaluator.get_llm')
+    def test_analyze_records_cache_hits(self, mock_get_llm, telemetry):
+        verdicts = EvaluationVerdicts(verdicts=[
+            RequirementVerdict(requirement="Python", mandatory=True, verdict="CUMPLE"),
+        ])
+        mock_chain = MagicMock()
+        mock_chain.invoke.return_value = verdicts
+        analyzer = CVAnalyzer(provider="openai", cache=EvaluationCache())
+        with patch('src.core.evaluator.get_evaluation_chain', return_value=mock_chain):
+            analyzer.analyze("Oferta", "CV")
+            analyzer.analyze("Oferta", "CV")
+
+        first, second = _spans(telemetry)
+        assert (first["stage"], first["provider"], first["model"]) == ("analyze", "openai", "gpt-5")
+        assert (first["cache_hit"], second["cache_hit"]) == (False, True)
+        # Con telemetría la cadena recibe la config con el callback del span
+        assert mock_chain.invoke.call_args.args[1]["callbacks"]
+
+    def test_interview_nodes_record_thread_id(self, telemetry):
+        llm = FakeChatModel(script=interview_script(["Python"]))
+        with patch("src.core.interviewer.get_llm", return_value=llm):
+            interviewer = Interviewer(provider="openai")
+        interviewer.initialize_interview(["Python"], "hilo-1")
+        interviewer.process_message("Me llamo Ana", "hilo-1")
+        interviewer.process_message("Usé Python en varios proyectos", "hilo-1")
+
+        spans = _spans(telemetry)
+        assert {s["stage"] for s in spans} == {"interview.agent", "interview.tools"}
+        assert {s["thread_id"] for s in spans} == {"hilo-1"}
+        tools = [s for s in spans if s["stage"] == "interview.tools"]
+        assert tools[0]["attrs"] == {"validations": 1}
+        assert all(s["completion_tokens"] == 50 for s in spans if s["stage"] == "interview.agent")
+
+
+class TestExport:
+
+    def test_prometheus_text(self, telemetry):
+        with telemetry_span("analyze", provider="openai") as span:
+            span.add_usage(100, 20)
+            span.increment("retries")
+
+        text = telemetry.prometheus()
+        assert 'velora_stage_duration_seconds_bucket{stage="analyze",provider="openai",le="+Inf"} 1' in text
+        assert 'velora_stage_duration_seconds_count{stage="analyze",provider="openai"} 1' in text
+        assert 'velora_llm_tokens_total{stage="analyze",provider="openai",kind="prompt"} 100' in text
+        assert 'velora_llm_retries_total{stage="analyze",provider="openai"} 1' in text
+        assert "# TYPE velora_llm_cost_usd_total counter" in text
+
+    def test_metrics_endpoint(self, telemetry):
+        with telemetry_span("analyze", provider="gemini"):
+            pass
+        server = start_metrics_server(telemetry, 0, host="127.0.0.1")
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read().decode("utf-8")
+        finally:
+            server.shutdown()
+        assert 'stage="analyze",provider="gemini"' in body
+
+    def test_report_per_stage_and_thread(self):
+        spans = [
+            {"stage": "analyze", "thread_id": None, "duration_ms": ms, "prompt_tokens": 10, "completion_tokens": 2,
+             "cost_usd": 0.001, "cache_hit": ms == 10, "retries": 0, "error": None}
+            for ms in (10, 20, 30, 40)
+        ] + [{"stage": "interview.agent", "thread_id": "t-1", "duration_ms": 500, "error": "TimeoutError"}]
+
+        rows = {r["stage"]: r for r in summarize_spans(spans)}
+        assert (rows["analyze"]["count"], rows["analyze"]["p50_ms"], rows["analyze"]["p95_ms"]) == (4, 20, 40)
+        assert rows["analyze"]["prompt_tokens"] == 40 and rows["analyze"]["cache_hits"] == 1
+        assert rows["interview.agent"]["errors"] == 1
+
+        by_thread = summarize_spans(spans, by="thread_id")
+        assert [r["thread_id"] for r in by_thread] == ["-", "t-1"]
+        assert "interview.agent" in format_report(summarize_spans(spans))
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from src.core.transcript import TranscriptCache
+
+
+def _history():
+    return [
+        SystemMessage(content="Sistema"),
+        HumanMessage(content="Saluda."),
+        AIMessage(content="Hola, ¿qué tal?"),
+        HumanMessage(content="Bien"),
+        AIMessage(content="", tool_calls=[{"name": "registrar_validacion", "args": {}, "id": "c1"}]),
+        ToolMessage(content="ok", tool_call_id="c1"),
+        # Contenido en forma de lista (Gemini)
+        AIMessage(content=[{"type": "text", "text": "Cuéntame más"}]),
+    ]
+
+
+class TestTranscriptCache:
+
+    def test_render_text(self):
+        text = TranscriptCache().render("t", _history())
+        assert text == (
+            "Candidato: Saluda.\n"
+            "Recruiter: Hola, ¿qué tal?\n"
+            "Candidato: Bien\n"
+            "Recruiter: Cuéntame más\n"
+        )
+
+    def test_render_jsonl(self):
+        lines = TranscriptCache().render("t", _history(), format="jsonl").splitlines()
+        turns = [json.loads(line) for line in lines]
+        assert turns[0] == {"turn": 0, "role": "candidato", "content": "Saluda."}
+        assert turns[-1] == {"turn": 3, "role": "recruiter", "content": "Cuéntame más"}
+
+    def test_incremental_only_processes_new_messages(self, monkeypatch):
+        cache = TranscriptCache()
+        messages = _history()
+        cache.render("t", messages)
+
+        processed = []
+        import src.core.transcript as transcript
+        original = transcript.get_safe_content
+        monkeypatch.setattr(transcript, "get_safe_content", lambda c: processed.append(c) or original(c))
+
+        messages = messages + [HumanMessage(content="Nuevo")]
+        text = cache.render("t", messages)
+        assert processed == ["Nuevo"]
+        assert text.endswith("Candidato: Nuevo\n")
+
+    def test_rewritten_history_is_rebuilt(self):
+        cache = TranscriptCache()
+        cache.render("t", _history())
+        text = cache.render("t", [HumanMessage(content="Otra conversación")])
+        assert text == "Candidato: Otra conversación\n"
+
+    def test_threads_are_independent(self):
+        cache = TranscriptCache()
+        cache.render("a", _history())
+        assert cache.render("b", [HumanMessage(content="B")]) == "Candidato: B\n"
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            TranscriptCache().render("t", [], format="xml")